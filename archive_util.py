@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contains PageArchive, a compressed, append-only archive of every page the
+scrapers fetch, and reparse, which runs the scrape_nfl.py parse functions
+over the archive on a process pool, so a new column can be extracted from
+pages already fetched in seconds instead of re-crawling the site.
+
+The archive is a single file of compressed frames, one per fetched page
+(zstd when the zstandard package is installed, zlib otherwise), with an
+index file next to it holding the url, offset, length and codec of each
+frame, one json line per page. When a page is fetched again, the newest
+frame wins.
+
+Usage:
+    python archive_util.py cache/pages.zst cache/manifest.jsonl --workers 8
+
+writes the rows of every archived page to a fresh crawl manifest, which the
+scrapers then read instead of fetching (see preprocessing.py).
+
+@author: markafunke
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# pages handed to each worker process at a time
+CHUNK_SIZE = 64
+
+
+def compress(body):
+    """
+    Returns (codec, compressed bytes) of the page text body
+    """
+    data = body.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(data)
+    return "zlib", zlib.compress(data, 9)
+
+
+def decompress(codec, frame):
+    if codec == "zstd":
+        if zstandard is None:
+            raise ImportError("zstandard is needed to read zstd frames")
+        return zstandard.ZstdDecompressor().decompress(frame).decode("utf-8")
+    return zlib.decompress(frame).decode("utf-8")
+
+
+def read_frame(f, entry):
+    f.seek(entry["offset"])
+    return decompress(entry["codec"], f.read(entry["length"]))
+
+
+class PageArchive:
+    """
+    Append-only archive of fetched pages at path, indexed in path + ".idx"
+
+    Parameters
+    ----------
+    path : string, path of the archive file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        self._lock = threading.Lock()
+        self._index = {}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        #last line of a run that died mid write
+                        continue
+                    self._index[entry["url"]] = entry
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, url):
+        return url in self._index
+
+    def urls(self):
+        return list(self._index)
+
+    def entries(self):
+        """
+        Returns the index entry of the newest frame of every url
+        """
+        return list(self._index.values())
+
+    def append(self, url, body):
+        """
+        Compresses body and appends it to the archive as the page for url
+        """
+        codec, frame = compress(body)
+        with self._lock:
+            with open(self.path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(frame)
+            entry = {"url": url, "offset": offset, "length": len(frame),
+                     "codec": codec, "fetched": time.time()}
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._index[url] = entry
+
+    def read(self, url):
+        """
+        Returns the newest page archived for url, None if there is none
+        """
+        entry = self._index.get(url)
+        if entry is None:
+            return None
+        with open(self.path, "rb") as f:
+            return read_frame(f, entry)
+
+    def __iter__(self):
+        """
+        Yields (url, page) for the newest page of every url, in file order
+        """
+        with open(self.path, "rb") as f:
+            for entry in sorted(self._index.values(), key=lambda e: e["offset"]):
+                yield entry["url"], read_frame(f, entry)
+
+
+def _parse_chunk(path, entries):
+    #runs in a worker process: read, decompress and parse each page
+    #listing pages also keep their "Next Page" link, as a live crawl
+    #records it, so crawl_listing can follow the listing from the manifest
+    import scrape_nfl
+    import table_util
+
+    listings = (scrape_nfl.parse_draft_page, scrape_nfl.parse_combine_page)
+    results = []
+    with open(path, "rb") as f:
+        for entry in entries:
+            parse = scrape_nfl.page_parser(entry["url"])
+            if parse is None:
+                continue
+            try:
+                page = read_frame(f, entry)
+                rows = parse(page, entry["url"])
+                next_url = (table_util.find_next_page(page, entry["url"])
+                            if parse in listings else None)
+                results.append((entry["url"], "ok", rows, None, next_url,
+                                entry["fetched"]))
+            except Exception as e:
+                results.append((entry["url"], "failed", [], repr(e), None,
+                                entry["fetched"]))
+    return results
+
+
+def reparse(archive, manifest, workers=None):
+    """
+    Parses every page in archive with the parse function scrape_nfl.py uses
+    for its url, spread over a pool of worker processes, and records the
+    rows of each page in manifest, with the "Next Page" link of listing
+    pages and the time the page was fetched, so current season pages
+    expire as if they had been crawled. Scrapers given the manifest then
+    read these rows instead of fetching the pages.
+
+    Parameters
+    ----------
+    archive : PageArchive
+    manifest : scrape_util.CrawlManifest
+    workers : int, number of worker processes. The default is every core.
+
+    Returns
+    -------
+    counts : dictionary of status : number of pages
+
+    """
+    import scrape_util
+
+    entries = archive.entries()
+    chunks = [entries[start:start + CHUNK_SIZE]
+              for start in range(0, len(entries), CHUNK_SIZE)]
+    counts = {"ok": 0, "failed": 0}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(_parse_chunk, [archive.path] * len(chunks),
+                                    chunks):
+            for url, status, rows, error, next_url, fetched in results:
+                manifest.record(url, status, rows, error, next_url=next_url,
+                                ttl=scrape_util.url_ttl(url), fetched=fetched)
+                counts[status] += 1
+    manifest.compact()
+    return counts
+
+
+def main():
+    import scrape_util
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("archive", help="archive file, e.g. cache/pages.zst")
+    parser.add_argument("manifest", help="crawl manifest to write the rows to")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes, the default is every core")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = reparse(PageArchive(args.archive),
+                     scrape_util.CrawlManifest(args.manifest), args.workers)
+    print(f"parsed {counts['ok']} pages ({counts['failed']} failed) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
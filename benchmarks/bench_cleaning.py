@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks the vectorized transforms of clean_util.py (and the team
+abbreviations of franchise_util.py) against the row by
+row apply/applymap/map versions they replaced, on a synthetic frame shaped
+like the merged draft data, and checks both give identical output.
+
+Usage:
+    python benchmarks/bench_cleaning.py --rows 1000000
+
+@author: markafunke
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import clean_util
+import franchise_util
+import scrape_nfl
+
+CONFERENCES = ["SEC", "Big Ten", "ACC", "Big 12", "Pac-10", "Pac-12",
+               "MAC", "MWC", "Sun Belt", "CUSA", "Ind", None]
+CLASSES = ["SR", "JR", "SO", "FR", "", None]
+NAMES = list(clean_util.PLAYER_ISSUES) + [" Jerry Rice ", "Randy Moss", "Cris Carter"]
+
+
+def synthetic_frame(rows, seed=0):
+    """
+    Returns a frame of rows players with the columns of the clean stage,
+    plus "player", "team" and "year_merge", holding strings as scraped
+    (including blanks, whitespace and bad heights)
+    """
+    rng = np.random.default_rng(seed)
+
+    def numbers(low, high, blank=0.05):
+        values = rng.integers(low, high, rows).astype(str).astype(object)
+        values[rng.random(rows) < blank] = " "
+        return values
+
+    heights = (rng.integers(5, 7, rows).astype(str).astype(object) + "-"
+               + rng.integers(0, 12, rows).astype(str).astype(object))
+    heights[rng.random(rows) < 0.05] = ""
+    teams = list(franchise_util.TEAM_FRANCHISES)
+    return pd.DataFrame({
+        "player": rng.choice(NAMES, rows),
+        "team": rng.choice(teams, rows),
+        "year_merge": rng.integers(2000, 2021, rows),
+        "player_clean": rng.choice(NAMES, rows),
+        "rookie_rec_yards": numbers(0, 1500),
+        "rnd": numbers(1, 8),
+        "pick": numbers(1, 260),
+        "conf": rng.choice(np.array(CONFERENCES, dtype=object), rows),
+        "col_class": rng.choice(np.array(CLASSES, dtype=object), rows),
+        "col_scrim_yds": numbers(0, 2000),
+        "col_rec_yds": numbers(0, 2000),
+        "height": heights,
+        "weight": numbers(160, 240),
+        "time_40": numbers(4, 5),
+        "total_yards": numbers(2500, 5500),
+        "vertical": numbers(28, 44),
+    })
+
+
+def get_inches(el):
+    r = re.compile(r"""(\d+)- *(\d+)""")
+    m = r.match(el)
+    if m == None:
+        return float('NaN')
+    else:
+        return int(m.group(1))*12 + float(m.group(2))
+
+
+NUMERICAL = (["rookie_rec_yards","rnd","pick","col_scrim_yds","col_rec_yds"
+             ,"weight", "time_40", "total_yards", "vertical"])
+
+
+def clean_rowwise(df):
+    #previous approach: apply, applymap and map lambdas row by row
+    df = df.copy()
+    df["player_clean"] = df.apply(scrape_nfl.clean_player_name, axis=1)
+    df["team_abbrev"] = df.apply(scrape_nfl.add_team_abbrev, axis=1)
+    df = df.applymap(lambda x: np.nan if isinstance(x, str) and (not x or x.isspace()) else x)
+    for column in NUMERICAL:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    df["height"] = df["height"].map(get_inches, na_action='ignore')
+    power_5_conf = ["SEC", "Big Ten", "ACC", "Big 12", "Pac-12"]
+    df["conf"] = df["conf"].map(lambda x: "Pac-12" if x == "Pac-10" else x)
+    df["conf"] = df["conf"].map(lambda x: x if x in power_5_conf else "Other")
+    df["power_5"] = df["conf"].map(lambda x: 1 if x in power_5_conf else 0)
+    df["isSEC"] = df["conf"].map(lambda x: 1 if x == "SEC" else 0)
+    df["isRd1"] = df["rnd"].map(lambda x: 1 if x == 1 else 0)
+    df["SEC_Rd1"] = df["isSEC"] * df["isRd1"]
+    underclassmen = ["JR", "SO", "FR"]
+    df["left_early"] = df["col_class"].map(lambda x: 1 if x in underclassmen else 0)
+    df.drop("col_class", axis = 1, inplace = True)
+    return df
+
+
+def clean_vectorized(df):
+    df = df.copy()
+    df["player_clean"] = clean_util.clean_player_names(df["player"])
+    df["team_abbrev"] = franchise_util.team_abbrevs(df["team"], df["year_merge"])
+    df = clean_util.blank_to_nan(df)
+    for column in NUMERICAL:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    df["height"] = clean_util.height_inches(df["height"])
+    return clean_util.add_flags(df)
+
+
+def time_clean(clean, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = clean(df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=1_000_000,
+                        help="rows of the synthetic frame")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="timing runs, the best is reported")
+    args = parser.parse_args()
+
+    df = synthetic_frame(args.rows)
+    rowwise, expected = time_clean(clean_rowwise, df, args.repeat)
+    vectorized, result = time_clean(clean_vectorized, df, args.repeat)
+    #strict: pandas only warns when one path has None where the other has NaN
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", FutureWarning)
+        pd.testing.assert_frame_equal(result, expected)
+
+    print(f"rows:              {args.rows}")
+    print(f"row by row:        {rowwise:8.2f} s")
+    print(f"clean_util:        {vectorized:8.2f} s")
+    print(f"speedup:           {rowwise / vectorized:8.1f}x (identical output)")
+
+
+if __name__ == '__main__':
+    main()
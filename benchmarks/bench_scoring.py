@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks scoring a draft class with a model artifact (see score_util.py):
+the cold start of a fresh process importing score_util and loading the
+artifact, and the latency of scoring batches through a local
+ScoringServer, first request and warm.
+
+Save the artifact with train_regression.py first, then benchmark it:
+    python benchmarks/bench_scoring.py model.json --prospects 256 --requests 200
+
+@author: markafunke
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import score_util
+
+# run in a fresh interpreter, prints milliseconds to import and to load
+COLD_START = """
+import time
+start = time.perf_counter()
+import score_util
+imported = time.perf_counter()
+score_util.Scorer.load({path!r})
+loaded = time.perf_counter()
+print((imported - start) * 1000, (loaded - imported) * 1000)
+"""
+
+
+def cold_start(path, repeats):
+    """
+    Returns the median milliseconds a fresh process takes to import
+    score_util and to load the artifact at path
+    """
+    imports, loads = [], []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", COLD_START.format(path=path)],
+                                cwd=ROOT, capture_output=True, text=True,
+                                check=True).stdout
+        import_ms, load_ms = map(float, output.split())
+        imports.append(import_ms)
+        loads.append(load_ms)
+    return statistics.median(imports), statistics.median(loads)
+
+
+def draft_class(size, seed=22):
+    """
+    Returns size synthetic prospects, one per pick
+    """
+    rng = random.Random(seed)
+    confs = ["SEC", "Big Ten", "ACC", "Big 12", "Pac-12", "Other"]
+    return [{"pick": pick,
+             "col_rec_yds": rng.randint(200, 1800),
+             "col_class": rng.choice(["SR", "JR", "SO"]),
+             "conf": rng.choice(confs),
+             "total_yards": rng.randint(4500, 6500)} for pick in range(1, size + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("model", help="model artifact, e.g. model.json")
+    parser.add_argument("--prospects", type=int, default=256,
+                        help="prospects per batch")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--cold-starts", type=int, default=5)
+    args = parser.parse_args()
+    path = os.path.abspath(args.model)
+
+    import_ms, load_ms = cold_start(path, args.cold_starts)
+    print(f"cold start: import {import_ms:.1f}ms, load {load_ms:.2f}ms")
+
+    server = score_util.ScoringServer(path)
+    server.start()
+    body = json.dumps({"prospects": draft_class(args.prospects)}).encode("utf-8")
+    latencies = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        request = urllib.request.Request(f"{server.url}/score", data=body)
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+    server.shutdown()
+
+    health = server.health()
+    warm = sorted(latencies[1:]) or latencies
+    print(f"first request: {latencies[0]:.2f}ms round trip, "
+          f"{health['first_score_ms']:.3f}ms scoring")
+    print(f"warm requests: median {statistics.median(warm):.2f}ms, "
+          f"p99 {warm[int(len(warm) * 0.99) - 1]:.2f}ms round trip, "
+          f"mean {health['mean_score_ms']:.3f}ms scoring "
+          f"({args.prospects} prospects each)")
+
+
+if __name__ == '__main__':
+    main()
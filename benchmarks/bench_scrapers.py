@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks the throughput of every scrape_* function in scrape_nfl.py
+against a local replay server (see replay_server.py), reporting pages/sec,
+CPU time per page and peak Python memory for each scraper.
+
+The replay server runs in its own process, so its threads don't count
+towards the CPU time of the scrapers. Peak memory is measured in a second
+run of each scraper, as tracing allocations slows the timed run down.
+
+Record the year range first, then benchmark it:
+    python replay_server.py record 2018 2019 --dir replay
+    python benchmarks/bench_scrapers.py replay 2018 2019 --latency 0.2 --jitter 0.1
+
+@author: markafunke
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import scrape_nfl
+import scrape_util
+
+
+def start_server(args):
+    """
+    Starts replay_server.py serving args.directory on a free port,
+    returns the process and the url it serves at
+    """
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "replay_server.py"),
+                                "serve", "--dir", args.directory, "--port", "0",
+                                "--latency", str(args.latency),
+                                "--jitter", str(args.jitter),
+                                "--error-rate", str(args.error_rate),
+                                "--seed", str(args.seed)],
+                               stdout=subprocess.PIPE, text=True)
+    #"replaying <directory> at <url>"
+    url = process.stdout.readline().split()[-1]
+    return process, url
+
+
+def _responses():
+    #requests and status code counts of every scraper request so far
+    metrics = scrape_util.telemetry.to_dict()
+    return metrics["counters"].get("requests", 0), metrics["status_codes"]
+
+
+def measure(name, scrape):
+    """
+    Runs scrape() once for its throughput, and once more for its peak
+    memory, returns the result of the first run and the measurements
+    """
+    requests_before, codes_before = _responses()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+
+    result = scrape()
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    requests_after, codes_after = _responses()
+
+    tracemalloc.start()
+    scrape()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    pages = requests_after - requests_before
+    responses = {code: count - codes_before.get(code, 0)
+                 for code, count in codes_after.items()}
+    return result, {"scraper": name,
+                    "pages": pages,
+                    "rows": len(result),
+                    "seconds": wall,
+                    "pages_per_sec": pages / wall if wall else 0,
+                    "cpu_ms_per_page": cpu * 1000 / pages if pages else 0,
+                    "peak_mb": peak / 1024 ** 2,
+                    "errors": sum(count for code, count in responses.items()
+                                  if code in ("429", "500", "503")),
+                    "missing": responses.get("404", 0)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("directory", help="recording made by replay_server.py")
+    parser.add_argument("min_year", type=int)
+    parser.add_argument("max_year", type=int)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--delay", type=float, default=0,
+                        help="politeness delay per request, the default is 0")
+    parser.add_argument("--seed", type=int, default=22)
+    args = parser.parse_args()
+
+    server, url = start_server(args)
+    scrape_util.REPLAY_SERVER = url
+    scrape_util.POLITE_DELAY = args.delay
+
+    results = []
+    try:
+        draft_df, stats = measure("scrape_draft_data", lambda: scrape_nfl.scrape_draft_data(args.min_year, args.max_year))
+        results.append(stats)
+        combine_df, stats = measure("scrape_combine_data", lambda: scrape_nfl.scrape_combine_data(args.min_year, args.max_year))
+        results.append(stats)
+        _, stats = measure("scrape_team_data", lambda: scrape_nfl.scrape_team_data(args.min_year - 3, args.max_year - 1))
+        results.append(stats)
+
+        frontier = scrape_util.CrawlFrontier()
+        frontier.add(draft_df, "draft")
+        frontier.add(combine_df, "combine")
+        _, stats = measure("scrape_college_data", lambda: scrape_nfl.scrape_college_data(frontier.frame("college_link")))
+        results.append(stats)
+        _, stats = measure("scrape_nfl_data", lambda: scrape_nfl.scrape_nfl_data(frontier.frame("nfl_link")))
+        results.append(stats)
+    finally:
+        scrape_util.close_session()
+        server.terminate()
+        server.wait()
+
+    print(f"{'scraper':<22}{'pages':>7}{'rows':>7}{'sec':>9}"
+          f"{'pages/s':>10}{'cpu ms/pg':>11}{'peak MB':>9}")
+    for stats in results:
+        print(f"{stats['scraper']:<22}{stats['pages']:>7}{stats['rows']:>7}"
+              f"{stats['seconds']:>9.2f}{stats['pages_per_sec']:>10.1f}"
+              f"{stats['cpu_ms_per_page']:>11.2f}{stats['peak_mb']:>9.1f}")
+    print(f"injected errors: {sum(stats['errors'] for stats in results)}, "
+          f"missing pages: {sum(stats['missing'] for stats in results)} "
+          f"(of the timed runs)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks the per-page parse time of table_util.parse_table against
+building a full BeautifulSoup tree of the page, on saved pages.
+
+Pages are read from a directory of .html files, or from the gzip entries
+of a scrape_util.ResponseCache directory (e.g. cache/http after a run of
+preprocessing.py).
+
+Usage:
+    python benchmarks/bench_table_parser.py cache/http --repeat 3
+
+@author: markafunke
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import table_util
+
+
+def load_pages(directory):
+    """
+    Returns a list of (url or file name, page text) for every saved page
+    """
+    pages = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if name.endswith(".gz"):
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    entry = json.load(f)
+                pages.append((entry["url"], entry["body"]))
+            elif name.endswith((".html", ".htm")):
+                with open(path, encoding="utf-8") as f:
+                    pages.append((name, f.read()))
+    return pages
+
+
+def table_id(url):
+    """
+    Returns the id of the table scrape_nfl.py reads from the page at url
+    """
+    if "/years/" in url:
+        return "passing"
+    if "/players/" in url and "sports-reference" not in url:
+        return "receiving_and_rushing"
+    return None
+
+
+def parse_full_tree(page, table_id=None):
+    #previous approach: full tree, then every cell of every row by position
+    soup = BeautifulSoup(page, "lxml")
+    if table_id is None:
+        table = soup.find("table")
+    else:
+        table = soup.find("table", id=table_id)
+    if table is None:
+        return []
+    return [[cell.text for cell in row.find_all("td")]
+            for row in table.find_all("tr")]
+
+
+def time_parser(parser, pages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for url, page in pages:
+            parser(page, table_id(url))
+        best = min(best, time.perf_counter() - start)
+    return best / len(pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("directory", help="saved pages or ResponseCache directory")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timing runs, the best is reported")
+    args = parser.parse_args()
+
+    pages = load_pages(args.directory)
+    if not pages:
+        sys.exit(f"no saved pages found in {args.directory}")
+
+    full_tree = time_parser(parse_full_tree, pages, args.repeat)
+    targeted = time_parser(table_util.parse_table, pages, args.repeat)
+
+    print(f"pages:                  {len(pages)}")
+    print(f"full BeautifulSoup tree: {full_tree * 1000:8.2f} ms/page")
+    print(f"table_util.parse_table:  {targeted * 1000:8.2f} ms/page")
+    print(f"speedup:                 {full_tree / targeted:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
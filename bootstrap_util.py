@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contains functions used by train_regression.py to bootstrap the final
+linear model, giving confidence intervals for its coefficients, test R2
+and RMSE, and prediction intervals for every player.
+
+Resamples are drawn as a matrix of row counts (one multinomial draw of n
+rows per resample), so every refit is a weighted least squares solve:
+the weighted Gram matrices of a whole batch of resamples are built with
+one matrix product and solved with one batched pseudo-inverse, instead of
+fitting a LinearRegression per resample in a Python loop.
+
+resample_counts - row counts of bootstrap resamples
+bootstrap_coefs - intercept and coefficients of the model fit on resamples
+bootstrap_scores - test R2 and RMSE of each resampled fit
+prediction_intervals - yards prediction intervals of every player
+intervals - percentile interval of every column of bootstrap draws
+
+@author: markafunke
+"""
+import numpy as np
+import pandas as pd
+
+# resamples solved at a time, bounds memory to batch x rows x features
+BATCH_SIZE = 500
+
+
+def resample_counts(n, n_boot, rng):
+    """
+    Returns an (n_boot, n) array of how many times each of n rows is drawn
+    in each bootstrap resample
+    """
+    return rng.multinomial(n, np.full(n, 1 / n), size=n_boot)
+
+
+def _design(X):
+    #features with a leading intercept column
+    X = np.asarray(X, dtype=float)
+    return np.column_stack([np.ones(len(X)), X])
+
+
+def bootstrap_coefs(X, y, n_boot=2000, seed=None, batch_size=BATCH_SIZE):
+    """
+    Fits linear regression of y on X to n_boot bootstrap resamples of the
+    rows
+
+    Parameters
+    ----------
+    X : DataFrame of features
+    y : Series of target variable (cube root of yards)
+    n_boot : Integer number of resamples. The default is 2000.
+    seed : Integer to set random state. The default is None.
+    batch_size : Integer resamples solved at a time.
+                 The default is BATCH_SIZE.
+
+    Returns
+    -------
+    coefs : DataFrame of n_boot rows, "intercept" and one column per feature
+
+    """
+    columns = ["intercept"] + list(X.columns)
+    A, y = _design(X), np.asarray(y, dtype=float)
+    rng = np.random.default_rng(seed)
+
+    coefs = []
+    for start in range(0, n_boot, batch_size):
+        counts = resample_counts(len(y), min(batch_size, n_boot - start), rng)
+        # A'WA and A'Wy of every resample, W its diagonal row counts
+        weighted = counts[:, :, None] * A[None, :, :]
+        gram = np.einsum("bnp,nq->bpq", weighted, A)
+        aty = np.einsum("bnp,n->bp", weighted, y)
+        # pinv keeps resamples missing a feature (e.g. no SEC_Rd1 player) solvable
+        coefs.append(np.einsum("bpq,bq->bp", np.linalg.pinv(gram), aty))
+    return pd.DataFrame(np.concatenate(coefs), columns=columns)
+
+
+def bootstrap_scores(coefs, X_test, y_test, seed=None):
+    """
+    Scores each resampled fit on its own resample of the test set, so the
+    spread covers both the fit and the test set drawn
+
+    Parameters
+    ----------
+    coefs : DataFrame from bootstrap_coefs
+    X_test : DataFrame of test features
+    y_test : Series of test target variable (cube root of yards)
+    seed : Integer to set random state. The default is None.
+
+    Returns
+    -------
+    scores : DataFrame of "r2" (cube root scale) and "rmse" (yards) of
+             every resample
+
+    """
+    A, y = _design(X_test), np.asarray(y_test, dtype=float)
+    counts = resample_counts(len(y), len(coefs), np.random.default_rng(seed))
+    pred = coefs.to_numpy() @ A.T
+
+    n = counts.sum(axis=1)
+    y_mean = counts @ y / n
+    sse = (counts * (y[None, :] - pred) ** 2).sum(axis=1)
+    sst = (counts * (y[None, :] - y_mean[:, None]) ** 2).sum(axis=1)
+    cubed_sse = (counts * (y[None, :] ** 3 - pred ** 3) ** 2).sum(axis=1)
+    return pd.DataFrame({"r2": 1 - sse / sst, "rmse": np.sqrt(cubed_sse / n)})
+
+
+def prediction_intervals(coefs, X, y, X_new, level=0.95, seed=None):
+    """
+    Returns the yards prediction and prediction interval of every row of
+    X_new. Each resampled fit's prediction is given a residual drawn from
+    the fit on all of X, and the interval is taken on the cube root scale
+    and cubed.
+
+    Parameters
+    ----------
+    coefs : DataFrame from bootstrap_coefs
+    X : DataFrame of the features the model was fit on
+    y : Series of the target variable it was fit on (cube root of yards)
+    X_new : DataFrame of features of the players to predict
+    level : Float coverage of the interval. The default is 0.95.
+    seed : Integer to set random state. The default is None.
+
+    Returns
+    -------
+    DataFrame with the index of X_new and columns "pred", "pred_lower" and
+    "pred_upper", in yards
+
+    """
+    A, y = _design(X), np.asarray(y, dtype=float)
+    full_fit = np.linalg.lstsq(A, y, rcond=None)[0]
+    residuals = y - A @ full_fit
+
+    A_new = _design(X_new)
+    rng = np.random.default_rng(seed)
+    draws = A_new @ coefs.to_numpy().T
+    draws += rng.choice(residuals, size=draws.shape)
+    lower, upper = np.quantile(draws, [(1 - level) / 2, (1 + level) / 2], axis=1)
+    return pd.DataFrame({"pred": (A_new @ full_fit) ** 3,
+                         "pred_lower": lower ** 3,
+                         "pred_upper": upper ** 3}, index=X_new.index)
+
+
+def intervals(draws, level=0.95):
+    """
+    Returns the median and percentile interval of every column of draws
+    (e.g. bootstrap_coefs or bootstrap_scores), one row per column
+    """
+    return pd.DataFrame({"lower": draws.quantile((1 - level) / 2),
+                         "median": draws.median(),
+                         "upper": draws.quantile((1 + level) / 2)})
@@ -0,0 +1,94 @@
+"""
+Contains the vectorized transforms preprocessing.py uses to clean the
+merged data. Each transform works on whole columns with pandas string
+methods, replace mappings, isin and np.where, and gives the same output
+as the row by row functions it replaced (scrape_nfl.clean_player_name
+and the per-cell lambdas of the clean stage). Team abbreviations are in
+franchise_util.py.
+benchmarks/bench_cleaning.py checks both give the same frame and times them.
+
+clean_player_names - strip names and fix known spelling differences
+blank_to_nan - convert empty and whitespace strings to NaN
+height_inches - convert "6-2" heights to inches
+add_flags - group conferences and add the dummy features
+
+@author: markafunke
+"""
+import numpy as np
+
+#fix 8 outlier cases found through EDA
+PLAYER_ISSUES = {'Ted Ginn Jr.' : 'Ted Ginn',
+                 'Odell Beckham Jr.' : 'Odell Beckham, Jr.',
+                 'Gary Jennings Jr' : 'Gary Jennings',
+                 'Michael Pittman Jr.' : 'Michael Pittman',
+                 'Lynn Bowden Jr.' : 'Lynn Bowden',
+                 'JJ Nelson' : 'J.J. Nelson',
+                 'JJ Arcega-Whiteside' : 'J.J. Arcega-Whiteside'}
+
+POWER_5_CONF = ["SEC", "Big Ten", "ACC", "Big 12", "Pac-12"]
+
+#former names of conferences, merged into their current name
+CONF_NAMES = {"Pac-10": "Pac-12"}
+UNDERCLASSMEN = ["JR", "SO", "FR"]
+
+
+def clean_player_names(player):
+    """
+    Returns player (Series of names) with whitespace stripped and the
+    names in PLAYER_ISSUES replaced by their spelling in the combine data
+    """
+    return player.str.strip().replace(PLAYER_ISSUES)
+
+
+def blank_to_nan(df):
+    """
+    Returns df with every empty or whitespace-only string converted to NaN
+    """
+    df = df.copy()
+    for column in df.columns[df.dtypes == object]:
+        try:
+            blank = df[column].str.fullmatch(r"\s*", na=False).astype(bool)
+        except AttributeError:
+            #no strings in the column
+            continue
+        if blank.any():
+            df[column] = df[column].mask(blank, np.nan)
+    return df
+
+
+def height_inches(height):
+    """
+    Returns height (Series of "feet-inches" strings) in inches,
+    NaN where a height doesn't start with that pattern
+    """
+    parts = height.str.extract(r"""^(\d+)- *(\d+)""")
+    return parts[0].astype(float) * 12 + parts[1].astype(float)
+
+
+def add_flags(df):
+    """
+    Renames conferences in CONF_NAMES, converts missing and conferences
+    out of the "Power 5" to "Other",
+    and adds the dummy columns power_5, isSEC, isRd1, SEC_Rd1 and
+    left_early (from col_class, which is dropped)
+
+    Parameters
+    ----------
+    df : DataFrame containing "conf", "rnd" (numeric) and "col_class",
+         as text or categoricals
+
+    Returns
+    -------
+    df : DataFrame
+
+    """
+    df = df.copy()
+    conf = df["conf"].astype(object).replace(CONF_NAMES)
+    in_power_5 = conf.isin(POWER_5_CONF)
+    df["conf"] = np.where(in_power_5, conf, "Other")
+    df["power_5"] = in_power_5.astype(np.int64)
+    df["isSEC"] = (df["conf"] == "SEC").astype(np.int64)
+    df["isRd1"] = (df["rnd"] == 1).fillna(False).astype(np.int64)
+    df["SEC_Rd1"] = df["isSEC"] * df["isRd1"]
+    df["left_early"] = df["col_class"].isin(UNDERCLASSMEN).astype(np.int64)
+    return df.drop("col_class", axis=1)
@@ -0,0 +1,193 @@
+"""
+Contains the franchise history of every NFL team, used by preprocessing.py
+to join team seasons to drafted players.
+
+TEAM_FRANCHISES maps every team name the site has used to a franchise id,
+and FRANCHISE_HISTORY holds the abbreviation of each franchise with the
+seasons it was valid (valid_from to valid_to, inclusive). Abbreviations are
+looked up with a sorted merge_asof against the history, so relocations
+(Oakland to Las Vegas, St. Louis and San Diego to Los Angeles) and renames
+(Washington) hold for every season after they happened, not a single year.
+
+franchises - franchise id of every team name
+abbrevs - abbreviation of every franchise in a season
+team_abbrevs - abbreviation of every team name in a season
+abbrev_franchises - franchise id of every abbreviation
+abbrev_at - row by row version of abbrevs
+season_lags - a team stat over each franchise's prior seasons
+
+@author: markafunke
+"""
+import numpy as np
+import pandas as pd
+
+# last season of an abbreviation still in use
+CURRENT = 9999
+
+TEAM_FRANCHISES = {'Arizona Cardinals' : 'crd',
+                   'Atlanta Falcons' : 'atl',
+                   'Baltimore Ravens' : 'rav',
+                   'Buffalo Bills' : 'buf',
+                   'Carolina Panthers' : 'car',
+                   'Chicago Bears' : 'chi',
+                   'Cincinnati Bengals' : 'cin',
+                   'Cleveland Browns' : 'cle',
+                   'Dallas Cowboys' : 'dal',
+                   'Denver Broncos' : 'den',
+                   'Detroit Lions' : 'det',
+                   'Green Bay Packers' : 'gnb',
+                   'Houston Texans' : 'htx',
+                   'Indianapolis Colts' : 'clt',
+                   'Jacksonville Jaguars' : 'jax',
+                   'Kansas City Chiefs' : 'kan',
+                   'San Diego Chargers' : 'sdg',
+                   'Los Angeles Chargers' : 'sdg',
+                   'St. Louis Rams' : 'ram',
+                   'Los Angeles Rams' : 'ram',
+                   'Miami Dolphins' : 'mia',
+                   'Minnesota Vikings' : 'min',
+                   'New Orleans Saints' : 'nor',
+                   'New England Patriots' : 'nwe',
+                   'New York Giants' : 'nyg',
+                   'New York Jets' : 'nyj',
+                   'Oakland Raiders' : 'rai',
+                   'Las Vegas Raiders' : 'rai',
+                   'Philadelphia Eagles' : 'phi',
+                   'Pittsburgh Steelers' : 'pit',
+                   'Seattle Seahawks' : 'sea',
+                   'San Francisco 49ers' : 'sfo',
+                   'Tampa Bay Buccaneers' : 'tam',
+                   'Tennessee Oilers' : 'oti',
+                   'Tennessee Titans' : 'oti',
+                   'Washington Redskins' : 'was',
+                   'Washington Football Team' : 'was',
+                   'Washington Commanders' : 'was'}
+
+# (franchise, abbreviation, valid_from, valid_to)
+FRANCHISE_HISTORY = pd.DataFrame([
+    ("crd", "ARI", 1994, CURRENT), ("atl", "ATL", 1966, CURRENT),
+    ("rav", "BAL", 1996, CURRENT), ("buf", "BUF", 1960, CURRENT),
+    ("car", "CAR", 1995, CURRENT), ("chi", "CHI", 1920, CURRENT),
+    ("cin", "CIN", 1968, CURRENT), ("cle", "CLE", 1999, CURRENT),
+    ("dal", "DAL", 1960, CURRENT), ("den", "DEN", 1960, CURRENT),
+    ("det", "DET", 1934, CURRENT), ("gnb", "GNB", 1921, CURRENT),
+    ("htx", "HOU", 2002, CURRENT), ("clt", "IND", 1984, CURRENT),
+    ("jax", "JAX", 1995, CURRENT), ("kan", "KAN", 1963, CURRENT),
+    ("sdg", "SDG", 1961, 2016), ("sdg", "LAC", 2017, CURRENT),
+    ("ram", "STL", 1995, 2015), ("ram", "LAR", 2016, CURRENT),
+    ("mia", "MIA", 1966, CURRENT), ("min", "MIN", 1961, CURRENT),
+    ("nor", "NOR", 1967, CURRENT), ("nwe", "NWE", 1971, CURRENT),
+    ("nyg", "NYG", 1925, CURRENT), ("nyj", "NYJ", 1963, CURRENT),
+    ("rai", "OAK", 1995, 2019), ("rai", "LVR", 2020, CURRENT),
+    ("phi", "PHI", 1933, CURRENT), ("pit", "PIT", 1933, CURRENT),
+    ("sea", "SEA", 1976, CURRENT), ("sfo", "SFO", 1950, CURRENT),
+    ("tam", "TAM", 1976, CURRENT), ("oti", "TEN", 1997, CURRENT),
+    ("was", "WAS", 1937, CURRENT),
+], columns=["franchise", "abbrev", "valid_from", "valid_to"])
+
+ABBREV_FRANCHISES = dict(zip(FRANCHISE_HISTORY["abbrev"],
+                             FRANCHISE_HISTORY["franchise"]))
+
+# franchise : list of (valid_from, valid_to, abbreviation), for abbrev_at
+FRANCHISE_ABBREVS = {franchise: list(zip(rows["valid_from"], rows["valid_to"],
+                                          rows["abbrev"]))
+                     for franchise, rows in FRANCHISE_HISTORY.groupby("franchise")}
+
+
+def franchises(team):
+    """
+    Returns the franchise id of every full team name in team (a Series).
+    Raises KeyError listing any name not in TEAM_FRANCHISES.
+    """
+    franchise = team.astype(object).map(TEAM_FRANCHISES)
+    unknown = franchise.isna() & team.notna()
+    if unknown.any():
+        raise KeyError(sorted(team[unknown].astype(str).unique()))
+    return franchise
+
+
+def abbrevs(franchise, season):
+    """
+    Returns the abbreviation of every franchise in the aligned season,
+    missing where the franchise had none that season
+
+    Parameters
+    ----------
+    franchise : Series of franchise ids
+    season : Series of seasons (integers), aligned with franchise
+
+    Returns
+    -------
+    abbrev : Series of strings, with the index of franchise
+
+    """
+    lookup = pd.DataFrame({"franchise": franchise.astype(object).values,
+                           "season": pd.to_numeric(season).fillna(-1).astype(np.int64).values,
+                           "row": np.arange(len(franchise))})
+    history = FRANCHISE_HISTORY.sort_values("valid_from")
+    joined = pd.merge_asof(lookup.sort_values("season"), history,
+                           left_on="season", right_on="valid_from",
+                           by="franchise", direction="backward")
+    joined.loc[joined["season"] > joined["valid_to"], "abbrev"] = np.nan
+    joined = joined.sort_values("row")
+    return pd.Series(joined["abbrev"].values, index=franchise.index, dtype=object)
+
+
+def team_abbrevs(team, season):
+    """
+    Returns the abbreviation of every full team name in team, as used in
+    the draft data of the aligned season (e.g. "Oakland Raiders" is "LVR"
+    for seasons from 2020)
+    """
+    return abbrevs(franchises(team), season)
+
+
+def abbrev_franchises(abbrev):
+    """
+    Returns the franchise id of every abbreviation in abbrev (a Series)
+    """
+    return abbrev.astype(object).map(ABBREV_FRANCHISES)
+
+
+def abbrev_at(franchise, season):
+    """
+    Row by row version of abbrevs, for a single franchise and season
+    """
+    for valid_from, valid_to, abbrev in FRANCHISE_ABBREVS.get(franchise, []):
+        if valid_from <= season <= valid_to:
+            return abbrev
+    return np.nan
+
+
+def season_lags(team_df, value="total_yards", lags=(1, 2, 3)):
+    """
+    Returns value for each franchise over its prior seasons, computed in
+    one pass by pivoting team seasons to a season x franchise table and
+    shifting it once per lag
+
+    Parameters
+    ----------
+    team_df : DataFrame containing "team" (full name), "year" (season)
+              and value
+    value : string, column of team_df. The default is "total_yards".
+    lags : seasons back to take value from. The default is (1, 2, 3).
+
+    Returns
+    -------
+    lagged : DataFrame with columns "franchise", "year" (the season the
+             lags are features for, e.g. a draft year) and value_lag<n>
+             for every n in lags
+
+    """
+    seasons = pd.DataFrame({"franchise": franchises(team_df["team"]).values,
+                            "year": pd.to_numeric(team_df["year"]).astype(np.int64).values,
+                            value: team_df[value].values})
+    wide = seasons.pivot(index="year", columns="franchise", values=value)
+    years = range(wide.index.min(), wide.index.max() + max(lags) + 1)
+    wide = wide.reindex(years)
+
+    lagged = pd.DataFrame({"franchise": np.tile(wide.columns.values, len(wide)),
+                           "year": np.repeat(wide.index.values, len(wide.columns))})
+    for lag in lags:
+        lagged[f"{value}_lag{lag}"] = wide.shift(lag).to_numpy().ravel()
+    return lagged
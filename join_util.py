@@ -0,0 +1,113 @@
+"""
+Contains functions used by preprocessing.py to join the scraped tables
+onto the draft data in a single pass.
+
+Each source table is indexed once on its key, every base row looks up the
+position of its matching source row (lookup), and the output frame is
+assembled once from the base columns and the projected source columns,
+taken at those positions (keyed_join). Unlike a chain of left merges, the
+growing frame isn't copied once per source, no _x/_y duplicate columns are
+made (a column name already in the output is an error), and the output
+always has exactly one row per base row. Sources whose rows belong to a
+single player can be checked for rows matched by more than one base row.
+
+lookup - position of the matching source row of every base row
+keyed_join - assemble the base columns and projected source columns
+
+@author: markafunke
+"""
+import numpy as np
+import pandas as pd
+
+
+def _key_index(df, columns):
+    if len(columns) == 1:
+        return pd.Index(df[columns[0]])
+    return pd.MultiIndex.from_arrays([df[column] for column in columns])
+
+
+def lookup(left, right, left_on, right_on=None, duplicates="raise"):
+    """
+    Returns the position in right of the row matching each row of left on
+    the key columns, -1 where there is none. Rows with a missing key
+    never match.
+
+    Parameters
+    ----------
+    left : DataFrame, e.g. draft data
+    right : DataFrame, e.g. nfl data
+    left_on : list of key columns of left
+    right_on : list of key columns of right. The default is left_on.
+    duplicates : what to do when right has a key more than once:
+                 "raise" a ValueError, or keep the "first" or "last" row.
+                 The default is "raise".
+
+    Returns
+    -------
+    positions : numpy array of ints, one per row of left
+
+    """
+    right_on = left_on if right_on is None else right_on
+    valid = right[right_on].notna().all(axis=1).to_numpy()
+    right_positions = np.flatnonzero(valid)
+    right_keys = _key_index(right[valid], right_on)
+
+    repeated = right_keys.duplicated(keep=False if duplicates == "raise" else duplicates)
+    if repeated.any():
+        if duplicates == "raise":
+            raise ValueError(f"{int(repeated.sum())} rows of right share a "
+                             f"{right_on} key with another row")
+        right_positions = right_positions[~repeated]
+        right_keys = right_keys[~repeated]
+
+    if len(right_keys) == 0:
+        return np.full(len(left), -1, dtype=np.int64)
+    found = right_keys.get_indexer(_key_index(left, left_on))
+    positions = np.where(found >= 0, right_positions[found], -1)
+    positions[~left[left_on].notna().all(axis=1).to_numpy()] = -1
+    return positions
+
+
+def keyed_join(base, joins, unique=()):
+    """
+    Returns base with the projected columns of every source, taken at the
+    positions found by lookup (missing where the position is -1)
+
+    Parameters
+    ----------
+    base : DataFrame, e.g. draft data
+    joins : list of (name, source, positions, columns):
+        name : string naming the source in errors
+        source : DataFrame
+        positions : lookup(base, source, ...)
+        columns : dictionary of source column : output column
+    unique : list of names of sources whose rows may each be matched by
+             at most one base row, e.g. a player's own page.
+             The default is ().
+
+    Returns
+    -------
+    joined : DataFrame with the index of base
+
+    """
+    data = {column: base[column] for column in base.columns}
+    for name, source, positions, columns in joins:
+        positions = np.asarray(positions)
+        if len(positions) != len(base):
+            raise ValueError(f"{name}: {len(positions)} positions "
+                             f"for {len(base)} rows")
+        if len(positions) and (positions.min() < -1 or positions.max() >= len(source)):
+            raise ValueError(f"{name}: positions out of range for {len(source)} rows")
+        if name in unique:
+            matched = positions[positions >= 0]
+            shared = np.unique(matched[pd.Index(matched).duplicated()])
+            if len(shared):
+                raise ValueError(f"{name}: {len(shared)} rows are matched by more "
+                                 f"than one base row, e.g. row {shared[0]}")
+        for source_column, column in columns.items():
+            if column in data:
+                raise ValueError(f"{name}: column {column} is already in the joined frame")
+            values = pd.api.extensions.take(source[source_column].values,
+                                            positions, allow_fill=True)
+            data[column] = pd.Series(values, index=base.index, name=column)
+    return pd.DataFrame(data, index=base.index, copy=False)
@@ -0,0 +1,181 @@
+"""
+Contains resolve_players, used by preprocessing.py to match each drafted
+player to his combine results.
+
+Players are matched in three passes, each only over the rows still
+unmatched:
+    1) by nfl_link, then college_link, when both rows have one
+    2) by normalized name and draft year
+    3) by name similarity, only comparing players in the same block:
+       the same draft year and surname, or the same draft year and
+       phonetic (soundex) code of the surname
+Every combine row is matched at most once. Since similarity is only scored
+within blocks, which hold a handful of players each, matching stays close
+to linear in the number of players instead of comparing every pair.
+
+normalize_name - lowercase name without accents, punctuation or suffixes
+soundex - phonetic code of a word
+resolve_players - match the rows of two DataFrames of players
+
+@author: markafunke
+"""
+import difflib
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# name suffixes dropped before matching, e.g. "Ted Ginn Jr." is "ted ginn"
+SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v"}
+
+# lowest similarity (0-1) of two names in a block accepted as a match
+THRESHOLD = 0.85
+
+SOUNDEX_CODES = {**dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"),
+                 **dict.fromkeys("dt", "3"), "l": "4", **dict.fromkeys("mn", "5"),
+                 "r": "6"}
+
+
+@lru_cache(maxsize=None)
+def normalize_name(name):
+    """
+    Returns name lowercased, without accents, punctuation or suffixes,
+    e.g. "Odell Beckham, Jr." and "Odell Beckham Jr." are "odell beckham",
+    "J.J. Nelson" and "JJ Nelson" are "jj nelson".
+    Returns "" for a missing name.
+    """
+    if not isinstance(name, str):
+        return ""
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    name = re.sub(r"[.']", "", name.lower())
+    words = re.sub(r"[^a-z0-9]+", " ", name).split()
+    while len(words) > 1 and words[-1] in SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+@lru_cache(maxsize=None)
+def soundex(word):
+    """
+    Returns the 4 character soundex code of word, e.g. "robert" is "r163"
+    """
+    if not word:
+        return ""
+    code = word[0]
+    last = SOUNDEX_CODES.get(word[0], "")
+    for letter in word[1:]:
+        digit = SOUNDEX_CODES.get(letter, "")
+        if digit and digit != last:
+            code += digit
+        if letter not in "hw":
+            last = digit
+    return (code + "000")[:4]
+
+
+def block_keys(name, year):
+    """
+    Returns the blocking keys of a normalized name drafted in year
+    """
+    surname = name.split()[-1] if name else ""
+    return [("surname", year, surname), ("soundex", year, soundex(surname))]
+
+
+def _year(value):
+    return None if pd.isna(value) else int(value)
+
+
+def resolve_players(left, right, threshold=THRESHOLD, name_column="player",
+                    year_column="year", link_columns=("nfl_link", "college_link")):
+    """
+    Matches every row of left to at most one row of right, preferring
+    links, then exact normalized names, then similar names in the same
+    block, and using every right row at most once
+
+    Parameters
+    ----------
+    left : DataFrame containing name_column, year_column and optionally
+           link_columns, e.g. draft data
+    right : DataFrame with the same columns, e.g. combine data
+    threshold : float, lowest name similarity accepted in the fuzzy pass.
+                The default is THRESHOLD.
+    name_column : string. The default is "player".
+    year_column : string. The default is "year".
+    link_columns : columns holding player page links, in order of
+                   preference. The default is ("nfl_link", "college_link").
+
+    Returns
+    -------
+    matches : DataFrame with the index of left and columns:
+        "right_row" (position of the matched row of right, -1 if none)
+        "method" ("nfl_link", "college_link", "name", "fuzzy" or None)
+        "score" (name similarity, 1 for link and exact name matches)
+
+    """
+    right_row = np.full(len(left), -1, dtype=np.int64)
+    method = np.full(len(left), None, dtype=object)
+    score = np.zeros(len(left), dtype=np.float32)
+    used = np.zeros(len(right), dtype=bool)
+
+    def accept(i, j, how, similarity=1.0):
+        right_row[i] = j
+        method[i] = how
+        score[i] = similarity
+        used[j] = True
+
+    # 1) links, only when both sides have one
+    for link_column in link_columns:
+        if link_column not in left.columns or link_column not in right.columns:
+            continue
+        lookup = {}
+        for j, link in enumerate(right[link_column]):
+            if isinstance(link, str) and not used[j]:
+                lookup.setdefault(link, j)
+        for i, link in enumerate(left[link_column]):
+            if right_row[i] == -1 and isinstance(link, str):
+                j = lookup.get(link)
+                if j is not None and not used[j]:
+                    accept(i, j, link_column)
+
+    left_names = [normalize_name(name) for name in left[name_column]]
+    right_names = [normalize_name(name) for name in right[name_column]]
+    left_years = [_year(year) for year in left[year_column]]
+    right_years = [_year(year) for year in right[year_column]]
+
+    # 2) exact normalized name and year
+    lookup = {}
+    for j, key in enumerate(zip(right_years, right_names)):
+        if key[1] and not used[j]:
+            lookup.setdefault(key, []).append(j)
+    for i, key in enumerate(zip(left_years, left_names)):
+        if right_row[i] != -1 or not key[1]:
+            continue
+        for j in lookup.get(key, []):
+            if not used[j]:
+                accept(i, j, "name")
+                break
+
+    # 3) name similarity within blocks, best scoring pairs first
+    blocks = {}
+    for j, (year, name) in enumerate(zip(right_years, right_names)):
+        if name and not used[j]:
+            for key in block_keys(name, year):
+                blocks.setdefault(key, set()).add(j)
+    candidates = []
+    for i, (year, name) in enumerate(zip(left_years, left_names)):
+        if right_row[i] != -1 or not name:
+            continue
+        compared = set()
+        for key in block_keys(name, year):
+            compared |= blocks.get(key, set())
+        for j in compared:
+            similarity = difflib.SequenceMatcher(None, name, right_names[j]).ratio()
+            if similarity >= threshold:
+                candidates.append((similarity, i, j))
+    for similarity, i, j in sorted(candidates, key=lambda c: -c[0]):
+        if right_row[i] == -1 and not used[j]:
+            accept(i, j, "fuzzy", similarity)
+
+    return pd.DataFrame({"right_row": right_row, "method": method,
+                         "score": score}, index=left.index)
@@ -0,0 +1,216 @@
+"""
+Contains Pipeline, used by preprocessing.py to run its steps as named
+stages with cached outputs.
+
+Each stage is a function whose arguments are the outputs of the stages it
+depends on. A stage's output is cached on disk under a key hashing:
+    -the stage name and parameters
+    -the source code of the stage function (and of any helpers it lists)
+    -the content of every input
+so a run only recomputes stages whose code changed or whose upstream
+output changed. Outputs are passed between stages in memory, and checked
+against the stage's schema (see schema_util.py) whenever the stage runs.
+
+@author: markafunke
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+
+import pandas as pd
+
+import schema_util
+
+
+def content_hash(value):
+    """
+    Returns a hash of the content of a DataFrame, or of a dictionary or list
+    of DataFrames, independent of where it came from
+    """
+    digest = hashlib.sha256()
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr(list(value.columns)).encode("utf-8"))
+        digest.update(repr([str(dtype) for dtype in value.dtypes]).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, pd.Series):
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            digest.update(repr(key).encode("utf-8"))
+            digest.update(content_hash(value[key]).encode("utf-8"))
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            digest.update(content_hash(item).encode("utf-8"))
+    else:
+        digest.update(pickle.dumps(value))
+    return digest.hexdigest()
+
+
+def code_hash(objects):
+    """
+    Returns a hash of the source code of functions or modules
+    """
+    digest = hashlib.sha256()
+    for obj in objects:
+        try:
+            digest.update(inspect.getsource(obj).encode("utf-8"))
+        except (OSError, TypeError):
+            digest.update(repr(obj).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class Stage:
+    """
+    A named step of a Pipeline
+
+    Parameters
+    ----------
+    name : string
+    func : function computing the stage's output from its inputs
+    inputs : list of names of the stages whose outputs func takes,
+             in argument order
+    params : dictionary of keyword arguments passed to func
+    code : list of extra functions or modules func depends on, whose source
+           is part of the cache key
+    always_run : bool, recompute on every run (e.g. a stage reading the
+                 web, whose content can change without its code changing)
+    schema : dictionary of column : dtype the output must match, or for a
+             stage returning a dictionary of DataFrames, a dictionary of
+             schemas. The default is None (not checked).
+    """
+
+    def __init__(self, name, func, inputs=(), params=None, code=(),
+                 always_run=False, schema=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.params = params or {}
+        self.code = list(code)
+        self.always_run = always_run
+        self.schema = schema
+
+    def key(self, input_hashes):
+        digest = hashlib.sha256()
+        digest.update(self.name.encode("utf-8"))
+        digest.update(json.dumps(self.params, sort_keys=True, default=repr).encode("utf-8"))
+        digest.update(json.dumps(self.schema, sort_keys=True).encode("utf-8"))
+        digest.update(code_hash([self.func] + self.code).encode("utf-8"))
+        for input_hash in input_hashes:
+            digest.update(input_hash.encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+
+class Pipeline:
+    """
+    Runs Stages in dependency order, caching each stage's output in
+    cache_dir as <stage name>-<key>.pkl next to the hash of its content
+
+    Parameters
+    ----------
+    cache_dir : string, directory of the cached outputs
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.stages = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def stage(self, inputs=(), name=None, **kwargs):
+        """
+        Decorator adding a function as a stage, named after the function
+        unless name is given. kwargs are passed on to Stage.
+        """
+        def add(func):
+            stage_name = name or func.__name__
+            self.stages[stage_name] = Stage(stage_name, func, inputs, **kwargs)
+            return func
+        return add
+
+    def order(self, targets):
+        """
+        Returns the names of the stages needed for targets, dependencies first
+        """
+        ordered = []
+        visiting = set()
+
+        def visit(name):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"stage {name} depends on itself")
+            visiting.add(name)
+            for input_name in self.stages[name].inputs:
+                visit(input_name)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for target in targets:
+            visit(target)
+        return ordered
+
+    def _paths(self, stage, key):
+        base = os.path.join(self.cache_dir, f"{stage.name}-{key}")
+        return base + ".pkl", base + ".hash"
+
+    def run(self, *targets, verbose=True):
+        """
+        Runs every stage needed for targets, reusing cached outputs where
+        the key matches, and returns a dictionary of stage name : output
+
+        Parameters
+        ----------
+        *targets : names of the stages wanted. The default is every stage.
+        verbose : bool, print whether each stage ran or was cached.
+
+        Returns
+        -------
+        outputs : dictionary of stage name : output
+
+        """
+        outputs = {}
+        hashes = {}
+        for name in self.order(targets or list(self.stages)):
+            stage = self.stages[name]
+            key = stage.key([hashes[input_name] for input_name in stage.inputs])
+            output_path, hash_path = self._paths(stage, key)
+
+            if not stage.always_run and os.path.exists(hash_path):
+                with open(hash_path, encoding="utf-8") as f:
+                    hashes[name] = f.read().strip()
+                #only load a cached output when a later stage needs it,
+                #or it's a target itself
+                outputs[name] = _Lazy(output_path)
+                status = "cached"
+            else:
+                for input_name in stage.inputs:
+                    outputs[input_name] = _load(outputs[input_name])
+                args = [outputs[input_name] for input_name in stage.inputs]
+                outputs[name] = stage.func(*args, **stage.params)
+                if stage.schema is not None:
+                    schema_util.check_output(outputs[name], stage.schema, name)
+                hashes[name] = content_hash(outputs[name])
+                with open(output_path, "wb") as f:
+                    pickle.dump(outputs[name], f, protocol=pickle.HIGHEST_PROTOCOL)
+                with open(hash_path, "w", encoding="utf-8") as f:
+                    f.write(hashes[name])
+                status = "ran"
+            if verbose:
+                print(f"{name:<20} {status} ({key})")
+
+        return {name: _load(output) for name, output in outputs.items()
+                if not targets or name in targets}
+
+
+class _Lazy:
+    #cached output not read from disk until it's needed
+    def __init__(self, path):
+        self.path = path
+
+
+def _load(output):
+    if isinstance(output, _Lazy):
+        with open(output.path, "rb") as f:
+            return pickle.load(f)
+    return output
@@ -12,16 +12,19 @@ Used for Exploratory Data Analysis and for visuals in presentation
 import plots_util as plot
 import seaborn as sns
 import matplotlib.pyplot as plt
-import pandas as pd
+import storage_util
 
-# Read in pickle from final cleaned dataset in preprocessing.py
-# Limit to only columns considered for features
+# Read in final cleaned dataset in preprocessing.py
+# Load only the columns considered for features from the stored table
 # For the purpose of this analysis, only considering players with positive
 # receiving yards in their rookie year.
-nfl_df_clean = pd.read_pickle("pickles/cleaned.pkl")
-nfl_df = nfl_df_clean.loc[:,["rookie_rec_yards", "pick", "col_rec_yds",
+nfl_df = storage_util.read_table("cleaned", columns=["rookie_rec_yards", "pick", "col_rec_yds",
                            "left_early", "power_5", "total_yards","conf"
-                           ,"player_clean","rnd","SEC_Rd1", "time_40"]]
+                           ,"player_clean","rnd","SEC_Rd1", "time_40"])
+# Columns are stored with compact dtypes (see schema_util.py),
+# convert numbers to plain floats for the modeling and plotting libraries
+numeric = nfl_df.select_dtypes("number").columns
+nfl_df[numeric] = nfl_df[numeric].astype("float64")
 
 mask = nfl_df["rookie_rec_yards"] > 0
 nfl_df = nfl_df[mask]
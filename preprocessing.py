@@ -7,162 +7,264 @@ Scrapes and cleans data from profootball reference.
     -NFL Wide Receivers Rookie Year Stats
     -NCAA Wide Receivers Final Year Stats
     -NFL Team Level Receiving Data
-    
-Outputs pickles used for fitting a linear regression model, as well as plots in:
+
+Outputs Parquet tables (see storage_util.py) used for fitting a linear regression model, as well as plots in:
     -plots.py
     -train_regression.py
 
+The steps below run as named stages of a pipeline:
+    scrape -> merge -> clean
+Each stage's output is cached in cache/stages under a hash of its code and
+inputs, so a re-run only recomputes stages whose code or upstream data changed.
+
+The merged and cleaned rows are upserted into a player store keyed by
+player (see store_util.py), so a new draft class can be added, or refreshed
+through its rookie season, without re-scraping and re-merging the others:
+    python preprocessing.py 2021 2021
+
 @author: markfunke
 """
 
+import argparse
+import sys
+
 import scrape_nfl
-import pandas as pd
-import re
-import numpy as np
+import scrape_util
+import archive_util
+import pipeline_util
+import clean_util
+import franchise_util
+import join_util
+import match_util
+import schema_util
+import sql_util
+import storage_util
+import store_util
+
+
+pipeline = pipeline_util.Pipeline("cache/stages")
+
+# Draft years to scrape and merge, by default the full history
+FIRST_YEAR, LAST_YEAR = 2000, 2020
 
 
 # Scrape draft, combine, team stats, nfl stats, and college stats
 # for all drafted wide receivers from the years 2000 - 2020
-# Need team stats from 1999-2019 as I will be testing the previous year's
-# team's total receiving stats as a feature
-draft_df_00_20 = scrape_nfl.scrape_draft_data(2000,2020)
-combine_df_00_20 = scrape_nfl.scrape_combine_data(2000,2020)
-team_df_99_19 = scrape_nfl.scrape_team_data(1999,2019)
-college_df_00_20 = scrape_nfl.scrape_college_data(draft_df_00_20)
-nfl_df_00_20 = scrape_nfl.scrape_nfl_data(draft_df_00_20)
-
-# Pickle scraped files as a checkpoint to avoid re-running scrapers
-draft_df_00_20.to_pickle("pickles/draft.pkl")
-combine_df_00_20.to_pickle("pickles/combine.pkl")
-team_df_99_19.to_pickle("pickles/team.pkl")
-college_df_00_20.to_pickle("pickles/college.pkl")
-nfl_df_00_20.to_pickle("pickles/nfl.pkl")
-
-# Read in pickled files to continue analysis
-draft_df_00_20 = pd.read_pickle('pickles/draft.pkl')
-combine_df_00_20 = pd.read_pickle('pickles/combine.pkl')
-team_df_99_19 = pd.read_pickle('pickles/team.pkl')
-college_df_00_20 = pd.read_pickle('pickles/college.pkl')
-nfl_df_00_20 = pd.read_pickle('pickles/nfl.pkl')
+# Need team stats from 1997-2019 as I will be testing the previous 3 years'
+# team's total receiving stats as features
+# Every fetched page is cached in cache/http, so re-running only requests
+# pages from the current season (past seasons never change)
+# Every crawled url is recorded in cache/manifest.jsonl as soon as it is parsed,
+# so if a crawl dies, re-running only fetches the urls still outstanding
+# To re-crawl the player pages of a single draft year, reset their urls and
+# drop them from the http cache before they are scraped, e.g.:
+#   urls = scrape_nfl.player_urls(frontier.frame("nfl_link"), "nfl_link", year=2015)
+#   manifest.reset(urls)
+#   for url in urls: cache.remove(url)
+# (the draft and combine listings are single queries over every year, so
+# they can only be re-crawled whole)
+# Every page fetched from the network is also appended to cache/pages.zst
+# To pull new columns out of pages already fetched, update the parse functions
+# in scrape_nfl.py and re-parse the archive on every core instead of crawling:
+#   python archive_util.py cache/pages.zst cache/manifest.jsonl
+# The scrape stage always runs, as the site can change, but with the cache
+# and manifest above a re-run needs next to no requests
+@pipeline.stage(always_run=True, params={"min_year": FIRST_YEAR, "max_year": LAST_YEAR},
+                schema=schema_util.SCRAPED)
+def scrape(min_year, max_year):
+    cache = scrape_util.ResponseCache("cache/http")
+    manifest = scrape_util.CrawlManifest("cache/manifest.jsonl")
+    scrape_util.ARCHIVE = archive_util.PageArchive("cache/pages.zst")
+    try:
+        draft_df = scrape_nfl.scrape_draft_data(min_year,max_year,cache=cache,manifest=manifest)
+        combine_df = scrape_nfl.scrape_combine_data(min_year,max_year,cache=cache,manifest=manifest)
+        team_df = scrape_nfl.scrape_team_data(min_year-3,max_year-1,cache=cache,manifest=manifest)
+
+        # Player pages are collected from both the draft and combine listings into
+        # one frontier, so undrafted combine attendees are scraped too, and a player
+        # found in both listings is only fetched and parsed once
+        frontier = scrape_util.CrawlFrontier(manifest)
+        frontier.add(draft_df, "draft")
+        frontier.add(combine_df, "combine")
+        college_df = scrape_nfl.scrape_college_data(frontier.frame("college_link"),cache=cache,manifest=manifest)
+        nfl_df = scrape_nfl.scrape_nfl_data(frontier.frame("nfl_link"),cache=cache,manifest=manifest)
+
+        # Export request latency, size, parse time and failure metrics of the crawl
+        scrape_util.telemetry.to_json("cache/telemetry.json")
+        scrape_util.telemetry.to_prometheus("cache/telemetry.prom")
+    finally:
+        scrape_util.close_session()
+
+    return {"draft": draft_df, "combine": combine_df, "team": team_df,
+            "college": college_df, "nfl": nfl_df}
+
 
 # Merge 5 scraped files into one dataframe
 # The following process is laid out as follows:
 #   1) Treat draft_df_00_20 as the "base" dataframe where all others are merged
-#   2) Make any adjustments to other 4 dataframes as needed to prepare for merge
-#   3) Merge college, nfl, team, and combine data onto the "base" dataframe
-
-# Merge NFL Data, nfl_link is unique to both datasets
-columns_to_merge = ["rookie_rec_yards","nfl_link"]
-nfl_to_merge = nfl_df_00_20[columns_to_merge]
-draft_df_00_20 = draft_df_00_20.merge(nfl_to_merge
-                                     , how = "left"
-                                     , left_on = "nfl_link"
-                                     , right_on = "nfl_link")
-
-# Merge College Data, college_link is unique to both datasets
-columns_to_merge = ["conf","col_class","col_rec","col_rec_yds","col_rec_td","col_scrim_yds","col_scrim_td","college_link"]
-college_to_merge = college_df_00_20[columns_to_merge]
-draft_df_00_20 = draft_df_00_20.merge(college_to_merge
-                                     , how = "left"
-                                     , left_on = "college_link"
-                                     , right_on = "college_link")
-
-# Merge Combine Data
-#Clean "player" column in draft data before merging on "player"
-draft_df_00_20['player_clean'] = draft_df_00_20.apply(scrape_nfl.clean_player_name, axis=1)
-
-columns_to_merge = ["nfl_link","college_link","year","player"
-                    ,"height","weight","time_40","vertical","bench_reps"
-                    ,"broad_jump","cone_3","shuttle","draft_pick"]
-combine_to_merge = combine_df_00_20[columns_to_merge]
-draft_df_00_20 = draft_df_00_20.merge(combine_to_merge
-                                     , how = "left"
-                                     , left_on = ["player_clean","year"]
-                                     , right_on = ["player","year"])
-
-
-# Merge Team Data
-# Since Team data is for prior year's receiving,
-# We need to merge on the following year
-team_df_99_19["year_merge"] = (team_df_99_19["year"] + 1).astype(str)
-
-# This function adjusts the "team" series to a 3 letter abbreviation
-# in order to merge with the draft data that uses 3 letters abbreviations
-team_df_99_19['team_abbrev'] = team_df_99_19.apply(scrape_nfl.add_team_abbrev, axis=1)
-
-columns_to_merge = ["total_yards","year_merge","team_abbrev"]
-team_to_merge = team_df_99_19[columns_to_merge]
-draft_df_00_20 = draft_df_00_20.merge(team_to_merge
-                                     , how = "left"
-                                     , left_on = ["team","year"]
-                                     , right_on = ["team_abbrev","year_merge"])
-
-# Pickle pre-cleaned DataFrame
-draft_df_00_20.to_pickle("pickles/draft_pre_clean.pkl")
-draft_df_00_20 = pd.read_pickle("pickles/draft_pre_clean.pkl")
+#   2) Index each of the other 4 dataframes once on the key it is merged on,
+#      and find the matching row of each for every drafted player
+#   3) Assemble the base columns and the needed columns of college, nfl,
+#      team, and combine data in a single pass (see join_util.py), with
+#      exactly one row per drafted player, and no nfl, college or combine
+#      row given to more than one drafted player
+@pipeline.stage(inputs=["scrape"], code=[store_util.player_keys, clean_util,
+                                         match_util, franchise_util, join_util,
+                                         schema_util],
+                schema=schema_util.MERGED)
+def merge(scraped):
+    draft_df_00_20 = scraped["draft"].copy()
+
+    # Key every drafted player for the player store
+    draft_df_00_20["player_key"] = store_util.player_keys(draft_df_00_20)
+
+    # Clean "player" column in draft data, kept as the player's display name
+    draft_df_00_20["player_clean"] = clean_util.clean_player_names(draft_df_00_20["player"])
+
+    # NFL Data, nfl_link is unique to the draft data
+    # Player pages list the first 3 seasons in order, the first is the rookie season
+    nfl_rows = join_util.lookup(draft_df_00_20, scraped["nfl"], ["nfl_link"],
+                                duplicates="first")
+
+    # College Data, college_link is unique to both datasets
+    college_rows = join_util.lookup(draft_df_00_20, scraped["college"], ["college_link"],
+                                    duplicates="last")
+
+    # Combine Data
+    # Players are matched by link where both listings have one, then by
+    # normalized name and year, then by similar names drafted the same year
+    # (see match_util.py), so suffix and punctuation differences between the
+    # draft and combine listings don't drop combine data
+    matches = match_util.resolve_players(draft_df_00_20, scraped["combine"])
+    draft_df_00_20["combine_match"] = matches["method"]
+
+    # Team Data
+    # Team data is for prior years' receiving, so each franchise's passing yards
+    # over the 3 seasons before every draft year are lined up in one pass, and
+    # joined to the draft data by franchise, found from the draft's abbreviation
+    # (see franchise_util.py for relocations and renames)
+    team_lags = franchise_util.season_lags(scraped["team"], "total_yards", lags=(1, 2, 3))
+    team_lags = schema_util.coerce(team_lags, schema_util.TEAM_LAGS)
+    draft_df_00_20["franchise"] = franchise_util.abbrev_franchises(draft_df_00_20["team"])
+    team_rows = join_util.lookup(draft_df_00_20, team_lags, ["franchise","year"])
+
+    combine_columns = ["height","weight","time_40","vertical","bench_reps"
+                       ,"broad_jump","cone_3","shuttle","draft_pick"]
+    college_columns = ["conf","col_class","col_rec","col_rec_yds","col_rec_td"
+                       ,"col_scrim_yds","col_scrim_td"]
+    draft_df_00_20 = join_util.keyed_join(draft_df_00_20, [
+        ("nfl", scraped["nfl"], nfl_rows, {"rookie_rec_yards": "rookie_rec_yards"}),
+        ("college", scraped["college"], college_rows, dict(zip(college_columns, college_columns))),
+        ("combine", scraped["combine"], matches["right_row"].values,
+         dict(zip(combine_columns, combine_columns))),
+        # The prior season's yards keep the name of the original feature
+        ("team", team_lags, team_rows, {"total_yards_lag1": "total_yards",
+                                        "total_yards_lag2": "total_yards_lag2",
+                                        "total_yards_lag3": "total_yards_lag3"}),
+    ], unique=["nfl", "college", "combine"])
+    return draft_df_00_20
+
 
 # Clean Dataset for Analysis
-# Limit to only columns that are candidates to be features
-colums_to_keep = (["player_clean","rookie_rec_yards","rnd","pick","conf","col_class"
-                  ,"col_scrim_yds", "col_rec_yds", "height", "weight", "time_40", "total_yards", "vertical"])
-
-df_cleaned = draft_df_00_20[colums_to_keep]
-
-# Limit to only rows where y (rookie_rec_yards) isn't NaN since we can't
-# perform any regression analysis without a y variable
-# A missing rookie_rec_yards variable may mean that the player did not make the
-# NFL, but for the purpose of this analysis, we will limit to only those players
-# that caught at least 1 pass in the NFL
-df_cleaned = df_cleaned[df_cleaned['rookie_rec_yards'].notna()]
-
-
-# Convert all whitespace to NaN
-df_cleaned = df_cleaned.applymap(lambda x: np.nan if isinstance(x, str) and (not x or x.isspace()) else x)
-
-# Convert object datatypes that should be numerical to floats
-numerical = (["rookie_rec_yards","rnd","pick","col_scrim_yds","col_rec_yds"
-             ,"weight", "time_40", "total_yards", "vertical"])
-
-for column in numerical:
-    df_cleaned[column] = pd.to_numeric(df_cleaned[column], errors='coerce') 
-   
-# Convert height to inches
-def get_inches(el):
-    r = re.compile(r"""(\d+)- *(\d+)""")
-    m = r.match(el)
-    if m == None:
-        return float('NaN')
-    else:
-        return int(m.group(1))*12 + float(m.group(2))
-    
-df_cleaned["height"] = df_cleaned["height"].map(get_inches, na_action='ignore')
-
-# Convert missing and conferences out of the "Power 5" to "Other"
-# Add dummy column separating power 5 and non-power 5 players
-# The power 5 conferences tend to have the most talented players,
-# so the theory is that a player from there may do better in the NFL
-power_5_conf = ["SEC", "Big Ten", "ACC", "Big 12", "Pac-12"]
-df_cleaned["conf"] = df_cleaned["conf"].map(lambda x: "Pac-12" if x == "Pac-10" else x)
-df_cleaned["conf"] = df_cleaned["conf"].map(lambda x: x if x in power_5_conf else "Other")
-df_cleaned["power_5"] = df_cleaned["conf"].map(lambda x: 1 if x in power_5_conf else 0)
-df_cleaned["isSEC"] = df_cleaned["conf"].map(lambda x: 1 if x == "SEC" else 0)
-df_cleaned["isRd1"] = df_cleaned["rnd"].map(lambda x: 1 if x == 1 else 0)
-df_cleaned["SEC_Rd1"] = df_cleaned["isSEC"] * df_cleaned["isRd1"]
-
-# Convert college_class to left_early 1/0 fummy column
-# The theory is that someone leaving college early is likely doing so because
-# they are good enough to have success in the NFL
-underclassmen = ["JR", "SO", "FR"]
-df_cleaned["left_early"] = df_cleaned["col_class"].map(lambda x: 1 if x in underclassmen else 0)
-df_cleaned.drop("col_class", axis = 1, inplace = True)
-
-# Pickle cleaned file after dropping NaN
-df_cleaned_dropna = df_cleaned.dropna(axis=0)
-df_cleaned_dropna.to_pickle("pickles/cleaned_nona.pkl")
-
-# Create alternative  "raw" version that we can use to test imputing means
-# or medians during regression analysis
-df_cleaned.to_pickle("pickles/cleaned.pkl")
+@pipeline.stage(inputs=["merge"], code=[clean_util, schema_util],
+                schema=schema_util.CLEANED)
+def clean(draft_df_00_20):
+    # Limit to only columns that are candidates to be features
+    # "player_key" and "year" (draft year) are kept to store the rows by
+    colums_to_keep = (["player_key","player_clean","year","rookie_rec_yards","rnd","pick","conf","col_class"
+                      ,"col_scrim_yds", "col_rec_yds", "height", "weight", "time_40", "total_yards", "vertical"
+                      ,"total_yards_lag2", "total_yards_lag3"])
+
+    df_cleaned = draft_df_00_20[colums_to_keep]
+
+    # Limit to only rows where y (rookie_rec_yards) isn't NaN since we can't
+    # perform any regression analysis without a y variable
+    # A missing rookie_rec_yards variable may mean that the player did not make the
+    # NFL, but for the purpose of this analysis, we will limit to only those players
+    # that caught at least 1 pass in the NFL
+    df_cleaned = df_cleaned[df_cleaned['rookie_rec_yards'].notna()]
+
+
+    # Convert all whitespace to NaN
+    df_cleaned = clean_util.blank_to_nan(df_cleaned)
+
+    # Convert height to inches
+    df_cleaned["height"] = clean_util.height_inches(df_cleaned["height"])
+
+    # Convert missing and conferences out of the "Power 5" to "Other"
+    # Add dummy column separating power 5 and non-power 5 players
+    # The power 5 conferences tend to have the most talented players,
+    # so the theory is that a player from there may do better in the NFL
+    # Convert college_class to left_early 1/0 dummy column
+    # The theory is that someone leaving college early is likely doing so because
+    # they are good enough to have success in the NFL
+    df_cleaned = clean_util.add_flags(df_cleaned)
+
+    # Numerical columns were converted when scraped (see schema_util.py),
+    # convert the new columns to their compact dtypes too
+    return schema_util.coerce(df_cleaned, schema_util.CLEANED)
+
+
+def parse_years(argv):
+    """
+    Returns (min_year, max_year) of the draft years given on the command
+    line, e.g. preprocessing.py 2021 2021, by default the full history.
+    Exits with a usage message unless both years or neither are given.
+    """
+    parser = argparse.ArgumentParser(
+        prog=argv[0], description="Scrapes, merges and cleans the draft classes "
+                                  "min_year to max_year into the player store.")
+    parser.add_argument("min_year", type=int, nargs="?",
+                        help=f"first draft year, the default is {FIRST_YEAR}")
+    parser.add_argument("max_year", type=int, nargs="?",
+                        help=f"last draft year, the default is {LAST_YEAR}")
+    args = parser.parse_args(argv[1:])
+    if args.min_year is None:
+        return FIRST_YEAR, LAST_YEAR
+    if args.max_year is None:
+        parser.error("give both min_year and max_year, or neither")
+    if args.min_year > args.max_year:
+        parser.error("min_year is after max_year")
+    return args.min_year, args.max_year
+
+
+def main(argv):
+    # Draft years from the command line, e.g. 2021 2021, by default the full history
+    min_year, max_year = parse_years(argv)
+    pipeline.stages["scrape"].params = {"min_year": min_year, "max_year": max_year}
+
+    outputs = pipeline.run("scrape", "merge", "clean")
+    df_cleaned = outputs["clean"]
+
+    # Upsert the merged rows and cleaned features of the players scraped into
+    # the player store in data/, partitioned by draft year, so readers can load
+    # only the columns and years they need, e.g.:
+    #   storage_util.read_table("cleaned", columns=["pick","rookie_rec_yards"])
+    # Only the draft years scraped are rewritten
+    store = store_util.PlayerStore()
+    keys = outputs["merge"]["player_key"]
+    store.upsert("players", outputs["merge"], schema_util.MERGED)
+
+    # Create "raw" version that we can use to test imputing means
+    # or medians during regression analysis
+    store.upsert("cleaned", df_cleaned, schema_util.CLEANED, keys=keys)
+
+    # Store cleaned file after dropping NaN
+    df_cleaned_dropna = df_cleaned.dropna(axis=0)
+    store.upsert("cleaned_nona", df_cleaned_dropna, schema_util.CLEANED, keys=keys)
 
+    # The scraped tables are only stored as a whole, when the full history
+    # is scraped (player pages span several seasons, so they can't be
+    # replaced one draft year at a time)
+    # They also go into an indexed SQLite database, with a cleaned_features
+    # view, for ad-hoc joins and aggregates (see sql_util.py), e.g.:
+    #   python sql_util.py data/players.db "SELECT conf, median(rookie_rec_yards)
+    #       FROM cleaned_features WHERE rnd = 1 GROUP BY conf"
+    if (min_year, max_year) == (FIRST_YEAR, LAST_YEAR):
+        for name, df in outputs["scrape"].items():
+            storage_util.write_table(df, name)
+        sql_util.write_database("data/players.db", outputs["scrape"])
 
 
+if __name__ == '__main__':
+    main(sys.argv)
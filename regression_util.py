@@ -1,19 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Contains 2 functions used to score linear regression models.
+Contains functions used to score linear regression models.
 sm_summary - Stats Model linear fit summary
-cross_val_score - Sklearn cross validation R2 score for both linear and Ridge.
+cv_path - Repeated K-fold R2, RMSE and coefficients of Linear Regression
+          and a whole path of Ridge lambdas, from one factorization per fold
+summarize_path - Mean validation scores of each lambda of cv_path
+cross_val_score - Cross validation R2 score for both linear and Ridge.
 
 @author: markfunke
 """
 import numpy as np
-from math import sqrt
+import pandas as pd
 
-from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.model_selection import KFold
-from sklearn.metrics import mean_squared_error
 
 import statsmodels.api as sm
 
@@ -42,11 +42,126 @@ def sm_summary(X, y):
     return fit.summary()
     
     
+def fold_masks(n, seeds, n_splits = 5):
+    """
+    Returns the training rows of every fold of repeated K-fold cross
+    validation, one shuffled K-fold split per seed
+
+    Parameters
+    ----------
+    n : Integer number of rows
+    seeds : List of random states, one repeat of K-fold each
+    n_splits : Integer number of folds. The default is 5.
+
+    Returns
+    -------
+    train : Boolean array (repeats * folds, n), True for training rows
+    keys : Array (repeats * folds, 2) of the seed and fold of each row of train
+
+    """
+    train, keys = [], []
+    for seed in seeds:
+        kf = KFold(n_splits=n_splits, shuffle=True, random_state = seed)
+        for fold, (train_ind, val_ind) in enumerate(kf.split(np.zeros(n))):
+            mask = np.zeros(n, dtype=bool)
+            mask[train_ind] = True
+            train.append(mask)
+            keys.append((seed, fold))
+    return np.array(train), np.array(keys, dtype=object)
+
+
+def cv_path(X, y, alphas = (0,), seeds = (None,), n_splits = 5):
+    """
+    For a set of features X, and target y (cube root of yards), score
+    Linear Regression (alpha 0) and Ridge on standardized features for
+    every alpha, over repeated K-fold cross validation.
+    
+    Every fold's standardized training Gram matrix (the squared SVD of the
+    standardized training matrix) is eigendecomposed once, with the folds
+    of all seeds batched into one call, and the coefficients of every alpha
+    are read off that factorization, so a whole Ridge path costs about as
+    much as a single fit.
+
+    Parameters
+    ----------
+    X : DataFrame of features
+    y : Series of target variable
+    alphas : List of Ridge lambdas, 0 is Linear Regression.
+             The default is (0,).
+    seeds : List of random states, one repeat of K-fold each.
+            The default is (None,).
+    n_splits : Integer number of folds. The default is 5.
+
+    Returns
+    -------
+    DataFrame with one row per (seed, fold, alpha) of validation R2,
+    RMSE on the yards scale (predictions cubed) and the coefficients of
+    the standardized features, "coef_<feature>"
+
+    """
+    columns = list(X.columns) if hasattr(X, "columns") else list(range(np.shape(X)[1]))
+    X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=float)
+    alphas = np.asarray(alphas, dtype=float)
+    train, keys = fold_masks(len(y), seeds, n_splits)
+    weights = train.astype(float)
+
+    # training mean and (population) standard deviation of each fold,
+    # as StandardScaler computes them
+    n_train = weights.sum(axis=1)
+    mean = weights @ X / n_train[:, None]
+    y_mean = weights @ y / n_train
+    gram = np.einsum("fn,ni,nj->fij", weights, X, X) - n_train[:, None, None] * np.einsum("fi,fj->fij", mean, mean)
+    scale = np.sqrt(np.clip(np.einsum("fii->fi", gram) / n_train[:, None], 0, None))
+    scale[scale == 0] = 1
+    gram /= np.einsum("fi,fj->fij", scale, scale)
+    xty = (weights @ (X * y[:, None]) - n_train[:, None] * mean * y_mean[:, None]) / scale
+
+    # Z'Z = V diag(w) V', coefficients are V diag(1 / (w + alpha)) V' Z'y,
+    # with directions of no variance left at 0 (minimum norm least squares)
+    w, V = np.linalg.eigh(gram)
+    tol = w.max(axis=1, keepdims=True) * len(columns) * np.finfo(float).eps
+    shrink = w[:, None, :] + alphas[None, :, None]
+    inverse = np.where(shrink > tol[:, None, :], 1 / np.where(shrink > 0, shrink, 1), 0)
+    coefs = np.einsum("fij,faj,fj->fai", V, inverse, np.einsum("fji,fj->fi", V, xty))
+
+    # predictions of every row by every (fold, alpha), scored on the
+    # validation rows of each fold
+    Z = (X[None, :, :] - mean[:, None, :]) / scale[:, None, :]
+    pred = np.einsum("fnp,fap->fan", Z, coefs) + y_mean[:, None, None]
+    val = ~train
+    n_val = val.sum(axis=1)
+    y_val_mean = val @ y / n_val
+    sst = (val * (y[None, :] - y_val_mean[:, None]) ** 2).sum(axis=1)
+    sse = (val[:, None, :] * (y[None, None, :] - pred) ** 2).sum(axis=2)
+    cubed_sse = (val[:, None, :] * (y[None, None, :] ** 3 - pred ** 3) ** 2).sum(axis=2)
+
+    results = pd.DataFrame({
+        "seed": np.repeat(keys[:, 0], len(alphas)),
+        "fold": np.repeat(keys[:, 1], len(alphas)).astype(int),
+        "alpha": np.tile(alphas, len(keys)),
+        "r2": (1 - sse / sst[:, None]).ravel(),
+        "rmse": np.sqrt(cubed_sse / n_val[:, None]).ravel(),
+    })
+    coef_frame = pd.DataFrame(coefs.reshape(-1, len(columns)),
+                              columns=[f"coef_{column}" for column in columns])
+    return pd.concat([results, coef_frame], axis=1)
+
+
+def summarize_path(results):
+    """
+    Returns the mean and standard deviation of validation R2 and RMSE of
+    cv_path results for every alpha, best R2 first
+    """
+    summary = results.groupby("alpha")[["r2", "rmse"]].agg(["mean", "std"])
+    return summary.sort_values(("r2", "mean"), ascending=False)
+
+
 def cross_val_scores(X, y, rand = None, lamb = 1):
     """
     For a set of features X, and target y, fit both Linear Regression
     and Ridge model. Validate with cross validation and print validation
     R2, RMSE,and print Ridge coefficients.
+    Scores come from cv_path, which fits both models on each fold at once.
 
     Parameters
     ----------
@@ -60,51 +175,21 @@ def cross_val_scores(X, y, rand = None, lamb = 1):
     Ridge Model coefficients.
 
     """
-    
-    # Prepare data for cross validation
-    X, y = np.array(X), np.array(y)
-    kf = KFold(n_splits=5, shuffle=True, random_state = rand)
-    
-    # Initiate lists to store results
-    cv_lm_r2s = []
-    cv_lm_RMSEs = []
-    cv_lm_reg_r2s = []
-    
-    for train_ind, val_ind in kf.split(X,y):
-        X_train, y_train = X[train_ind], y[train_ind]
-        X_val, y_val = X[val_ind], y[val_ind]
-        
-        # Create Linear and Ridge Objects
-        lm = LinearRegression()
-        lm_reg = Ridge(alpha=lamb)
-        
-        # linear model
-        lm.fit(X_train, y_train)
-        cv_lm_r2s.append(lm.score(X_val, y_val))
-        
-        # Inverse transformation and calc RMSE
-        cubed_y_val = y_val ** 3
-        cubed_pred = lm.predict(X_val) ** 3
-        RMSE_actual = sqrt(mean_squared_error(cubed_y_val, cubed_pred)) 
-        cv_lm_RMSEs.append(RMSE_actual)
-        
-        # regularization feature scaling
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_val_scaled = scaler.transform(X_val)
-        
-        # ridge regression
-        lm_reg.fit(X_train_scaled, y_train)
-        cv_lm_reg_r2s.append(lm_reg.score(X_val_scaled, y_val))
-        
-    linear_model_r2 = round(np.mean(cv_lm_r2s),3)
-    linear_model_RMSE = round(np.mean(cv_lm_RMSEs),1)
-    ridge_model_r2 = round(np.mean(cv_lm_reg_r2s),3)
+    results = cv_path(X, y, alphas=[0, lamb], seeds=[rand])
+    linear = results[results["alpha"] == 0]
+    ridge = results[results["alpha"] == lamb]
+
+    linear_model_r2 = round(np.mean(linear["r2"]),3)
+    linear_model_RMSE = round(np.mean(linear["rmse"]),1)
+    ridge_model_r2 = round(np.mean(ridge["r2"]),3)
         
     print(f"Linear Val R2: {linear_model_r2}")
     print(f"Linear Val RMSE: {linear_model_RMSE}")
     print(f"Ridge Val R2: {ridge_model_r2}")
-    return lm_reg.coef_
+
+    # coefficients of the Ridge model of the last fold
+    coef_columns = [column for column in results.columns if column.startswith("coef_")]
+    return ridge[coef_columns].values[-1]
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Records the pages scrape_nfl.py requests for a range of draft years, and
+serves them back from a local http server, so the scrapers can be tested
+and benchmarked offline and reproducibly.
+
+record - run every scraper for a year range, saving each response
+ReplayServer - local http server replaying recorded responses, with
+               configurable latency, jitter and injected 429/5xx errors
+
+Recordings are scrape_util.ResponseCache directories, so a cache built by
+preprocessing.py can be replayed as well.
+
+Usage:
+    python replay_server.py record 2018 2019 --dir replay
+    python replay_server.py serve --dir replay --latency 0.1 --jitter 0.05 --error-rate 0.02
+
+@author: markafunke
+"""
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import scrape_nfl
+import scrape_util
+
+
+def record(min_year, max_year, directory):
+    """
+    Runs every scraper for the draft years min_year to max_year, saving
+    every response in a ResponseCache at directory.
+    Team pages are recorded for the three seasons before each draft, the
+    lags the merge stage of preprocessing.py uses.
+
+    Parameters
+    ----------
+    min_year : int from 2000-2020
+    max_year : int from 2000-2020
+    directory : string, directory of the recording
+
+    Returns
+    -------
+    cache : scrape_util.ResponseCache holding the recording
+
+    """
+    #recordings never expire and are never evicted
+    cache = scrape_util.ResponseCache(directory, max_bytes=float("inf"))
+    draft_df = scrape_nfl.scrape_draft_data(min_year, max_year, cache=cache)
+    combine_df = scrape_nfl.scrape_combine_data(min_year, max_year, cache=cache)
+    scrape_nfl.scrape_team_data(min_year - 3, max_year - 1, cache=cache)
+
+    frontier = scrape_util.CrawlFrontier()
+    frontier.add(draft_df, "draft")
+    frontier.add(combine_df, "combine")
+    scrape_nfl.scrape_college_data(frontier.frame("college_link"), cache=cache)
+    scrape_nfl.scrape_nfl_data(frontier.frame("nfl_link"), cache=cache)
+    scrape_util.close_session()
+    return cache
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Serves the responses recorded in a ResponseCache directory.
+    Requests are made to http://host:port/<scheme>/<host>/<path>?<query>
+    (see scrape_util.replay_url), and unknown pages get a 404.
+
+    Parameters
+    ----------
+    directory : string, directory of the recording
+    address : (host, port). The default picks a free port on localhost.
+    latency : float, seconds every response is delayed by. The default is 0.
+    jitter : float, up to this many extra seconds are added at random.
+             The default is 0.
+    error_rate : float, share of requests answered with an injected error.
+                 The default is 0.
+    errors : list of http status codes to inject, chosen at random.
+             The default is [429, 500, 503].
+    retry_after : int, seconds sent in the Retry-After header of injected
+                  429 and 503 responses. The default is 1.
+    seed : int, random seed for jitter and errors. The default is None.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, directory, address=("127.0.0.1", 0), latency=0,
+                 jitter=0, error_rate=0, errors=(429, 500, 503),
+                 retry_after=1, seed=None):
+        super().__init__(address, ReplayHandler)
+        self.recording = scrape_util.ResponseCache(directory,
+                                                   max_bytes=float("inf"))
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.errors = list(errors)
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.counts = {"requests": 0, "bytes": 0, "errors": 0, "missing": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.counts[key] += amount
+
+    def start(self):
+        """
+        Serves in a background thread, returns the thread
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        server.count("requests")
+
+        with server._lock:
+            delay = server.latency + server.random.uniform(0, server.jitter)
+            error = (server.random.choice(server.errors)
+                     if server.random.random() < server.error_rate else None)
+        time.sleep(delay)
+
+        if error is not None:
+            server.count("errors")
+            self.send_response(error)
+            if error in (429, 503):
+                self.send_header("Retry-After", str(server.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        #/<scheme>/<host>/<path>?<query> back to the original url
+        #the http client percent-encodes characters like the [] of the
+        #draft finder's pos[] query, which were recorded unencoded
+        scheme, _, rest = self.path.lstrip("/").partition("/")
+        entry = server.recording.entry(f"{scheme}://{rest}")
+        if entry is None and "%" in rest:
+            entry = server.recording.entry(f"{scheme}://{unquote(rest)}")
+        if entry is None:
+            server.count("missing")
+            self.send_error(404)
+            return
+
+        body = entry["body"].encode("utf-8")
+        server.count("bytes", len(body))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        #keep benchmark output quiet
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="record a year range")
+    record_parser.add_argument("min_year", type=int)
+    record_parser.add_argument("max_year", type=int)
+    record_parser.add_argument("--dir", default="replay")
+
+    serve_parser = commands.add_parser("serve", help="serve a recording")
+    serve_parser.add_argument("--dir", default="replay")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--latency", type=float, default=0)
+    serve_parser.add_argument("--jitter", type=float, default=0)
+    serve_parser.add_argument("--error-rate", type=float, default=0)
+    serve_parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.min_year, args.max_year, args.dir)
+    else:
+        server = ReplayServer(args.dir, (args.host, args.port),
+                              latency=args.latency, jitter=args.jitter,
+                              error_rate=args.error_rate, seed=args.seed)
+        print(f"replaying {args.dir} at {server.url}", flush=True)
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
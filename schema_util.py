@@ -0,0 +1,143 @@
+"""
+Contains the dtypes of every DataFrame passed from the scrapers in
+scrape_nfl.py through the preprocessing.py stages to the stored tables,
+and functions to convert to and check them.
+
+Scraped text is converted once, right after scraping:
+    -low-cardinality strings (teams, positions, schools, conferences,
+     college class) to categoricals
+    -counts, years, rounds and picks to small nullable integers
+    -combine measurables and parsed heights to float32
+    -names, links and free text stay as strings (object)
+which keeps the frames several times smaller than all-object columns, and
+makes merges and groupbys on them faster.
+
+coerce - convert the columns of a DataFrame to a schema
+check - raise TypeError if a DataFrame doesn't match a schema
+check_output - check a pipeline stage's output (a DataFrame, or a
+               dictionary of DataFrames) against its schema
+
+@author: markafunke
+"""
+import pandas as pd
+
+DRAFT = {"nfl_link": "object", "college_link": "object", "year": "Int16",
+         "rnd": "Int8", "pick": "Int16", "player": "object", "pos": "category",
+         "age": "Int8", "team": "category", "first_yr": "Int16", "last_yr": "Int16",
+         "all_pro": "Int8", "pro_bowl": "Int8", "starter_years": "Int8",
+         "AV_career": "Int16", "games": "Int16", "games_started": "Int16",
+         "rush_att": "Int16", "rush_yds": "Int16", "rush_td": "Int16",
+         "rec": "Int16", "rec_yds": "Int16", "rec_td": "Int16",
+         "college": "category", "college stats": "object"}
+
+COMBINE = {"nfl_link": "object", "college_link": "object", "year": "Int16",
+           "player": "object", "pos": "category", "age": "Int8", "av": "Int16",
+           "school": "category", "stats": "object", "height": "object",
+           "weight": "float32", "time_40": "float32", "vertical": "float32",
+           "bench_reps": "float32", "broad_jump": "float32", "cone_3": "float32",
+           "shuttle": "float32", "draft_pick": "object"}
+
+NFL = {"year": "Int16", "team": "category", "games": "Int16",
+       "games_started": "Int16", "tgt": "Int16", "rec": "Int16",
+       "rookie_rec_yards": "Int16", "rec_tds": "Int16", "player": "object",
+       "nfl_link": "object"}
+
+COLLEGE = {"col_year": "Int16", "col_team": "category", "conf": "category",
+           "col_class": "category", "col_rec": "Int16", "col_rec_yds": "Int16",
+           "col_rec_td": "Int16", "col_scrim_yds": "Int16", "col_scrim_td": "Int16",
+           "player": "object", "college_link": "object"}
+
+TEAM = {"year": "Int16", "team": "category", "total_yards": "Int16"}
+
+SCRAPED = {"draft": DRAFT, "combine": COMBINE, "nfl": NFL,
+           "college": COLLEGE, "team": TEAM}
+
+# columns of the draft data after the merge stage of preprocessing.py
+MERGED = {**DRAFT, "player_key": "object", "player_clean": "object",
+          "rookie_rec_yards": NFL["rookie_rec_yards"],
+          **{column: COLLEGE[column] for column in
+             ["conf","col_class","col_rec","col_rec_yds","col_rec_td"
+              ,"col_scrim_yds","col_scrim_td"]},
+          **{column: COMBINE[column] for column in
+             ["height","weight","time_40","vertical","bench_reps"
+              ,"broad_jump","cone_3","shuttle","draft_pick"]},
+          "combine_match": "object", "franchise": "object",
+          "total_yards": "Int16", "total_yards_lag2": "Int16",
+          "total_yards_lag3": "Int16"}
+
+# each franchise's passing yards over the seasons before a draft year
+TEAM_LAGS = {"franchise": "object", "year": "Int16", "total_yards_lag1": "Int16",
+             "total_yards_lag2": "Int16", "total_yards_lag3": "Int16"}
+
+CLEANED = {"player_key": "object", "player_clean": "object", "year": "Int16",
+           "rookie_rec_yards": "Int16", "rnd": "Int8", "pick": "Int16",
+           "conf": "category", "col_scrim_yds": "Int16", "col_rec_yds": "Int16",
+           "height": "float32", "weight": "float32", "time_40": "float32",
+           "total_yards": "Int16", "vertical": "float32",
+           "total_yards_lag2": "Int16", "total_yards_lag3": "Int16", "power_5": "int8",
+           "isSEC": "int8", "isRd1": "int8", "SEC_Rd1": "int8",
+           "left_early": "int8"}
+
+
+def coerce(df, schema):
+    """
+    Returns df with every column in schema converted to its dtype.
+    Text that isn't a number becomes missing in numeric columns, and blank
+    text becomes missing in categorical columns. Columns not in schema are
+    left as they are.
+
+    Parameters
+    ----------
+    df : DataFrame
+    schema : dictionary of column name : dtype
+
+    Returns
+    -------
+    df : DataFrame
+
+    """
+    df = df.copy()
+    for column, dtype in schema.items():
+        if column not in df.columns or str(df[column].dtype) == dtype:
+            continue
+        values = df[column]
+        if dtype == "object":
+            df[column] = values.astype(object)
+        elif dtype == "category":
+            if values.dtype == object:
+                blank = (values.astype("string").str.strip() == "").fillna(False)
+                values = values.mask(blank)
+            df[column] = values.astype("category")
+        else:
+            if values.dtype == object:
+                #pro football reference marks Pro Bowl (*) and
+                #All-Pro (+) seasons next to the year
+                values = values.astype("string").str.replace(r"[*+]", "", regex=True)
+            df[column] = pd.to_numeric(values, errors="coerce").astype(dtype)
+    return df
+
+
+def check(df, schema, name="DataFrame"):
+    """
+    Raises TypeError naming every column of schema missing from df or
+    of a different dtype. Columns not in schema aren't checked.
+    """
+    missing = [column for column in schema if column not in df.columns]
+    wrong = {column: f"{df[column].dtype} (expected {dtype})"
+             for column, dtype in schema.items()
+             if column in df.columns and str(df[column].dtype) != dtype}
+    if missing or wrong:
+        raise TypeError(f"{name} doesn't match its schema: "
+                        f"missing columns {missing}, wrong dtypes {wrong}")
+
+
+def check_output(output, schema, name):
+    """
+    Checks output, a DataFrame or a dictionary of DataFrames, against
+    schema, a schema or a dictionary of schemas with the same keys
+    """
+    if isinstance(output, dict):
+        for key, table_schema in schema.items():
+            check(output[key], table_schema, f"{name}[{key!r}]")
+    else:
+        check(output, schema, name)
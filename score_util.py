@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scores incoming draft classes with the final model of train_regression.py,
+saved as a small json artifact (model.json), without importing pandas or
+sklearn, so it loads and scores a whole class in milliseconds.
+
+The artifact holds the intercept and coefficients of the model, the
+features in coefficient order, the target transform ("cube_root":
+predictions are cubed back to yards) and the constants the features are
+built from, including the conference renames of clean_util.add_flags.
+Every feature is built from the fields of a prospect:
+    pick : overall draft pick
+    col_rec_yds : receiving yards of his final college season
+    col_class : class he left school as, e.g. "JR" (any case)
+    conf : college conference, e.g. "SEC" (any case, former names such as
+           "Pac-10" are renamed as in training)
+    total_yards : total yards of the drafting team the season before the
+                  draft, only needed by models using it
+    rnd : draft round, optional (from pick and first_round_picks if missing)
+
+FEATURES covers every feature of the search pool of train_regression.py
+(SEARCH_POOL), so any model the search picks can be saved.
+
+save_model - write the artifact of a fitted model
+Scorer - load an artifact and score batches of prospects
+ScoringServer - local http server scoring POSTed batches
+
+Usage:
+    python score_util.py score model.json prospects.csv
+    python score_util.py serve model.json --port 8001
+    curl -d '{"prospects": [{"pick": 12, "col_rec_yds": 1100,
+              "col_class": "JR", "conf": "SEC"}]}' localhost:8001/score
+
+@author: markafunke
+"""
+import argparse
+import csv
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# version of the artifact layout, bumped when it changes
+ARTIFACT_VERSION = 3
+
+# picks in the first round of a recent draft, used when rnd isn't given
+FIRST_ROUND_PICKS = 32
+
+# the same constant as clean_util.UNDERCLASSMEN, kept in the artifact
+UNDERCLASSMEN = ["JR", "SO", "FR"]
+
+# the same constant as clean_util.POWER_5_CONF, kept in the artifact
+POWER_5_CONF = ["SEC", "Big Ten", "ACC", "Big 12", "Pac-12"]
+
+# the same constant as clean_util.CONF_NAMES, kept in the artifact
+CONF_NAMES = {"Pac-10": "Pac-12"}
+
+FIELDS = ["pick", "col_rec_yds", "col_class", "conf", "total_yards", "rnd"]
+
+NUMERIC_FIELDS = {"pick", "col_rec_yds", "total_yards", "rnd"}
+
+INVERSE_TRANSFORMS = {"cube_root": lambda pred: pred ** 3,
+                      "identity": lambda pred: pred}
+
+
+def _round_one(columns, artifact):
+    rnd = columns["rnd"]
+    from_pick = columns["pick"] <= artifact["first_round_picks"]
+    return np.where(np.isnan(rnd), from_pick, rnd == 1)
+
+
+def _left_early(columns, artifact):
+    return np.isin(columns["col_class"], artifact["underclassmen"])
+
+
+# name : function of the prospect columns and the artifact returning the
+# feature, matching the cleaned columns of preprocessing.py
+FEATURES = {"pick": lambda columns, artifact: columns["pick"],
+            "pick_2": lambda columns, artifact: columns["pick"] ** 2,
+            "log_pick": lambda columns, artifact: np.log(columns["pick"]),
+            "col_rec_yds": lambda columns, artifact: columns["col_rec_yds"],
+            "total_yards": lambda columns, artifact: columns["total_yards"],
+            "left_early": _left_early,
+            "power_5": lambda columns, artifact: np.isin(columns["conf"],
+                                                         artifact["power_5_conf"]),
+            "isSEC": lambda columns, artifact: columns["conf"] == "SEC",
+            "isRd1": _round_one,
+            "SEC_Rd1": lambda columns, artifact: ((columns["conf"] == "SEC")
+                                                  & _round_one(columns, artifact)),
+            "early_Rd1": lambda columns, artifact: (_left_early(columns, artifact)
+                                                    & _round_one(columns, artifact))}
+
+
+def save_model(path, intercept, coefs, features, transform="cube_root"):
+    """
+    Writes the artifact of a fitted linear model to path
+
+    Parameters
+    ----------
+    path : string, e.g. "model.json"
+    intercept : Float intercept of the model, e.g. lm.intercept_
+    coefs : list of coefficients, e.g. lm.coef_
+    features : list of feature names in coefficient order, each in FEATURES
+    transform : string, key of INVERSE_TRANSFORMS the target was fit with.
+                The default is "cube_root".
+
+    Returns
+    -------
+    artifact : dictionary written to path
+
+    """
+    features = [str(feature) for feature in features]
+    unknown = [feature for feature in features if feature not in FEATURES]
+    if unknown:
+        raise KeyError(f"no scoring function for features {unknown}")
+    artifact = {"version": ARTIFACT_VERSION,
+                "features": features,
+                "intercept": float(intercept),
+                "coefs": [float(coef) for coef in coefs],
+                "transform": transform,
+                "underclassmen": UNDERCLASSMEN,
+                "power_5_conf": POWER_5_CONF,
+                "conf_names": CONF_NAMES,
+                "first_round_picks": FIRST_ROUND_PICKS}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, indent=2)
+    return artifact
+
+
+def _columns(prospects):
+    #list of prospect dictionaries to arrays of each field
+    columns = {}
+    for field in FIELDS:
+        values = [prospect.get(field) for prospect in prospects]
+        if field in NUMERIC_FIELDS:
+            values = [np.nan if value in (None, "") else value for value in values]
+            columns[field] = np.asarray(values, dtype=float)
+        else:
+            columns[field] = np.asarray(["" if value is None else str(value).strip()
+                                         for value in values], dtype=object)
+    return columns
+
+
+def _canonical(values, names, renames):
+    #values matched to names and renamed as in renames, ignoring case,
+    #other values are left as they are
+    lookup = {name.casefold(): name for name in names}
+    lookup.update({old.casefold(): new for old, new in renames.items()})
+    return np.asarray([lookup.get(value.casefold(), value) for value in values],
+                      dtype=object)
+
+
+def _normalize(columns, artifact):
+    #conf and col_class spelled as in the cleaned training data: conferences
+    #renamed with the artifact's conf_names, both matched ignoring case
+    columns = dict(columns)
+    columns["conf"] = _canonical(columns["conf"], artifact["power_5_conf"],
+                                 artifact["conf_names"])
+    columns["col_class"] = _canonical(columns["col_class"],
+                                      artifact["underclassmen"], {})
+    return columns
+
+
+class Scorer:
+    """
+    Scores prospects with a model artifact
+
+    Parameters
+    ----------
+    artifact : dictionary written by save_model
+    """
+
+    def __init__(self, artifact):
+        if artifact.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"artifact version {artifact.get('version')}, "
+                             f"expected {ARTIFACT_VERSION}")
+        self.artifact = artifact
+        self.features = artifact["features"]
+        self.intercept = artifact["intercept"]
+        self.coefs = np.asarray(artifact["coefs"], dtype=float)
+        self.inverse = INVERSE_TRANSFORMS[artifact["transform"]]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def design(self, prospects):
+        """
+        Returns the (prospects, features) matrix of a list of prospect
+        dictionaries. Raises ValueError if a feature is missing for any of
+        them.
+        """
+        columns = _normalize(_columns(prospects), self.artifact)
+        X = np.column_stack([np.asarray(FEATURES[feature](columns, self.artifact),
+                                        dtype=float)
+                             for feature in self.features])
+        missing = np.isnan(X)
+        if missing.any():
+            features = [feature for feature, nan in zip(self.features, missing.any(axis=0))
+                        if nan]
+            raise ValueError(f"prospects {np.flatnonzero(missing.any(axis=1)).tolist()} "
+                             f"are missing a field of features {features}")
+        return X
+
+    def score(self, prospects):
+        """
+        Returns the projected rookie receiving yards of every prospect
+        """
+        if not prospects:
+            return np.zeros(0)
+        return self.inverse(self.design(prospects) @ self.coefs + self.intercept)
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """
+    Scores batches of prospects POSTed as json to /score:
+        {"prospects": [{"pick": 12, "col_rec_yds": 1100, ...}, ...]}
+    answering {"yards": [...], "ms": <scoring time>}. GET /health returns
+    the artifact, its load time and request counts and latencies.
+
+    Parameters
+    ----------
+    path : string, path of the model artifact
+    address : (host, port). The default picks a free port on localhost.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, address=("127.0.0.1", 0)):
+        start = time.perf_counter()
+        self.scorer = Scorer.load(path)
+        self.load_ms = (time.perf_counter() - start) * 1000
+        super().__init__(address, ScoringHandler)
+        self.counts = {"requests": 0, "prospects": 0, "errors": 0}
+        self.first_score_ms = None
+        self.total_score_ms = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, prospects, ms, error=False):
+        with self._lock:
+            self.counts["requests"] += 1
+            self.counts["prospects"] += prospects
+            self.counts["errors"] += error
+            if not error:
+                if self.first_score_ms is None:
+                    self.first_score_ms = ms
+                self.total_score_ms += ms
+
+    def health(self):
+        with self._lock:
+            scored = self.counts["requests"] - self.counts["errors"]
+            return {"artifact": self.scorer.artifact,
+                    "load_ms": self.load_ms,
+                    "first_score_ms": self.first_score_ms,
+                    "mean_score_ms": self.total_score_ms / scored if scored else None,
+                    **self.counts}
+
+    def start(self):
+        """
+        Serves in a background thread, returns the thread
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+
+    def _send_json(self, status, body):
+        body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error(404)
+            return
+        self._send_json(200, self.server.health())
+
+    def do_POST(self):
+        if self.path != "/score":
+            self.send_error(404)
+            return
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            prospects = json.loads(self.rfile.read(length))["prospects"]
+            yards = self.server.scorer.score(prospects)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            self.server.record(0, 0, error=True)
+            self._send_json(400, {"error": str(error)})
+            return
+        ms = (time.perf_counter() - start) * 1000
+        self.server.record(len(prospects), ms)
+        self._send_json(200, {"yards": yards.tolist(), "ms": ms})
+
+    def log_message(self, format, *args):
+        #keep benchmark output quiet
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    score_parser = commands.add_parser("score", help="score a csv of prospects")
+    score_parser.add_argument("model", help="model artifact, e.g. model.json")
+    score_parser.add_argument("prospects", nargs="?", default="-",
+                              help="csv with a header row, the default is stdin")
+
+    serve_parser = commands.add_parser("serve", help="serve a model artifact")
+    serve_parser.add_argument("model", help="model artifact, e.g. model.json")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8001)
+    args = parser.parse_args()
+
+    if args.command == "score":
+        start = time.perf_counter()
+        scorer = Scorer.load(args.model)
+        loaded = time.perf_counter()
+        with (sys.stdin if args.prospects == "-"
+              else open(args.prospects, newline="", encoding="utf-8")) as f:
+            prospects = list(csv.DictReader(f))
+        scored = time.perf_counter()
+        yards = scorer.score(prospects)
+        done = time.perf_counter()
+
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(prospects[0]) + ["yards"]
+                                if prospects else ["yards"])
+        writer.writeheader()
+        for prospect, projection in zip(prospects, yards):
+            writer.writerow({**prospect, "yards": round(float(projection), 1)})
+        print(f"loaded in {(loaded - start) * 1000:.2f}ms, scored "
+              f"{len(prospects)} prospects in {(done - scored) * 1000:.2f}ms",
+              file=sys.stderr)
+    else:
+        server = ScoringServer(args.model, (args.host, args.port))
+        print(f"serving {args.model} at {server.url} "
+              f"(loaded in {server.load_ms:.2f}ms)")
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
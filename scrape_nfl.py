@@ -1,22 +1,134 @@
 """
-This module contains 5 functions used to scrape 
-combine, draft, nfl, and college, stats from pro football reference.
-
-As well as 2 functions used for cleaning the same data.
+This module contains the functions used to scrape draft, combine, team,
+nfl, and college stats from pro football reference.
+Player pages are fetched concurrently through scrape_util.fetch_pages.
+
+scrape_draft_data, scrape_combine_data, scrape_team_data,
+scrape_nfl_data, scrape_college_data - scrape each source into a DataFrame
+parse_*_page, parse_*_rows - parse one page of each source into rows
+draft_url, combine_url - urls of the draft and combine listings
+valid_link - canonical url of a player link
+player_page_ttls - how long each player's cached page stays fresh
+player_urls - player page urls, e.g. to re-crawl a single draft year
+page_parser - the parse function of any scraped url
+
+As well as 2 row by row functions used for cleaning the same data:
+clean_player_name and add_team_abbrev.
 
 @author: markafunke
 """
-import pandas as pd
-from bs4 import BeautifulSoup
-from selenium import webdriver
-import requests
-import numpy as np
 import re
-import time
-import os
+
+import clean_util
+import franchise_util
+import schema_util
+import scrape_util
+import table_util
+
+
+DRAFT_URL = "https://www.pro-football-reference.com/play-index/draft-finder.cgi?request=1&year_min={min_year}&year_max={max_year}&type=&round_min=1&round_max=30&slot_min=1&slot_max=500&league_id=&team_id={positions}&college_id=all&conference=any&show=all"
+COMBINE_URL = "https://www.pro-football-reference.com/play-index/nfl-combine-results.cgi?request=1&year_min={min_year}&year_max={max_year}&height_min=65&height_max=82&weight_min=140&weight_max=400{positions}&show=all&order_by=year_id"
+TEAM_URL = "https://www.pro-football-reference.com/years/{year}/index.htm#all_passing"
+
+# columns of each scraper's dataframe, in the order rows are collected
+# values are collected as text, then converted to the compact dtypes
+# in schema_util.py once each scrape is done
+DRAFT_SCHEMA = dict.fromkeys(["nfl_link", "college_link", "year", "rnd", "pick", "player", "pos"
+                              , "age", "team", "first_yr", "last_yr"
+                              , "all_pro", "pro_bowl", "starter_years"
+                              , "AV_career", "games", "games_started"
+                              , "rush_att", "rush_yds", "rush_td", "rec"
+                              , "rec_yds", "rec_td", "college"
+                              , "college stats"], "object")
+COMBINE_SCHEMA = dict.fromkeys(["nfl_link","college_link","year","player","pos","age","av","school","stats"
+                                ,"height","weight","time_40","vertical","bench_reps"
+                                ,"broad_jump","cone_3","shuttle","draft_pick"], "object")
+NFL_SCHEMA = dict.fromkeys(["year","team","games","games_started","tgt","rec"
+                            ,"rookie_rec_yards","rec_tds","player","nfl_link"], "object")
+COLLEGE_SCHEMA = dict.fromkeys(["col_year","col_team","conf","col_class","col_rec","col_rec_yds"
+                                ,"col_rec_td","col_scrim_yds","col_scrim_td","player","college_link"], "object")
+TEAM_SCHEMA = {"year": "int64", "team": "object", "total_yards": "object"}
+
+# data-stat of every column scraped from each table, in dataframe column order
+DRAFT_STATS = (["year_id", "draft_round", "draft_pick", "player", "pos"
+                , "age", "team", "year_min", "year_max"
+                , "all_pros_first_team", "pro_bowls", "years_as_primary_starter"
+                , "career_av", "g", "gs"
+                , "rush_att", "rush_yds", "rush_td", "rec"
+                , "rec_yds", "rec_td", "college_id"
+                , "college_link"])
+COMBINE_STATS = (["year_id","player","pos","age","av","school_name","college"
+                  ,"height","weight","forty_yd","vertical","bench_reps"
+                  ,"broad_jump","cone","shuttle","draft_info"])
+NFL_STATS = (["team","g","gs","targets","rec","rec_yds","rec_td"])
+COLLEGE_STATS = (["school_name","conf_abbr","class","rec","rec_yds","rec_td"
+                  ,"scrim_yds","scrim_td"])
+
+
+def draft_url(min_year, max_year, positions=("WR",)):
+    """
+    Returns the url of the draft finder listing every player drafted at
+    positions from min_year to max_year, in a single query
+    """
+    return DRAFT_URL.format(min_year=min_year, max_year=max_year
+                            , positions="".join(f"&pos[]={pos}" for pos in positions))
+
+
+def combine_url(min_year, max_year, positions=("WR",)):
+    """
+    Returns the url of the combine results listing every player at
+    positions from min_year to max_year, in a single query
+    """
+    return COMBINE_URL.format(min_year=min_year, max_year=max_year
+                              , positions="".join(f"&pos%5B%5D={pos}" for pos in positions))
 
 
-def scrape_draft_data(min_year,max_year):
+def valid_link(link, pattern):
+    """
+    Returns link as a canonical absolute url if it contains pattern,
+    otherwise None
+    """
+    if link is None or re.search(pattern, link) == None:
+        return None
+    return scrape_util.normalize_link(link)
+
+
+def parse_draft_page(page, url=None):
+    """
+    Parses a draft finder page into one row per player:
+    nfl link, college link, then every column of the draft table
+    
+    Parameters
+    ----------
+    page : string, html of a draft finder page
+    url : string, url of the page (unused)
+
+    Returns
+    -------
+    rows : list of lists
+
+    """
+    
+    #scrape every column and store in dictionary, keyed by player and year
+    #repeated header rows are skipped by parse_table
+    draft_dict = {}
+    for stats in table_util.parse_table(page):
+        
+        #pull links to nfl and college pages
+        #all valid nfl links contain "/player"
+        #all valid college links contain "sports-reference"
+        #set all missing or invalid to None
+        nfl_link = valid_link(stats.get("player_href"), "/player")
+        college_link = valid_link(stats.get("college_link_href"), "sports-reference")
+        
+        name = stats["player"]
+        draft_dict[name, stats.get("year_id")] = [nfl_link, college_link] + [stats.get(stat) for stat in DRAFT_STATS]
+    
+    return list(draft_dict.values())
+
+
+def scrape_draft_data(min_year,max_year,cache=None,manifest=None
+                        ,positions=("WR",)):
     """
     Scrapes profootballreference NFL Draft data for the years entered
     into a dataframe
@@ -25,6 +137,12 @@ def scrape_draft_data(min_year,max_year):
     ----------
     min_year : int from 2000-2020
     max_year : int from 2000-2020
+    cache : scrape_util.ResponseCache to read pages from and store pages in.
+            The default is None (always request pages).
+    manifest : scrape_util.CrawlManifest recording each listing page.
+               Pages already crawled are read from it instead of fetched.
+               The default is None.
+    positions : list of positions to list. The default is ["WR"].
 
     Returns
     -------
@@ -32,63 +150,57 @@ def scrape_draft_data(min_year,max_year):
 
     """
     
-    draft_df = pd.DataFrame()
-    
-    for year in range(min_year,max_year+1):
+    #request every year and position in one query, following the listing's
+    #"Next Page" links for as many pages as it takes
+    url = draft_url(min_year, max_year, positions)
+    results = scrape_util.crawl_listing(url, parse_draft_page, manifest=manifest
+                                        , cache=cache)
     
-        #create url for each year and initiate http request
-        url = f"https://www.pro-football-reference.com/play-index/draft-finder.cgi?request=1&year_min={year}&year_max={year}&type=&round_min=1&round_max=30&slot_min=1&slot_max=500&league_id=&team_id=&pos[]=WR&college_id=all&conference=any&show=all"
-        response = requests.get(url)
-       
-        page = response.text
-        soup = BeautifulSoup(page, "lxml")
+    #convert to dataframe, indexed by player name
+    records = scrape_util.RecordBuilder(DRAFT_SCHEMA)
+    for rows in results:
+        records.extend(rows, index=[row[5] for row in rows])
+    draft_df = schema_util.coerce(records.to_frame(), schema_util.DRAFT)
         
-        #find all rows of table
-        table = soup.find("table")
-        rows = [row for row in table.find_all("tr")]
-        
-        #scrape every column and store in dictionary
-        #row 32 is a repeat of column headers, skip
-        draft_dict = {}
-        for row in rows[2:32]+rows[33:]:
-            columns = row.find_all('td')
-            links = row.find_all('a')
-            
-            #pull links to nfl and college pages
-            #all valid nfl links contain "/player"
-            #all valid college links contain "sports-reference"
-            #set all missing or invalid to None
-            try:
-                nfl_link = links[1].get('href')
-                if re.search('/player',nfl_link) == None:
-                    nfl_link = None  
-            except:
-                nfl_link = None
-            try:
-                college_link = links[4].get('href')
-                if re.search('sports-reference',college_link) == None:
-                    college_link = None
-            except:
-                college_link = np.NaN
-            
-                
-            name = columns[3].text
-            draft_dict[name] = [nfl_link, college_link] + [column.text for column in columns]
+    return draft_df
+
+
+def parse_combine_page(page, url=None):
+    """
+    Parses a combine results page into one row per player:
+    nfl link, college link, then every column of the combine table
+    
+    Parameters
+    ----------
+    page : string, html of a combine results page
+    url : string, url of the page (unused)
+
+    Returns
+    -------
+    rows : list of lists
+
+    """
+    
+    #scrape every column and store in dictionary, keyed by player and year
+    #repeated header rows are skipped by parse_table
+    combine_dict = {}
+    for stats in table_util.parse_table(page):
         
-        #convert to dataframe
-        draft_df_year = pd.DataFrame(draft_dict).T  #transpose
-        draft_df_year.columns= (["nfl_link", "college_link", "year", "rnd", "pick", "player", "pos"
-                                   , "age", "team", "first_yr", "last_yr"
-                                   , "all_pro", "pro_bowl", "starter_years"
-                                   , "AV_career", "games", "games_started"
-                                   , "rush_att", "rush_yds", "rush_td", "rec"
-                                   , "rec_yds", "rec_td", "college"
-                                   , "college stats"])
-        draft_df = pd.concat([draft_df, draft_df_year])
+        #pull links to nfl and college pages
+        #all valid nfl links contain "/player"
+        #all valid college links contain "sports-reference"
+        #set all missing or invalid to None
+        nfl_link = valid_link(stats.get("player_href"), "/player")
+        college_link = valid_link(stats.get("college_href"), "sports-reference")
         
-    return draft_df
+        name = stats["player"]
+        combine_dict[name, stats.get("year_id")] = [nfl_link, college_link] + [stats.get(stat) for stat in COMBINE_STATS]
+    
+    return list(combine_dict.values())
+
 
-def scrape_combine_data(min_year,max_year):
+def scrape_combine_data(min_year,max_year,cache=None,manifest=None
+                        ,positions=("WR",)):
     """
     Scrapes profootballreference combine data for the years entered
     into a dataframe
@@ -97,6 +209,12 @@ def scrape_combine_data(min_year,max_year):
     ----------
     min_year : int from 2000-2020
     max_year : int from 2000-2020
+    cache : scrape_util.ResponseCache to read pages from and store pages in.
+            The default is None (always request pages).
+    manifest : scrape_util.CrawlManifest recording each listing page.
+               Pages already crawled are read from it instead of fetched.
+               The default is None.
+    positions : list of positions to list. The default is ["WR"].
 
     Returns
     -------
@@ -104,60 +222,111 @@ def scrape_combine_data(min_year,max_year):
 
     """
     
-    combine_df = pd.DataFrame()
+    #request every year and position in one query, following the listing's
+    #"Next Page" links for as many pages as it takes
+    url = combine_url(min_year, max_year, positions)
+    results = scrape_util.crawl_listing(url, parse_combine_page, manifest=manifest
+                                        , cache=cache)
     
-    for year in range(min_year,max_year+1):
-    
-        #create url for each year and initiate http request
-        url = f"https://www.pro-football-reference.com/play-index/nfl-combine-results.cgi?request=1&year_min={year}&year_max={year}&height_min=65&height_max=82&weight_min=140&weight_max=400&pos%5B%5D=WR&show=all&order_by=year_id"
-        response = requests.get(url)
-       
-        page = response.text
-        soup = BeautifulSoup(page, "lxml")
-        
-        #find all rows of table
-        table = soup.find("table")
-        rows = [row for row in table.find_all("tr")]
-        
-        #scrape every column and store in dictionary
-        #row 51 is a repeat of column headers, skip
-        combine_dict = {}
-        for row in rows[1:51]+rows[52:]:
-            columns = row.find_all('td')
-            links = row.find_all('a')
-            
-            #pull links to nfl and college pages
-            #all valid nfl links contain "/player"
-            #all valid college links contain "sports-reference"
-            #set all missing or invalid to None
-            try:
-                nfl_link = links[1].get('href')
-                if re.search('/player',nfl_link) == None:
-                    nfl_link = None  
-            except:
-                nfl_link = None
-            try:
-                college_link = links[3].get('href')
-                if re.search('sports-reference',college_link) == None:
-                    college_link = None
-            except:
-                college_link = np.NaN
-            
-                
-            name = columns[1].text
-            combine_dict[name] = [nfl_link, college_link] + [column.text for column in columns]
-        
-        #convert to dataframe
-        combine_df_year = pd.DataFrame(combine_dict).T  #transpose
-        combine_df_year.columns= (["nfl_link","college_link","year","player","pos","age","av","school","stats"
-                                   ,"height","weight","time_40","vertical","bench_reps"
-                                   ,"broad_jump","cone_3","shuttle","draft_pick"])
-        combine_df = pd.concat([combine_df, combine_df_year])
+    #convert to dataframe, indexed by player name
+    records = scrape_util.RecordBuilder(COMBINE_SCHEMA)
+    for rows in results:
+        records.extend(rows, index=[row[3] for row in rows])
+    combine_df = schema_util.coerce(records.to_frame(), schema_util.COMBINE)
         
     return combine_df
 
 
-def scrape_nfl_data(df):
+def player_page_ttls(df, link_column, season_offset=0):
+    """
+    Returns how long each player's cached page stays fresh, based on the
+    draft year of the player ("year" column of df) plus season_offset.
+    Falls back to the current season expiry if df has no "year" column.
+    
+    Parameters
+    ----------
+    df : DataFrame containing "player" and link_column, optionally "year"
+    link_column : string, "nfl_link" or "college_link"
+    season_offset : int, season of the page relative to the draft year
+
+    Returns
+    -------
+    ttls : list of seconds (None for never expires)
+
+    """
+    #same rows as df[["player",link_column]].dropna() in the scrapers
+    valid = df["player"].notna() & df[link_column].notna()
+    if "year" not in df.columns:
+        return [scrape_util.CURRENT_SEASON_TTL] * int(valid.sum())
+    years = df.loc[valid, "year"]
+    return [scrape_util.season_ttl(int(year) + season_offset)
+            for year in years]
+
+
+def player_urls(df, link_column, year=None):
+    """
+    Returns the player page urls scraped from df, e.g. to reset a single
+    draft year in a scrape_util.CrawlManifest so it is crawled again
+    
+    Parameters
+    ----------
+    df : DataFrame containing "player", link_column and "year"
+    link_column : string, "nfl_link" or "college_link"
+    year : draft year to limit the urls to. The default is None (all years).
+
+    Returns
+    -------
+    urls : list of url strings
+
+    """
+    if year is not None:
+        df = df[df["year"].astype(str) == str(year)]
+    links = df[["player",link_column]].dropna()[link_column]
+    return [scrape_util.normalize_link(link) for link in links]
+
+
+def parse_nfl_page(page):
+    """
+    Parses the receiving and rushing table of a pro football reference
+    player page into a dictionary of stats for each of the player's
+    first three seasons
+    
+    Parameters
+    ----------
+    page : string, html of a player page
+
+    Returns
+    -------
+    stats_dict : dictionary of year : list of stats
+
+    """
+    
+    #locate receiving table and parse all season rows
+    #table is in the static html inside a comment
+    rows = table_util.parse_table(page, "receiving_and_rushing")
+    
+    #scrape game and receiving stats for each year of player's career
+    #adding functionality to pull more than 1 year by adjusting final_year
+    final_year = 3
+    
+    stats_dict = {}
+    for stats in rows[:final_year]:
+        year = stats.get("year_id")
+        stats_dict[year] = [year] + [stats.get(stat) for stat in NFL_STATS]
+    
+    return stats_dict
+
+
+def parse_nfl_rows(page, url=None):
+    """
+    Returns the rows of parse_nfl_page, in the form used by scrape_util.crawl
+    """
+    return list(parse_nfl_page(page).values())
+
+
+def scrape_nfl_data(df, max_workers=scrape_util.MAX_WORKERS
+                    , per_host=scrape_util.PER_HOST, cache=None
+                    , manifest=None):
     
     """
     Scrapes profootballreference receiving stats from series of player links
@@ -169,6 +338,17 @@ def scrape_nfl_data(df):
         "player"(string)
         "nfl_link"(link to pro football reference player page
                    e.g. "/players/B/BurrPl00.htm")
+        e.g. scrape_util.CrawlFrontier.frame("nfl_link")
+    max_workers : int, number of player pages requested at once.
+                  The default is 8.
+    per_host : int, number of player pages requested at once from
+               pro football reference. The default is 2.
+    cache : scrape_util.ResponseCache to read pages from and store pages in.
+            Pages of players whose rookie season ("year") is over never
+            expire. The default is None (always request pages).
+    manifest : scrape_util.CrawlManifest recording each player's page.
+               Players already crawled are read from it instead of fetched,
+               so a crawl that died can be restarted. The default is None.
 
     Returns
     -------
@@ -178,73 +358,67 @@ def scrape_nfl_data(df):
 
     #limit list to just valid urls
     scrape_url_list = df[["player","nfl_link"]].dropna()
+    urls = player_urls(df, "nfl_link")
+    ttls = player_page_ttls(df, "nfl_link")
     
-    #initialize dataframes to be used later
-    player_df = pd.DataFrame()
-    nfl_df = pd.DataFrame()
-    player_lookup = 0
+    #receiving and rushing table is in the static html inside a comment
+    #so a plain http request is enough, no browser needed
+    results = scrape_util.crawl(urls, parse_nfl_rows
+                                , manifest=manifest, ttls=ttls
+                                , max_workers=max_workers, per_host=per_host
+                                , cache=cache)
     
-    #Use sellenium webdriver to allow for receiving and rushing table to load
-    chromedriver = "/Applications/chromedriver" # path to the chromedriver executable
-    os.environ["webdriver.chrome.driver"] = chromedriver
-    driver = webdriver.Chrome(chromedriver)
+    #convert rows to dataframe, assign player name for each year(row)
+    records = scrape_util.RecordBuilder(NFL_SCHEMA)
+    for player_lookup, rows in enumerate(results):
+        player = scrape_url_list.index[player_lookup]
+        nfl_link = scrape_url_list.nfl_link.iloc[player_lookup]
+        for row in rows:
+            records.append(row + [player, nfl_link], index=row[0])
+    nfl_df = schema_util.coerce(records.to_frame(), schema_util.NFL)
     
-    for link in scrape_url_list["nfl_link"]:
-        
-        #load receiving table with sellenium, wait for it to load fully
-        driver.get(f"https://www.pro-football-reference.com{link}#all_receiving_and_rushing")
-        time.sleep(1)
+    return nfl_df
 
 
-        #locate receiving table and parse all rows 
-        soup = BeautifulSoup(driver.page_source)
-        table = soup.find(lambda tag: 
-                          tag.name=='table' 
-                          and tag.has_attr('id') 
-                          and tag['id']=="receiving_and_rushing")
-        
-        try:
-            rows = [row for row in table.find_all("tr")]
-            
-            #scrape game and receiving stats for each year of player's career
-            #first year begins in row 2, calculate final year of career
-            stats_dict = {}
-            
-            #rookie year starts in row 2
-            #adding functionality to pull more than 1 year by adjusting final_year
-            final_year = 5
-            
-            for row in rows[2:final_year]:
-                columns = row.find_all('td')
-                year = row.find("th").text
-                team = columns[1].text
-                games = columns[4].text
-                games_started = columns[5].text
-                tgt = columns[6].text
-                rec = columns[7].text
-                rec_yards = columns[8].text
-                rec_tds = columns[10].text
-                stats_dict[year] = ([year,team,games,games_started,tgt,rec,rec_yards
-                                      ,rec_tds])
-        except:
-            stats_dict = {}
-        #convert dictionary to dataframe, assign player name for each year(row)
-        #add player dataframe to final dataframe
-        player = scrape_url_list.index[player_lookup]
-        nfl_link = scrape_url_list.nfl_link[player_lookup]
-        player_df = pd.DataFrame(stats_dict).T
-        player_df["player"] = player
-        player_df["nfl_link"] = nfl_link
-        nfl_df = pd.concat([nfl_df, player_df]) 
-        player_lookup += 1
-        time.sleep(0.5)
-    
-    nfl_df.columns= (["year","team","games","games_started","tgt","rec"
-                      ,"rookie_rec_yards","rec_tds","player","nfl_link"])
-    return nfl_df
+def parse_college_page(page):
+    """
+    Parses the receiving table of a sports reference college player page
+    into a dictionary of stats for the player's final college season
+    
+    Parameters
+    ----------
+    page : string, html of a college player page
 
+    Returns
+    -------
+    stats_dict : dictionary of year : list of stats
 
-def scrape_college_data(df):
+    """
+    
+    #only want to scrape player's final season in college
+    #the "Career" row is in the table footer, so it is the last season row
+    rows = table_util.parse_table(page)
+    if not rows:
+        return {}
+    
+    stats = rows[-1]
+    year = stats.get("year_id")
+    stats_dict = {}
+    stats_dict[year] = [year] + [stats.get(stat) for stat in COLLEGE_STATS]
+    
+    return stats_dict
+
+
+def parse_college_rows(page, url=None):
+    """
+    Returns the rows of parse_college_page, in the form used by scrape_util.crawl
+    """
+    return list(parse_college_page(page).values())
+
+
+def scrape_college_data(df, max_workers=scrape_util.MAX_WORKERS
+                        , per_host=scrape_util.PER_HOST, cache=None
+                        , manifest=None):
     
     """
     Scrapes profootballreference receiving stats from series of player links
@@ -254,8 +428,18 @@ def scrape_college_data(df):
     ----------
     df : DataFrame containing series:
         "player"(string)
-        "nfl_link"(link to pro football reference player page
-                   e.g. "/players/B/BurrPl00.htm")
+        "college_link"(link to sports reference college player page)
+        e.g. scrape_util.CrawlFrontier.frame("college_link")
+    max_workers : int, number of player pages requested at once.
+                  The default is 8.
+    per_host : int, number of player pages requested at once from
+               sports reference. The default is 2.
+    cache : scrape_util.ResponseCache to read pages from and store pages in.
+            Pages of players whose final college season is over never
+            expire. The default is None (always request pages).
+    manifest : scrape_util.CrawlManifest recording each player's page.
+               Players already crawled are read from it instead of fetched,
+               so a crawl that died can be restarted. The default is None.
 
     Returns
     -------
@@ -265,184 +449,128 @@ def scrape_college_data(df):
 
     #limit list to just valid urls
     scrape_url_list = df[["player","college_link"]].dropna()
+    urls = player_urls(df, "college_link")
+    ttls = player_page_ttls(df, "college_link", season_offset=-1)
     
-    player_df = pd.DataFrame()
-    college_df = pd.DataFrame()
-    player_lookup = 0
+    #request every player page over a shared keep-alive session
+    results = scrape_util.crawl(urls, parse_college_rows
+                                , manifest=manifest, ttls=ttls
+                                , max_workers=max_workers, per_host=per_host
+                                , cache=cache)
     
-    for link in scrape_url_list["college_link"]:
-        
-        #creates url for each player
-        response = requests.get(link)
-        
-        page = response.text
-        soup = BeautifulSoup(page, "lxml")
-
-        table = soup.find("table")
-        
-        try:
-
-            #only want to scrape player's final season in college
-            #checks to find "career" row, so we can locate the row before it
-            rows = [row for row in table.find_all("tr")]
-            career_row = 0
-            for row in rows:
-                header = row.find("th").text
-                if header == "Career":
-                    break
-                else:
-                    career_row += 1
-            final_year = career_row - 1
-            row = rows[final_year]
-
-            columns = row.find_all('td')
-            year = row.find("th").text
-            team = columns[0].text
-            conf = columns[1].text
-            grade = columns[2].text
-            rec = columns[5].text
-            rec_yds = columns[6].text
-            rec_td = columns[8].text
-            scrim_yds = columns[14].text
-            scrim_td = columns[16].text
-
-            stats_dict = {}
-            stats_dict[year] = ([year,team,conf,grade,rec,rec_yds,rec_td,scrim_yds,scrim_td])
-        except:
-            stats_dict = {}
-            
-        #convert dictionary to dataframe, assign player name for each year(row)
-        #add player dataframe to final dataframe
+    #convert rows to dataframe, assign player name for each year(row)
+    records = scrape_util.RecordBuilder(COLLEGE_SCHEMA)
+    for player_lookup, rows in enumerate(results):
         player = scrape_url_list.index[player_lookup]
-        college_link = scrape_url_list.college_link[player_lookup]
-        player_df = pd.DataFrame(stats_dict).T
-        player_df["player"] = player
-        player_df["college_link"] = college_link
-        college_df = pd.concat([college_df, player_df]) 
-        player_lookup += 1
-        time.sleep(0.5)
-    
-    college_df.columns= (["col_year","col_team","conf","col_class","col_rec","col_rec_yds","col_rec_td","col_scrim_yds","col_scrim_td","player","college_link"])
+        college_link = scrape_url_list.college_link.iloc[player_lookup]
+        for row in rows:
+            records.append(row + [player, college_link], index=row[0])
+    college_df = schema_util.coerce(records.to_frame(), schema_util.COLLEGE)
+    
     return college_df
 
 
-def scrape_team_data(min_year,max_year):
+def parse_team_page(page, url=None):
+    """
+    Parses the passing table of a pro football reference season page
+    into one row per team: team name and total passing yards
+    
+    Parameters
+    ----------
+    page : string, html of a season page
+    url : string, url of the page (unused)
+
+    Returns
+    -------
+    rows : list of lists
 
-    team_df = pd.DataFrame()
+    """
     
-    #need to use sellenium webdriver to allow for passing table to load
-    chromedriver = "/Applications/chromedriver" # path to the chromedriver executable
-    os.environ["webdriver.chrome.driver"] = chromedriver
-    driver = webdriver.Chrome(chromedriver)
+    #locate passing table and parse all team rows
+    #table is in the static html inside a comment
+    #league average and total rows are dropped, so the number of teams
+    #in a season (31 prior to 2002, 32 after) doesn't need to be known
+    stats_dict = {}
+    for stats in table_util.parse_table(page, "passing"):
+        team = stats.get("team")
+        if not team or team.startswith(("Avg", "League")):
+            continue
+        stats_dict[team] = [team, stats.get("pass_yds")]
     
-    for year in range(min_year,max_year+1):
-        
-        #load passing table with sellenium, wait for it to load fully
-        driver.get(f"https://www.pro-football-reference.com/years/{year}/index.htm#all_passing")
-        time.sleep(3)
-        
-        #locate passing table and parse all rows
-        soup = BeautifulSoup(driver.page_source)
-        table = soup.find(lambda tag: 
-                          tag.name=='table' 
-                          and tag.has_attr('id') 
-                          and tag['id']=="passing")
-
-        rows = [row for row in table.find_all("tr")]
-         
-        #there were 31 team prior to 2002, 32 starting in 2003
-        final_row = ''
-        if year < 2002:
-            final_row = 32
-        else:
-            final_row = 33
-        
-        #collect total receiving yards in dictionary
-        stats_dict = {}
-        for row in rows[1:final_row]:
-            columns = row.find_all('td')
-            team = columns[0].text
-            total_yards = columns[5].text
-            stats_dict[team] = ([year,team,total_yards])
-                
-        team_df_year = pd.DataFrame(stats_dict).T  #transpose
-        team_df_year.columns= (["year","team","total_yards"])
-        team_df = pd.concat([team_df, team_df_year])
+    return list(stats_dict.values())
+
+
+def scrape_team_data(min_year,max_year,cache=None,manifest=None):
+    """
+    Scrapes profootballreference team passing totals for the years entered
+    into a dataframe
+    
+    Parameters
+    ----------
+    min_year : int from 1999-2019
+    max_year : int from 1999-2019
+    cache : scrape_util.ResponseCache to read pages from and store pages in.
+            The default is None (always request pages).
+    manifest : scrape_util.CrawlManifest recording each year's page.
+               Years already crawled are read from it instead of fetched.
+               The default is None.
+
+    Returns
+    -------
+    team_df : DataFrame
+
+    """
+
+    years = list(range(min_year,max_year+1))
+    urls = [TEAM_URL.format(year=year) for year in years]
+    results = scrape_util.crawl(urls, parse_team_page, manifest=manifest
+                                , cache=cache)
+    
+    #add the season to every team's row, indexed by team name
+    records = scrape_util.RecordBuilder(TEAM_SCHEMA)
+    for year, rows in zip(years, results):
+        for row in rows:
+            records.append([year] + row, index=row[0])
+    team_df = schema_util.coerce(records.to_frame(), schema_util.TEAM)
         
     return team_df
 
+def page_parser(url):
+    """
+    Returns the function the scrapers parse the page at url with,
+    e.g. to re-parse archived pages (see archive_util.py).
+    None for pages none of the scrapers read.
+    """
+    if "draft-finder.cgi" in url:
+        return parse_draft_page
+    if "nfl-combine-results.cgi" in url:
+        return parse_combine_page
+    if "pro-football-reference.com/years/" in url:
+        return parse_team_page
+    if "pro-football-reference.com/players/" in url:
+        return parse_nfl_rows
+    if "sports-reference.com/cfb/players/" in url:
+        return parse_college_rows
+    return None
+
 def clean_player_name(df):
+    # Row by row version of clean_util.clean_player_names
     
     #remove whitespaces
     player_name = df["player"].strip()
     
     #fix 8 outlier cases found through EDA
-    player_issues = {'Ted Ginn Jr.' : 'Ted Ginn',
-                     'Odell Beckham Jr.' : 'Odell Beckham, Jr.',
-                     'Gary Jennings Jr' : 'Gary Jennings',
-                     'Michael Pittman Jr.' : 'Michael Pittman',
-                     'Lynn Bowden Jr.' : 'Lynn Bowden',
-                     'JJ Nelson' : 'J.J. Nelson',
-                     'JJ Arcega-Whiteside' : 'J.J. Arcega-Whiteside'}
-                     
-    if player_name in player_issues.keys():
-            player_name = player_issues[player_name]
+    if player_name in clean_util.PLAYER_ISSUES.keys():
+            player_name = clean_util.PLAYER_ISSUES[player_name]
     
     return player_name
 
 def add_team_abbrev(df):
+    # Row by row version of franchise_util.team_abbrevs
     
-    #mapping of team to 3 letter abbreviation
-    team_abbreviations =    {'Arizona Cardinals' : 'ARI',
-                            'Atlanta Falcons' : 'ATL',
-                            'Baltimore Ravens' : 'BAL',
-                            'Buffalo Bills' : 'BUF',
-                            'Carolina Panthers' : 'CAR',
-                            'Chicago Bears' : 'CHI',
-                            'Cincinnati Bengals' : 'CIN',
-                            'Cleveland Browns' : 'CLE',
-                            'Dallas Cowboys' : 'DAL',
-                            'Denver Broncos' : 'DEN',
-                            'Detroit Lions' : 'DET',
-                            'Green Bay Packers' : 'GNB',
-                            'Houston Texans' : 'HOU',
-                            'Indianapolis Colts' : 'IND',
-                            'Jacksonville Jaguars' : 'JAX',
-                            'Kansas City Chiefs' : 'KAN',
-                            'Los Angeles Chargers' : 'LAC',
-                            'Los Angeles Rams' : 'LAR',
-                            'Miami Dolphins' : 'MIA',
-                            'Minnesota Vikings' : 'MIN',
-                            'New Orleans Saints' : 'NOR',
-                            'New England Patriots' : 'NWE',
-                            'New York Giants' : 'NYG',
-                            'New York Jets' : 'NYJ',
-                            'Oakland Raiders' : 'OAK',
-                            'Philadelphia Eagles' : 'PHI',
-                            'Pittsburgh Steelers' : 'PIT',
-                            'San Diego Chargers' : 'SDG',
-                            'Seattle Seahawks' : 'SEA',
-                            'San Francisco 49ers' : 'SFO',
-                            'St. Louis Rams' : 'STL',
-                            'Tampa Bay Buccaneers' : 'TAM',
-                            'Tennessee Titans' : 'TEN',
-                            'Washington Redskins' : 'WAS'}
-                     
-    team = df["team"]
-    team_abbrev = team_abbreviations[team]
-    
-    # Oakland changed to Las Vegas Raiders in 2020
-    # St Louis Rams changed to Los Angeles Rams in 2016
-    # San Diego Chargers changed to Los Angeles Chargers in 2017
-    
-    if team_abbrev == "OAK" and df["year_merge"] == "2020":
-        team_abbrev = "LVR"
-    if team_abbrev == "STL" and df["year_merge"] == "2016":
-        team_abbrev = "LAR"
-    if team_abbrev == "SDG" and df["year_merge"] == "2017":
-        team_abbrev = "LAC"
-
-    return team_abbrev
+    #franchise of the team name, then its abbreviation in the draft year
+    franchise = franchise_util.TEAM_FRANCHISES[df["team"]]
+    return franchise_util.abbrev_at(franchise, int(df["year_merge"]))
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,944 @@
+"""
+Contains helper functions used by scrape_nfl.py to fetch pages from
+pro football reference and sports reference.
+
+fetch_page - fetch a single url, reading from and writing to a
+             ResponseCache when one is given
+fetch_pages - fetch a list of urls concurrently over a pooled keep-alive
+              session, paced per host by an adaptive RateController and
+              retrying failures with backoff
+close_session - close the keep-alive session shared by fetch_page and
+                fetch_pages at the end of a crawl
+ResponseCache - compressed on-disk cache of responses keyed by url, with
+                per-url expiry and least recently used eviction
+CrawlManifest - record of every crawled url, flushed to disk as pages arrive
+crawl - fetch and parse a list of urls, skipping urls already crawled
+crawl_listing - fetch and parse every page of a paginated listing
+RecordBuilder - collect scraped rows column by column into one DataFrame
+normalize_link - turn a scraped link into a canonical absolute url
+CrawlFrontier - deduplicated set of player pages to crawl, from any listing
+
+Every request, cache hit and parse is recorded in the module's telemetry
+(a telemetry_util.ScrapeTelemetry), which can be exported at the end of a run
+with telemetry.to_json() or telemetry.to_prometheus().
+
+@author: markafunke
+"""
+import datetime
+import email.utils
+import gzip
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urldefrag, urljoin, urlsplit, urlunsplit
+
+import pandas as pd
+import requests
+
+import table_util
+import telemetry_util
+
+# default number of requests in flight at once, across all hosts
+MAX_WORKERS = 8
+
+# default number of requests in flight at once to a single host
+PER_HOST = 2
+
+# seconds a worker waits after each request before releasing its host slot
+POLITE_DELAY = 0.5
+
+# retries of a request that failed with a connection error, 429 or 5xx
+MAX_RETRIES = 4
+
+# seconds of the first retry backoff, doubling with each retry up to the cap
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# responses slower than this many seconds cut a host's requests in flight
+LATENCY_TARGET = 2.0
+
+# share of a host's requests in flight kept after a slow or failed response
+DECREASE_FACTOR = 0.5
+
+# most pages of a single listing followed by crawl_listing
+MAX_LISTING_PAGES = 100
+
+# seconds a cached page from the current season stays fresh
+# pages from past seasons never change, so they never expire
+CURRENT_SEASON_TTL = 24 * 60 * 60
+
+# default size cap of a ResponseCache, in bytes of compressed pages
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# site that relative links scraped from pro football reference point to
+BASE_URL = "https://www.pro-football-reference.com"
+
+# address of a local replay server (see replay_server.py) that every request
+# is sent to instead of the live site, None to request the live site
+REPLAY_SERVER = None
+
+# metrics of every request and parse made through this module
+telemetry = telemetry_util.ScrapeTelemetry()
+
+# archive_util.PageArchive every page fetched from the network is appended to,
+# None to keep no archive
+ARCHIVE = None
+
+# shared session and per host rate controllers used by fetch_page and
+# fetch_pages when no fetch function is given, created on first use so
+# connections and each host's learned rate carry over between calls
+_session = None
+_controllers = {}
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size=MAX_WORKERS):
+    """
+    Creates a requests Session that keeps connections alive and can hold
+    pool_size connections open per host
+
+    Parameters
+    ----------
+    pool_size : int, number of pooled connections per host
+
+    Returns
+    -------
+    session : requests.Session
+
+    """
+    session = requests.Session()
+    adapter = telemetry_util.timed_adapter(pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def current_season(today=None):
+    """
+    Returns the most recent NFL season that has started as of today.
+    A season is counted as started from August (training camp) onwards.
+    """
+    today = today or datetime.date.today()
+    return today.year if today.month >= 8 else today.year - 1
+
+
+def season_ttl(season):
+    """
+    Returns how long a page holding stats for season stays fresh.
+    None (never expires) for past seasons, CURRENT_SEASON_TTL otherwise.
+    """
+    if season is None:
+        return CURRENT_SEASON_TTL
+    return None if int(season) < current_season() else CURRENT_SEASON_TTL
+
+
+def url_ttl(url):
+    """
+    Returns how long the page at url stays fresh, based on the latest season
+    found in the url ("year_max=2015" or "/years/2015/").
+    Urls with no season in them expire like the current season.
+    """
+    years = re.findall(r"(?:year_max=|/years/)(\d{4})", url)
+    if not years:
+        return CURRENT_SEASON_TTL
+    return season_ttl(max(int(year) for year in years))
+
+
+class ResponseCache:
+    """
+    Stores response bodies on disk under directory, one gzip file per url,
+    named by the sha1 of the url (fragment removed).
+    
+    Each entry holds the url, when it was fetched, when it expires
+    (None for never) and the body. Reading an entry refreshes its
+    modification time, and once the total size of the cache goes above
+    max_bytes the least recently used entries are removed.
+    """
+
+    def __init__(self, directory, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(os.path.getsize(path) for path in self._entries())
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".gz"):
+                    yield os.path.join(root, name)
+
+    def path(self, url):
+        key = hashlib.sha1(urldefrag(url)[0].encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], key + ".gz")
+
+    def entry(self, url):
+        """
+        Returns the stored entry for url, expired or not, or None if missing
+        """
+        try:
+            with gzip.open(self.path(url), "rt", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get(self, url):
+        """
+        Returns the cached body for url, or None if it is missing or expired
+        """
+        path = self.path(url)
+        entry = self.entry(url)
+        if entry is None:
+            return None
+        if entry["expires"] is not None and entry["expires"] < time.time():
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["body"]
+
+    def put(self, url, body, ttl=None):
+        """
+        Stores body for url, expiring ttl seconds from now (None for never)
+        """
+        now = time.time()
+        entry = {"url": urldefrag(url)[0],
+                 "fetched": now,
+                 "expires": None if ttl is None else now + ttl,
+                 "body": body}
+        path = self.path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        #write to a temporary file first so readers never see half an entry
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump(entry, f)
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+            self._size += os.path.getsize(path) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def remove(self, url):
+        """
+        Removes the entry for url, if any, so the next fetch requests it
+        """
+        path = self.path(url)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            self._size -= size
+
+    def _evict(self):
+        #remove least recently used entries until 10% under the size cap
+        entries = sorted(self._entries(), key=os.path.getmtime)
+        target = self.max_bytes * 0.9
+        for path in entries:
+            if self._size <= target:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+
+def normalize_link(link, base=BASE_URL):
+    """
+    Returns link as a canonical absolute url, so the same page found through
+    different listings (or runs) is recognised as the same page:
+    relative links are joined to base, the scheme is https, the host is
+    lower case and the fragment is dropped.
+    Returns None for missing links.
+    """
+    if not isinstance(link, str) or not link.strip():
+        return None
+    parts = urlsplit(urljoin(base, link.strip()))
+    return urlunsplit(("https", parts.netloc.lower(), parts.path,
+                       parts.query, ""))
+
+
+def replay_url(url, server):
+    """
+    Returns the url on a replay server that serves the page recorded for url:
+    http://server/<scheme>/<host>/<path>?<query>
+    """
+    parts = urlsplit(url)
+    replayed = f"{server.rstrip('/')}/{parts.scheme}/{parts.netloc}{parts.path}"
+    return replayed + (f"?{parts.query}" if parts.query else "")
+
+
+def http_get(session, url):
+    """
+    Requests url over session, from the replay server when REPLAY_SERVER
+    is set, and returns the page text. Raises on http errors.
+    The request's latency, size and status are recorded in telemetry.
+    """
+    if REPLAY_SERVER is not None:
+        url = replay_url(urldefrag(url)[0], REPLAY_SERVER)
+    telemetry_util.reset_connection_timings()
+    start = time.perf_counter()
+    try:
+        response = session.get(url)
+        body = response.content
+    except requests.RequestException:
+        dns, connect = telemetry_util.connection_timings()
+        telemetry.record_request(0, dns=dns, connect=connect,
+                                 total=time.perf_counter() - start,
+                                 retries=telemetry_util.current_attempt())
+        raise
+    dns, connect = telemetry_util.connection_timings()
+    #elapsed runs from the start of the request to the response headers,
+    #including the setup of a new connection, which is recorded on its own
+    ttfb = max(0.0, response.elapsed.total_seconds() - dns - connect)
+    telemetry.record_request(response.status_code, dns=dns, connect=connect,
+                             ttfb=ttfb,
+                             total=time.perf_counter() - start,
+                             nbytes=len(body),
+                             retries=telemetry_util.current_attempt())
+    response.raise_for_status()
+    return response.text
+
+
+def shared_session():
+    """
+    Returns the module's keep-alive session, creating it on first use
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = get_session()
+        return _session
+
+
+def host_controllers(per_host=PER_HOST):
+    """
+    Returns the module's HostControllers allowing per_host requests in
+    flight per host, creating it on first use
+    """
+    with _session_lock:
+        if per_host not in _controllers:
+            _controllers[per_host] = HostControllers(per_host)
+        return _controllers[per_host]
+
+
+def close_session():
+    """
+    Closes the shared session and forgets every host's rate controller.
+    Call at the end of a crawl, the next request opens a new session.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _controllers.clear()
+
+
+def _default_fetch(url):
+    return http_get(shared_session(), url)
+
+
+def fetch_page(url, fetch=None, cache=None, ttl="auto"):
+    """
+    Fetches a single url, returning the cached page when cache holds a
+    fresh copy, and storing the page in cache otherwise
+    
+    Parameters
+    ----------
+    url : url string
+    fetch : function taking a url and returning page text.
+            The default is a GET over a shared keep-alive session.
+    cache : ResponseCache. The default is None (no caching).
+    ttl : seconds the fetched page stays fresh, None for never.
+          The default "auto" derives it from the url with url_ttl.
+
+    Returns
+    -------
+    page : string
+
+    """
+    if cache is not None:
+        page = cache.get(url)
+        if page is not None:
+            telemetry.count("cache_hits")
+            return page
+    page = (fetch or _default_fetch)(url)
+    if ARCHIVE is not None:
+        ARCHIVE.append(urldefrag(url)[0], page)
+    if cache is not None:
+        cache.put(url, page, url_ttl(url) if ttl == "auto" else ttl)
+    return page
+
+
+class RateController:
+    """
+    Adapts the number of requests in flight to one host with additive
+    increase / multiplicative decrease (AIMD), the way TCP adapts its window.
+    
+    The limit starts at min_concurrency and grows by one request per window
+    of healthy responses (faster than latency_target), up to max_concurrency.
+    It is halved whenever a response is slow, throttled (429/503) or fails.
+    A throttled response with a Retry-After header also pauses every request
+    to the host until it has passed.
+    """
+
+    def __init__(self, max_concurrency=PER_HOST, min_concurrency=1,
+                 latency_target=None):
+        self.max_concurrency = max(max_concurrency, min_concurrency)
+        self.min_concurrency = min_concurrency
+        self.latency_target = LATENCY_TARGET if latency_target is None else latency_target
+        self.limit = float(min_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Waits until the host is not paused and a request slot is free
+        """
+        with self._condition:
+            while True:
+                wait = self.paused_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _decrease(self):
+        self.limit = max(self.min_concurrency, self.limit * DECREASE_FACTOR)
+
+    def success(self, latency):
+        with self._condition:
+            if latency <= self.latency_target:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            else:
+                self._decrease()
+            self._condition.notify_all()
+
+    def throttled(self, retry_after=None):
+        with self._condition:
+            self._decrease()
+            if retry_after:
+                self.paused_until = max(self.paused_until,
+                                        time.monotonic() + retry_after)
+            self._condition.notify_all()
+
+    def failed(self):
+        with self._condition:
+            self._decrease()
+
+
+class HostControllers:
+    """
+    One RateController per host, created the first time the host is seen
+    """
+
+    def __init__(self, per_host=PER_HOST):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._controllers = {}
+
+    def get(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._controllers:
+                self._controllers[host] = RateController(self.per_host)
+            return self._controllers[host]
+
+
+def parse_retry_after(value):
+    """
+    Returns the seconds to wait from a Retry-After header, given either as
+    seconds or as an http date. None if missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def error_status(error):
+    """
+    Returns (http status, Retry-After seconds) of a failed request,
+    status 0 when no response was received
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return 0, None
+    return (response.status_code,
+            parse_retry_after(response.headers.get("Retry-After")))
+
+
+def is_retryable(status):
+    #connection errors, throttling and server errors are worth retrying
+    return status == 0 or status == 429 or status >= 500
+
+
+def backoff(attempt, retry_after=None):
+    """
+    Returns the seconds to wait before retry number attempt + 1:
+    the Retry-After time when the site sent one, otherwise exponential
+    backoff with full jitter, capped at BACKOFF_CAP
+    """
+    if retry_after is not None:
+        return retry_after + random.uniform(0, BACKOFF_BASE)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def fetch_pages(urls, fetch=None, max_workers=MAX_WORKERS, per_host=PER_HOST,
+                delay=None, cache=None, ttls=None, callback=None,
+                max_retries=MAX_RETRIES, session=None, controllers=None):
+    """
+    Fetches every url in urls with at most max_workers requests in flight.
+    Requests to each host are paced by a RateController, which raises the
+    number in flight (up to per_host) while the host responds quickly, and
+    cuts it when responses slow down or get throttled.
+    Failed requests are retried with jittered exponential backoff, or after
+    the Retry-After time the host asked for.
+    Pages are returned in the same order as urls.
+
+    Parameters
+    ----------
+    urls : list of url strings
+    fetch : function taking a url and returning page text.
+            The default is a GET over a shared keep-alive session.
+    max_workers : int, number of requests in flight. The default is 8.
+                  Set to 1 to fetch sequentially.
+    per_host : int, most requests in flight per host. The default is 2.
+    delay : float, seconds to hold a host slot after each request.
+            The default is POLITE_DELAY (0.5).
+    max_retries : int, retries of a request that failed with a connection
+                  error, 429 or 5xx. The default is 4.
+    cache : ResponseCache. Pages found fresh in the cache are returned
+            without a request. The default is None (no caching).
+    ttls : list of seconds each fetched page stays fresh (None for never),
+           in the same order as urls. The default derives them from the urls.
+    callback : function called with (position in urls, page) as soon as
+               each page arrives. The default is None.
+    session : requests.Session used when fetch is None. The default is
+              the shared session (see close_session).
+    controllers : HostControllers pacing each host. The default is the
+                  shared one for per_host, so later calls start from the
+                  rate each host was last found to handle.
+
+    Returns
+    -------
+    pages : list of page text, None where the request failed
+
+    """
+    urls = list(urls)
+    ttls = ["auto"] * len(urls) if ttls is None else list(ttls)
+    if fetch is None:
+        session = session or shared_session()
+
+        def fetch(url):
+            return http_get(session, url)
+
+    delay = POLITE_DELAY if delay is None else delay
+    controllers = controllers or host_controllers(per_host)
+
+    def polite_fetch(url):
+        controller = controllers.get(url)
+        for attempt in range(max_retries + 1):
+            controller.acquire()
+            start = time.perf_counter()
+            try:
+                telemetry_util.set_attempt(attempt)
+                page = fetch(url)
+            except Exception as e:
+                status, retry_after = error_status(e)
+                if status in (429, 503):
+                    controller.throttled(retry_after)
+                elif status == 0 or status >= 500:
+                    #timeouts, connection errors and server errors mean the
+                    #host is struggling, a 404 or other client error doesn't
+                    controller.failed()
+                if attempt == max_retries or not is_retryable(status):
+                    raise
+            else:
+                controller.success(time.perf_counter() - start)
+                return page
+            finally:
+                time.sleep(delay)
+                controller.release()
+            
+            #wait outside of the request slot before retrying
+            time.sleep(backoff(attempt, retry_after))
+
+    def cached_fetch(position, url, ttl):
+        try:
+            page = fetch_page(url, fetch=polite_fetch, cache=cache, ttl=ttl)
+        except Exception:
+            telemetry.count("fetch_failures")
+            page = None
+        if callback is not None:
+            callback(position, page)
+        return page
+
+    positions = range(len(urls))
+    if max_workers <= 1:
+        return [cached_fetch(*args) for args in zip(positions, urls, ttls)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(cached_fetch, positions, urls, ttls))
+
+
+class CrawlManifest:
+    """
+    Keeps the status of every url crawled, so a crawl that dies part way
+    through can be restarted and only fetch the urls still outstanding.
+    
+    Records are appended to a json lines file at path as soon as each url
+    is parsed, one line per record:
+        {"url": ..., "status": "ok" | "failed" | "pending",
+         "timestamp": ..., "rows": [...], "error": ..., "next": ...,
+         "fetched": ..., "ttl": ...}
+    When a url appears more than once, the last record wins.
+    A url stays done for ttl seconds after its page was fetched (forever
+    when ttl is None, as for past seasons), then it is outstanding again,
+    the same expiry as its page in a ResponseCache.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        #last line of a crawl that died mid write
+                        continue
+                    self._records[record["url"]] = record
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    @staticmethod
+    def key(url):
+        return urldefrag(url)[0]
+
+    def get(self, url):
+        return self._records.get(self.key(url))
+
+    def is_done(self, url, now=None):
+        """
+        Returns True if url was crawled successfully and hasn't expired
+        """
+        record = self.get(url)
+        if record is None or record["status"] != "ok":
+            return False
+        ttl = record.get("ttl")
+        if ttl is None:
+            return True
+        fetched = record.get("fetched", record["timestamp"])
+        return fetched + ttl > (time.time() if now is None else now)
+
+    def rows(self, url):
+        record = self.get(url)
+        return record["rows"] if record is not None else []
+
+    def record(self, url, status, rows=None, error=None, next_url=None,
+               ttl=None, fetched=None):
+        """
+        Appends a record for url and flushes it to disk.
+        next_url is the following page of a paginated listing, if any.
+        ttl is the seconds the rows stay fresh from fetched (the time the
+        page was fetched, the default is now), None for never.
+        """
+        now = time.time()
+        record = {"url": self.key(url),
+                  "status": status,
+                  "timestamp": now,
+                  "rows": rows if rows is not None else [],
+                  "error": error,
+                  "next": next_url,
+                  "fetched": now if fetched is None else fetched,
+                  "ttl": ttl}
+        with self._lock:
+            self._records[record["url"]] = record
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def reset(self, urls):
+        """
+        Marks urls as pending, so the next crawl fetches them again.
+        Used to re-crawl part of the data, e.g. a single draft year.
+        """
+        for url in urls:
+            self.record(url, "pending")
+
+    def outstanding(self, urls):
+        """
+        Returns the urls in urls that have not been crawled successfully
+        """
+        return [url for url in urls if not self.is_done(url)]
+
+    def compact(self):
+        """
+        Rewrites the file with only the latest record of each url
+        """
+        with self._lock:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for record in self._records.values():
+                    f.write(json.dumps(record) + "\n")
+            os.replace(temp_path, self.path)
+
+
+def crawl(urls, parse, manifest=None, ttls=None, **fetch_kwargs):
+    """
+    Fetches and parses every url in urls, returning the parsed rows of each.
+    With a manifest, urls already crawled successfully (and not expired)
+    are not fetched again and their rows are read from the manifest
+    instead, and each new result is recorded in the manifest as soon as it
+    is parsed, with the ttl of its page.
+    
+    Parameters
+    ----------
+    urls : list of url strings
+    parse : function taking page text and its url, and returning a list of
+            rows, each row a list of json serializable values
+    manifest : CrawlManifest. The default is None.
+    ttls : list of seconds each fetched page stays fresh, see fetch_pages
+    **fetch_kwargs : passed on to fetch_pages
+
+    Returns
+    -------
+    results : list of lists of rows, in the same order as urls.
+              Urls that failed to fetch or parse have no rows.
+
+    """
+    urls = list(urls)
+    ttls = ["auto"] * len(urls) if ttls is None else list(ttls)
+    results = [[] for _ in urls]
+    
+    outstanding = []
+    for position, url in enumerate(urls):
+        if manifest is not None and manifest.is_done(url):
+            results[position] = manifest.rows(url)
+        else:
+            outstanding.append(position)
+    
+    def on_page(outstanding_position, page):
+        position = outstanding[outstanding_position]
+        url = urls[position]
+        status, rows, error = "ok", [], None
+        if page is None:
+            status, error = "failed", "request failed"
+        else:
+            start = time.perf_counter()
+            try:
+                rows = parse(page, url)
+            except Exception as e:
+                status, error = "failed", repr(e)
+            telemetry.record_parse(time.perf_counter() - start, len(rows),
+                                   error)
+        results[position] = rows
+        if manifest is not None:
+            ttl = url_ttl(url) if ttls[position] == "auto" else ttls[position]
+            manifest.record(url, status, rows, error, ttl=ttl)
+    
+    fetch_pages([urls[position] for position in outstanding],
+                ttls=[ttls[position] for position in outstanding],
+                callback=on_page, **fetch_kwargs)
+    return results
+
+
+def crawl_listing(url, parse, manifest=None, max_pages=MAX_LISTING_PAGES,
+                  **fetch_kwargs):
+    """
+    Fetches and parses every page of a paginated listing, starting from url
+    and following each page's "Next Page" link until there is none.
+    With a manifest, pages already crawled and not expired are read from it
+    (along with the link to their next page) instead of fetched, and each
+    new page is recorded as soon as it is parsed, expiring like its page
+    in the cache (see url_ttl).
+    
+    Parameters
+    ----------
+    url : url string of the first page
+    parse : function taking page text and its url, and returning a list of
+            rows, each row a list of json serializable values
+    manifest : CrawlManifest. The default is None.
+    max_pages : int, most pages followed. The default is 100.
+    **fetch_kwargs : passed on to fetch_pages
+
+    Returns
+    -------
+    results : list of lists of rows, one per page, in listing order
+
+    """
+    results = []
+    while url is not None and len(results) < max_pages:
+        if manifest is not None and manifest.is_done(url):
+            record = manifest.get(url)
+            results.append(record["rows"])
+            url = record.get("next")
+            continue
+        
+        page = fetch_pages([url], max_workers=1, **fetch_kwargs)[0]
+        if page is None:
+            if manifest is not None:
+                manifest.record(url, "failed", error="request failed")
+            break
+        
+        start = time.perf_counter()
+        rows, error = [], None
+        try:
+            rows = parse(page, url)
+        except Exception as e:
+            error = e
+        telemetry.record_parse(time.perf_counter() - start, len(rows), error)
+        if error is not None:
+            if manifest is not None:
+                manifest.record(url, "failed", error=repr(error))
+            break
+        
+        next_url = table_util.find_next_page(page, url)
+        if manifest is not None:
+            manifest.record(url, "ok", rows, next_url=next_url, ttl=url_ttl(url))
+        results.append(rows)
+        url = next_url
+    return results
+
+
+class RecordBuilder:
+    """
+    Collects rows into one list per column, then builds a single DataFrame
+    with the declared schema at the end. Appending a row never copies the
+    rows collected so far, so building grows linearly with the number of
+    rows, unlike calling pd.concat once per player or year.
+    
+    Parameters
+    ----------
+    schema : dictionary of column name : dtype, in column order
+    """
+
+    def __init__(self, schema):
+        self.schema = dict(schema)
+        self._columns = {column: [] for column in self.schema}
+        self._index = []
+
+    def __len__(self):
+        return len(self._index)
+
+    def append(self, row, index=None):
+        """
+        Adds one row, a list of values in schema order.
+        index is the row's index label, the default is its position.
+        """
+        if len(row) != len(self.schema):
+            raise ValueError(f"expected {len(self.schema)} values, got {len(row)}")
+        for values, value in zip(self._columns.values(), row):
+            values.append(value)
+        self._index.append(len(self._index) if index is None else index)
+
+    def extend(self, rows, index=None):
+        """
+        Adds every row in rows, with index labels from the list index
+        """
+        for position, row in enumerate(rows):
+            self.append(row, None if index is None else index[position])
+
+    def to_frame(self):
+        """
+        Returns the collected rows as a DataFrame with the declared dtypes
+        """
+        data = {column: pd.array(values, dtype=dtype)
+                for (column, dtype), values
+                in zip(self.schema.items(), self._columns.values())}
+        return pd.DataFrame(data, index=pd.Index(self._index, dtype=object),
+                            columns=list(self.schema))
+
+
+class CrawlFrontier:
+    """
+    Collects the player pages to crawl from any number of listing
+    DataFrames (e.g. draft and combine results), normalizing links with
+    normalize_link and keeping each page once, so every player page is
+    fetched and parsed exactly once per run.
+    The first listing a page is found in gives its player name and year.
+    
+    Parameters
+    ----------
+    manifest : CrawlManifest of past runs, used by outstanding().
+               The default is None.
+    """
+
+    def __init__(self, manifest=None):
+        self.manifest = manifest
+        self._pages = {}
+
+    def add(self, df, source):
+        """
+        Adds every nfl_link and college_link in df, a DataFrame containing
+        "player", "year" and either or both link columns.
+        source names the listing, e.g. "draft" or "combine".
+        """
+        for link_column in ("nfl_link", "college_link"):
+            if link_column not in df.columns:
+                continue
+            pages = self._pages.setdefault(link_column, {})
+            for player, year, link in zip(df["player"], df["year"],
+                                          df[link_column]):
+                url = normalize_link(link)
+                if url is None or not isinstance(player, str):
+                    continue
+                if url in pages:
+                    pages[url]["sources"].add(source)
+                else:
+                    pages[url] = {"player": player, "year": year,
+                                  "sources": {source}}
+
+    def urls(self, link_column):
+        return list(self._pages.get(link_column, {}))
+
+    def outstanding(self, link_column):
+        """
+        Returns the urls not yet crawled successfully in a past run
+        """
+        urls = self.urls(link_column)
+        if self.manifest is None:
+            return urls
+        return self.manifest.outstanding(urls)
+
+    def frame(self, link_column):
+        """
+        Returns the pages of link_column as a DataFrame indexed by player
+        name, with "player", link_column, "year" and "sources" series,
+        ready for scrape_nfl.scrape_nfl_data or scrape_college_data
+        """
+        pages = self._pages.get(link_column, {})
+        records = RecordBuilder({"player": "object", link_column: "object",
+                                 "year": "object", "sources": "object"})
+        for url, page in pages.items():
+            records.append([page["player"], url, page["year"],
+                            ",".join(sorted(page["sources"]))],
+                           index=page["player"])
+        return records.to_frame()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contains functions used by train_regression.py to search feature sets and
+Ridge lambdas, instead of scoring hand-picked models one at a time.
+
+Candidate feature sets are built from the columns of the cleaned table
+(see preprocessing.py) and the derived terms in DERIVED. Each (feature set,
+seed) is scored over every lambda at once with regression_util.cv_path, on
+a pool of worker processes. Scores are kept in a SQLite file keyed by
+(data hash, features, alpha, seed, folds), written as each task finishes,
+so a repeated search, or one that was interrupted, only scores the
+combinations it hasn't seen. The data hash only covers the target and the
+columns of the feature set, so widening the pool keeps every score.
+
+DERIVED - terms computed from the cleaned columns, e.g. pick_2
+feature_frame - cleaned columns and derived terms of a DataFrame
+candidate_sets - every feature set of a pool of features
+data_hash - hash of the data a feature set is scored on
+ResultCache - scores of feature sets already searched
+search - cross validated scores of every feature set, lambda and seed
+summarize - mean scores of each feature set and lambda over seeds
+
+@author: markafunke
+"""
+import itertools
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import pipeline_util
+import regression_util as rg
+
+# name : function of the cleaned DataFrame returning the term
+DERIVED = {"pick_2": lambda df: df["pick"] ** 2,
+           "log_pick": lambda df: np.log(df["pick"]),
+           "early_Rd1": lambda df: df["left_early"] * (df["rnd"] == 1)}
+
+# the search cache, next to the pipeline cache of preprocessing.py
+CACHE_PATH = os.path.join("cache", "search.db")
+
+# set in each worker process by _init_worker
+_X = None
+_y = None
+
+
+def feature_frame(df, features):
+    """
+    Returns a float DataFrame of features, taking each from df when it's
+    a column of df and computing it with DERIVED otherwise
+    """
+    data = {}
+    for feature in features:
+        if feature in df.columns:
+            data[feature] = df[feature]
+        elif feature in DERIVED:
+            data[feature] = DERIVED[feature](df)
+        else:
+            raise KeyError(f"{feature} is neither a column nor a DERIVED term")
+    return pd.DataFrame(data, index=df.index).astype("float64")
+
+
+def candidate_sets(pool, required=(), max_size=None):
+    """
+    Returns every feature set of the features in pool, each containing
+    the required features and at most max_size features
+
+    Parameters
+    ----------
+    pool : list of optional features
+    required : list of features in every set. The default is ().
+    max_size : Integer largest set size. The default is no limit.
+
+    Returns
+    -------
+    list of tuples of features, required features first
+
+    """
+    optional = [feature for feature in pool if feature not in required]
+    max_size = len(required) + len(optional) if max_size is None else max_size
+    sets = []
+    for size in range(max(len(required), 1), max_size + 1):
+        for chosen in itertools.combinations(optional, size - len(required)):
+            sets.append(tuple(required) + chosen)
+    return sets
+
+
+def _features_key(features):
+    return ",".join(sorted(features))
+
+
+class ResultCache:
+    """
+    Validation scores of (data hash, features, alpha, seed, folds),
+    stored in a SQLite file at path
+    """
+
+    def __init__(self, path=CACHE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS scores (
+                                 data_hash TEXT, features TEXT, alpha REAL,
+                                 seed INTEGER, folds INTEGER,
+                                 r2 REAL, rmse REAL,
+                                 PRIMARY KEY (data_hash, features, alpha, seed, folds))""")
+
+    def missing(self, data_hash, features, alphas, seed, folds):
+        """
+        Returns the alphas not yet scored for features and seed
+        """
+        rows = self.conn.execute("""SELECT alpha FROM scores WHERE data_hash = ?
+                                    AND features = ? AND seed = ? AND folds = ?""",
+                                 (data_hash, _features_key(features), seed, folds))
+        done = set(alpha for (alpha,) in rows)
+        return [alpha for alpha in alphas if float(alpha) not in done]
+
+    def add(self, data_hash, features, seed, folds, scores):
+        """
+        Stores scores, a DataFrame of "alpha", "r2" and "rmse"
+        """
+        self.conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?)",
+                              [(data_hash, _features_key(features), float(alpha),
+                                seed, folds, float(r2), float(rmse))
+                               for alpha, r2, rmse in scores[["alpha", "r2", "rmse"]].values])
+        self.conn.commit()
+
+    def read(self, data_hash, features, folds):
+        """
+        Returns every score of data_hash, features and folds as a DataFrame
+        """
+        return pd.read_sql_query("""SELECT features, alpha, seed, r2, rmse FROM scores
+                                    WHERE data_hash = ? AND features = ? AND folds = ?""",
+                                 self.conn, params=(data_hash, _features_key(features), folds))
+
+    def close(self):
+        self.conn.close()
+
+
+def data_hash(X, y, features):
+    """
+    Returns the hash of the columns of X a feature set uses and of y, so
+    adding or changing other columns keeps its cached scores
+    """
+    return pipeline_util.content_hash([X[sorted(features)], y])
+
+
+def _init_worker(X, y):
+    global _X, _y
+    _X, _y = X, y
+
+
+def _score(features, alphas, seed, folds):
+    #mean validation scores over the folds of one seed, for every alpha
+    path = rg.cv_path(_X[list(features)], _y, alphas=alphas, seeds=[seed],
+                      n_splits=folds)
+    return path.groupby("alpha", as_index=False)[["r2", "rmse"]].mean()
+
+
+def search(df, target, candidates, alphas=(0,), seeds=(22,), folds=5,
+           workers=None, cache_path=CACHE_PATH, verbose=True):
+    """
+    Scores every candidate feature set with every alpha and seed, on a pool
+    of worker processes, skipping the combinations already in the cache
+
+    Parameters
+    ----------
+    df : DataFrame of the cleaned columns, with no missing values in the
+         columns the candidates use
+    target : Series of the target variable, e.g. cube root of yards
+    candidates : list of feature sets, e.g. from candidate_sets
+    alphas : list of Ridge lambdas, 0 is Linear Regression.
+             The default is (0,).
+    seeds : list of integer random states of the folds. The default is (22,).
+    folds : Integer number of folds. The default is 5.
+    workers : Integer number of worker processes.
+              The default is every core.
+    cache_path : string, path of the cache file. The default is CACHE_PATH.
+    verbose : bool, print how many tasks were cached. The default is True.
+
+    Returns
+    -------
+    DataFrame of "features", "alpha", "seed", mean validation "r2" and
+    "rmse" (yards) of every candidate, alpha and seed
+
+    """
+    features = sorted(set(itertools.chain.from_iterable(candidates)))
+    X = feature_frame(df, features)
+    if X.isna().any().any():
+        raise ValueError(f"missing values in {list(X.columns[X.isna().any()])}")
+    y = pd.Series(np.asarray(target, dtype="float64"), index=X.index)
+    hashes = {candidate: data_hash(X, y, candidate) for candidate in candidates}
+
+    cache = ResultCache(cache_path)
+    tasks = []
+    for candidate in candidates:
+        for seed in seeds:
+            missing = cache.missing(hashes[candidate], candidate, alphas, seed, folds)
+            if missing:
+                tasks.append((candidate, missing, seed))
+    if verbose:
+        print(f"{len(tasks)} of {len(candidates) * len(seeds)} "
+              f"feature set and seed tasks to score")
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(X, y)) as executor:
+            futures = {executor.submit(_score, candidate, missing, seed, folds):
+                       (candidate, seed) for candidate, missing, seed in tasks}
+            for future in as_completed(futures):
+                candidate, seed = futures[future]
+                cache.add(hashes[candidate], candidate, seed, folds, future.result())
+
+    scores = pd.concat([cache.read(hashes[candidate], candidate, folds)
+                        for candidate in candidates], ignore_index=True)
+    cache.close()
+    wanted = pd.MultiIndex.from_product([[_features_key(c) for c in candidates],
+                                         [float(alpha) for alpha in alphas],
+                                         list(seeds)])
+    scores = scores.set_index(["features", "alpha", "seed"])
+    return scores[scores.index.isin(wanted)].reset_index()
+
+
+def summarize(results):
+    """
+    Returns the mean and standard deviation over seeds of the validation
+    R2 and RMSE of each feature set and alpha, best R2 first
+    """
+    summary = results.groupby(["features", "alpha"])[["r2", "rmse"]].agg(["mean", "std"])
+    return summary.sort_values(("r2", "mean"), ascending=False)
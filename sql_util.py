@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contains functions used to keep the scraped draft, combine, college, nfl
+and team tables in a single SQLite database file, indexed on the keys
+preprocessing.py joins them on, with a cleaned_features view computing the
+same features as its clean stage, so joins and aggregates can be run on
+the data without loading it into pandas.
+
+Tables:
+    draft (with player_key, player_clean and franchise), combine, college, nfl,
+    team (with franchise, and team_abbrev and year_merge, the season it is
+    a feature for), combine_match (draft row : combine row, see match_util.py)
+Indexes:
+    nfl_link, college_link, (player_clean, year), (franchise, year),
+    (team_abbrev, year_merge)
+Views:
+    cleaned_features, one row per player with the columns of the cleaned
+    frame of preprocessing.py
+
+Every connection made by connect has a median() aggregate, e.g.:
+    python sql_util.py data/players.db "SELECT rnd, conf,
+        median(rookie_rec_yards) FROM cleaned_features GROUP BY rnd, conf"
+
+write_database - replace the tables of a database with scraped DataFrames
+connect - open a database, with median() registered
+query - run a query and return its rows as a DataFrame
+
+@author: markafunke
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+
+import pandas as pd
+
+import clean_util
+import franchise_util
+import match_util
+import store_util
+
+INDEXES = {"draft_nfl_link": ("draft", ["nfl_link"]),
+           "draft_college_link": ("draft", ["college_link"]),
+           "draft_player_year": ("draft", ["player_clean", "year"]),
+           "combine_nfl_link": ("combine", ["nfl_link"]),
+           "combine_college_link": ("combine", ["college_link"]),
+           "combine_player_year": ("combine", ["player", "year"]),
+           "nfl_nfl_link": ("nfl", ["nfl_link"]),
+           "college_college_link": ("college", ["college_link"]),
+           "team_franchise_year": ("team", ["franchise", "year"]),
+           "team_abbrev_year": ("team", ["team_abbrev", "year_merge"]),
+           "combine_match_draft": ("combine_match", ["draft_row"])}
+
+POWER_5 = ", ".join(f"'{conf}'" for conf in clean_util.POWER_5_CONF)
+UNDERCLASSMEN = ", ".join(f"'{col_class}'" for col_class in clean_util.UNDERCLASSMEN)
+
+# the clean stage of preprocessing.py, over the joins of its merge stage:
+# the first row of each player page (his rookie season), the last row of
+# each college page, and his franchise's passing yards over the 3 seasons
+# before his draft
+CLEANED_FEATURES = f"""
+CREATE VIEW cleaned_features AS
+WITH rookie AS (
+    SELECT nfl_link, rookie_rec_yards FROM nfl
+    WHERE rowid IN (SELECT MIN(rowid) FROM nfl GROUP BY nfl_link)
+), final_season AS (
+    SELECT * FROM college
+    WHERE rowid IN (SELECT MAX(rowid) FROM college GROUP BY college_link)
+), joined AS (
+    SELECT d.player_key, d.player_clean, d.year, n.rookie_rec_yards, d.rnd, d.pick,
+           CASE WHEN c.conf = 'Pac-10' THEN 'Pac-12' ELSE c.conf END AS conf,
+           c.col_class, c.col_scrim_yds, c.col_rec_yds,
+           NULLIF(TRIM(cb.height), '') AS height, cb.weight, cb.time_40,
+           t1.total_yards, cb.vertical,
+           t2.total_yards AS total_yards_lag2, t3.total_yards AS total_yards_lag3
+    FROM draft AS d
+    LEFT JOIN rookie AS n ON n.nfl_link = d.nfl_link
+    LEFT JOIN final_season AS c ON c.college_link = d.college_link
+    LEFT JOIN combine_match AS m ON m.draft_row = d.rowid
+    LEFT JOIN combine AS cb ON cb.rowid = m.combine_row
+    LEFT JOIN team AS t1 ON t1.franchise = d.franchise AND t1.year = d.year - 1
+    LEFT JOIN team AS t2 ON t2.franchise = d.franchise AND t2.year = d.year - 2
+    LEFT JOIN team AS t3 ON t3.franchise = d.franchise AND t3.year = d.year - 3
+)
+SELECT player_key, player_clean, year, rookie_rec_yards, rnd, pick,
+       CASE WHEN conf IN ({POWER_5}) THEN conf ELSE 'Other' END AS conf,
+       col_scrim_yds, col_rec_yds,
+       CASE WHEN height GLOB '[0-9]*-*[0-9]*'
+            THEN CAST(SUBSTR(height, 1, INSTR(height, '-') - 1) AS REAL) * 12
+                 + CAST(TRIM(SUBSTR(height, INSTR(height, '-') + 1)) AS REAL)
+       END AS height,
+       weight, time_40, total_yards, vertical, total_yards_lag2, total_yards_lag3,
+       COALESCE(conf, '') IN ({POWER_5}) AS power_5,
+       COALESCE(conf, '') = 'SEC' AS isSEC,
+       COALESCE(rnd, 0) = 1 AS isRd1,
+       COALESCE(conf, '') = 'SEC' AND COALESCE(rnd, 0) = 1 AS SEC_Rd1,
+       COALESCE(col_class, '') IN ({UNDERCLASSMEN}) AS left_early
+FROM joined
+WHERE rookie_rec_yards IS NOT NULL
+"""
+
+class _Median:
+    #sqlite aggregate, NULLs are skipped like the other aggregates
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        return statistics.median(self.values) if self.values else None
+
+
+def connect(path):
+    """
+    Returns a connection to the database at path, with median() registered
+    """
+    conn = sqlite3.connect(path)
+    conn.create_aggregate("median", 1, _Median)
+    return conn
+
+
+def query(conn, sql, params=()):
+    """
+    Returns the rows of sql run on conn as a DataFrame
+    """
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def _table(df):
+    #categoricals are stored as their text
+    df = df.reset_index(drop=True)
+    for column in df.columns[df.dtypes == "category"]:
+        df[column] = df[column].astype(object)
+    return df
+
+
+def write_database(path, scraped):
+    """
+    Replaces the tables of the database at path with the scraped
+    DataFrames, and (re)creates its indexes and the cleaned_features view
+
+    Parameters
+    ----------
+    path : string, path of the database file, e.g. "data/players.db"
+    scraped : dictionary of "draft", "combine", "college", "nfl" and
+              "team" DataFrames, the output of the scrape stage of
+              preprocessing.py
+
+    Returns
+    -------
+    None.
+
+    """
+    draft = _table(scraped["draft"])
+    draft["player_key"] = store_util.player_keys(draft)
+    draft["player_clean"] = clean_util.clean_player_names(draft["player"])
+    draft["franchise"] = franchise_util.abbrev_franchises(draft["team"])
+    combine = _table(scraped["combine"])
+    team = _table(scraped["team"])
+    team["franchise"] = franchise_util.franchises(team["team"])
+    team["year_merge"] = team["year"] + 1
+    team["team_abbrev"] = franchise_util.team_abbrevs(team["team"], team["year_merge"])
+
+    # rowids are the positions of the rows, starting at 1
+    matches = match_util.resolve_players(draft, combine)
+    matched = matches["right_row"].values >= 0
+    combine_match = pd.DataFrame({"draft_row": draft.index[matched] + 1,
+                                  "combine_row": matches["right_row"].values[matched] + 1,
+                                  "method": matches["method"].values[matched]})
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with connect(path) as conn:
+        conn.execute("DROP VIEW IF EXISTS cleaned_features")
+        tables = {"draft": draft, "combine": combine, "team": team,
+                  "college": _table(scraped["college"]),
+                  "nfl": _table(scraped["nfl"]), "combine_match": combine_match}
+        for name, df in tables.items():
+            conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+            df.to_sql(name, conn, index=False)
+        for index, (table, columns) in INDEXES.items():
+            column_list = ", ".join(f'"{column}"' for column in columns)
+            conn.execute(f'CREATE INDEX "{index}" ON "{table}" ({column_list})')
+        conn.execute(CLEANED_FEATURES)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("database", help="database file, e.g. data/players.db")
+    parser.add_argument("sql", help="query to run")
+    args = parser.parse_args()
+
+    conn = connect(args.database)
+    with pd.option_context("display.max_rows", None, "display.width", None):
+        print(query(conn, args.sql))
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
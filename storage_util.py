@@ -0,0 +1,147 @@
+"""
+Contains functions used to store the DataFrames produced by preprocessing.py
+as Parquet datasets, replacing full-object pickles.
+
+Each table is written to <root>/<name>/, partitioned by draft year when
+the table has one, with explicit column types. Readers load only the
+columns and years they ask for, memory-mapping the files, so load time and
+memory grow with the query rather than with the dataset.
+
+write_table - write a DataFrame as a (partitioned) Parquet dataset,
+              replacing the whole table or only the partitions written
+drop_partitions - remove the partitions of some years of a table
+read_table - read selected columns and years of a stored table
+
+@author: markafunke
+"""
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# directory holding every stored table
+DATA_ROOT = "data"
+
+# arrow type partition directories are read back as, the type of the year
+# columns in schema_util.py. Left to inference, hive partitions come back
+# as dictionaries, which don't convert to the Int16 in the pandas metadata
+PARTITION_TYPE = pa.int16()
+
+
+def arrow_type(dtype):
+    """
+    Returns the arrow type a pandas column of dtype is stored as.
+    Object columns hold scraped text, so they're stored as strings.
+    """
+    if isinstance(dtype, pd.CategoricalDtype):
+        return pa.dictionary(pa.int32(), arrow_type(dtype.categories.dtype))
+    if pd.api.types.is_bool_dtype(dtype):
+        return pa.bool_()
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_float_dtype(dtype):
+        return pa.from_numpy_dtype(getattr(dtype, "numpy_dtype", dtype))
+    return pa.string()
+
+
+def arrow_schema(df):
+    """
+    Returns the explicit arrow schema df is stored with
+    """
+    return pa.schema([pa.field(str(column), arrow_type(dtype))
+                      for column, dtype in df.dtypes.items()])
+
+
+def table_path(name, root=None):
+    return os.path.join(root or DATA_ROOT, name)
+
+
+def write_table(df, name, partition_on="year", root=None, replace="all"):
+    """
+    Writes df as the Parquet dataset name. The index is not stored.
+
+    Parameters
+    ----------
+    df : DataFrame
+    name : string, name of the table, e.g. "cleaned"
+    partition_on : column to partition the files by, one directory per
+                   value. Ignored if df has no such column.
+                   The default is "year" (draft year).
+    root : string, directory of all tables. The default is DATA_ROOT.
+    replace : "all" to replace any previous version of the table,
+              "partitions" to only replace the partitions df has rows for,
+              keeping the rest. The default is "all".
+
+    Returns
+    -------
+    path : string, directory of the table
+
+    """
+    path = table_path(name, root)
+    partitioned = partition_on is not None and partition_on in df.columns
+    if replace == "partitions" and not partitioned:
+        raise ValueError(f"can't replace partitions of {name}, "
+                         f"it has no {partition_on} column")
+    if replace == "all" and os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path, exist_ok=True)
+
+    df = df.reset_index(drop=True)
+    for column, dtype in df.dtypes.items():
+        #scraped text columns may hold numbers next to strings and NaN
+        if arrow_type(dtype) == pa.string():
+            df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    table = pa.Table.from_pandas(df, schema=arrow_schema(df),
+                                 preserve_index=False)
+
+    if partitioned:
+        pq.write_to_dataset(table, path, partition_cols=[partition_on],
+                            existing_data_behavior="delete_matching")
+    else:
+        pq.write_table(table, os.path.join(path, "part-0.parquet"))
+    return path
+
+
+def drop_partitions(name, values, partition_on="year", root=None):
+    """
+    Removes the partitions of table name for values, e.g. draft years
+    no row is left for after an update
+    """
+    for value in values:
+        path = os.path.join(table_path(name, root), f"{partition_on}={value}")
+        if os.path.exists(path):
+            shutil.rmtree(path)
+
+
+def read_table(name, columns=None, years=None, root=None, year_column="year"):
+    """
+    Reads the Parquet dataset name, loading only columns and the partitions
+    of years, with the files memory-mapped
+
+    Parameters
+    ----------
+    name : string, name of the table, e.g. "cleaned"
+    columns : list of columns to load. The default is None (every column).
+    years : list of draft years to load. The default is None (every year).
+    root : string, directory of all tables. The default is DATA_ROOT.
+    year_column : string, partition column years refers to.
+                  The default is "year".
+
+    Returns
+    -------
+    df : DataFrame. Partition directories are read back as PARTITION_TYPE
+         integers, whatever the type of the column written.
+
+    """
+    path = table_path(name, root)
+    partitioning = None
+    if any(entry.startswith(f"{year_column}=") for entry in os.listdir(path)):
+        partitioning = ds.partitioning(pa.schema([(year_column, PARTITION_TYPE)]),
+                                       flavor="hive")
+    filters = None
+    if years is not None:
+        filters = [(year_column, "in", [int(year) for year in years])]
+    table = pq.read_table(path, columns=columns, filters=filters,
+                          partitioning=partitioning, memory_map=True)
+    return table.to_pandas()
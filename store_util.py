@@ -0,0 +1,111 @@
+"""
+Contains PlayerStore, the persistent table of every player preprocessing.py
+has merged, with his cleaned features, kept as Parquet tables partitioned
+by draft year (see storage_util.py).
+
+Each player is keyed by player_keys: his nfl_link, else his college_link,
+else his normalized name and draft year. Upserting the rows of a single
+draft class only reads and rewrites the partitions of that class, so
+adding the 2021 class, or refreshing it through its rookie season as its
+stats change, costs as much as the new players instead of the whole history.
+
+player_keys - key of every player in a DataFrame
+PlayerStore - upsert and read keyed player tables
+
+@author: markafunke
+"""
+import os
+
+import pandas as pd
+
+import match_util
+import schema_util
+import storage_util
+
+
+def player_keys(df):
+    """
+    Returns the key of every row of df, a DataFrame containing "player"
+    and "year", and optionally "nfl_link" and "college_link":
+    nfl_link, else college_link, else "<normalized name>|<year>"
+    """
+    names = df["player"].map(match_util.normalize_name)
+    name_keys = names + "|" + df["year"].astype("string").fillna("")
+    keys = pd.Series(pd.NA, index=df.index, dtype=object)
+    for link_column in ("nfl_link", "college_link"):
+        if link_column in df.columns:
+            keys = keys.fillna(df[link_column])
+    return keys.fillna(name_keys).astype(object)
+
+
+class PlayerStore:
+    """
+    Tables of player rows keyed by a "player_key" column and partitioned
+    by draft year ("year"), stored in root
+
+    Parameters
+    ----------
+    root : string, directory of the tables.
+           The default is storage_util.DATA_ROOT.
+    """
+
+    def __init__(self, root=None):
+        self.root = root
+
+    def exists(self, name):
+        return os.path.exists(storage_util.table_path(name, self.root))
+
+    def read(self, name, columns=None, years=None):
+        """
+        Returns the rows of table name, loading only columns and years
+        (see storage_util.read_table)
+        """
+        return storage_util.read_table(name, columns=columns, years=years,
+                                       root=self.root)
+
+    def upsert(self, name, df, schema=None, keys=None):
+        """
+        Replaces the rows of table name whose player_key is in keys with
+        the rows of df, and adds the rows of new players. Only the draft
+        years in df are read and rewritten.
+
+        Parameters
+        ----------
+        name : string, name of the table, e.g. "players"
+        df : DataFrame containing "player_key" and "year"
+        schema : dictionary of column : dtype the table is stored with
+                 (see schema_util.py). The default is None.
+        keys : player_keys whose previous rows are removed, e.g. every
+               player refreshed, even those df no longer has a row for.
+               The default is None (the keys in df).
+
+        Returns
+        -------
+        counts : dictionary with the number of rows "updated" and "added"
+
+        """
+        df = df.drop_duplicates("player_key", keep="last")
+        keys = set(df["player_key"] if keys is None else keys)
+        years = sorted(int(year) for year in df["year"].dropna().unique())
+
+        existing = None
+        if self.exists(name) and years:
+            existing = self.read(name, years=years)
+        if existing is None or existing.empty:
+            rows, updated = df, 0
+        else:
+            replaced = existing["player_key"].isin(keys)
+            updated = int(existing["player_key"].isin(df["player_key"]).sum())
+            rows = pd.concat([existing[~replaced], df], ignore_index=True)
+        if schema is not None:
+            rows = schema_util.coerce(rows, schema)
+
+        if not rows.empty:
+            storage_util.write_table(rows, name, root=self.root,
+                                     replace="partitions")
+        #years every row was removed from keep no stale partition
+        written = set(int(year) for year in rows["year"].dropna().unique())
+        storage_util.drop_partitions(name, [year for year in years
+                                            if year not in written],
+                                     root=self.root)
+        return {"updated": updated, "added": len(df) - updated}
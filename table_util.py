@@ -0,0 +1,138 @@
+"""
+Contains functions used by scrape_nfl.py to pull stat tables out of
+pro football reference and sports reference pages.
+
+Instead of building a BeautifulSoup tree of the whole page, only the html of
+the target table is sliced out of the page (whether or not it is inside an
+html comment) and parsed with lxml. Cells are read by their "data-stat"
+attribute rather than by position, and repeated header rows are skipped by
+structure rather than by fixed row numbers.
+
+find_table_html - slice the html of a single table out of a page
+parse_table - parse a table into a list of {data-stat: text} dictionaries
+find_next_page - find the url of the next page of a paginated listing
+
+@author: markafunke
+"""
+import html
+import re
+from urllib.parse import urljoin
+
+import lxml.html
+
+#an html comment (to its end, or the end of the page), or the start of a table
+COMMENT_OR_TABLE = re.compile(r"<!--.*?(?:-->|$)|<table\b", re.DOTALL)
+
+
+def find_table_html(page, table_id=None):
+    """
+    Returns the html of the table with id table_id in page, or the first
+    table in the page if table_id is None. Works the same whether the table
+    is in the page or inside an html comment, but with no table_id a table
+    outside comments is taken over a commented out one before it.
+
+    Parameters
+    ----------
+    page : string, html of the page
+    table_id : string, id attribute of the table. The default is None.
+
+    Returns
+    -------
+    table_html : string, None if the table is not in the page
+
+    """
+    if table_id is None:
+        #the first table outside comments, else the first commented one
+        start = next((match.start() for match in COMMENT_OR_TABLE.finditer(page)
+                      if match.group().startswith("<table")), page.find("<table"))
+    else:
+        match = re.search(r"""<table\b[^>]*\bid\s*=\s*["']%s["']"""
+                          % re.escape(table_id), page)
+        start = match.start() if match else -1
+    if start == -1:
+        return None
+
+    #stat tables are never nested, so the first closing tag ends the table
+    end = page.find("</table>", start)
+    if end == -1:
+        return None
+    return page[start:end + len("</table>")]
+
+
+def is_header_row(row):
+    """
+    Returns True for rows that repeat or group the column headers:
+    rows in thead, rows marked with a "thead" or "over_header" class,
+    and rows with no data cells.
+    """
+    if row.getparent() is not None and row.getparent().tag == "thead":
+        return True
+    classes = (row.get("class") or "").split()
+    if "thead" in classes or "over_header" in classes:
+        return True
+    return not any(cell.tag == "td" for cell in row)
+
+
+def parse_table(page, table_id=None, footer=False):
+    """
+    Parses the table with id table_id in page (the first table if None)
+    into one dictionary per data row, mapping each cell's data-stat to its
+    text. Cells holding a link also map data-stat + "_href" to the link.
+
+    Parameters
+    ----------
+    page : string, html of the page
+    table_id : string, id attribute of the table. The default is None.
+    footer : bool, include rows in tfoot (e.g. career totals).
+             The default is False.
+
+    Returns
+    -------
+    rows : list of dictionaries, empty if the table is not in the page
+
+    """
+    table_html = find_table_html(page, table_id)
+    if table_html is None:
+        return []
+    table = lxml.html.fragment_fromstring(table_html)
+
+    rows = []
+    for row in table.iter("tr"):
+        if is_header_row(row):
+            continue
+        if not footer and row.getparent().tag == "tfoot":
+            continue
+        stats = {}
+        for cell in row:
+            stat = cell.get("data-stat")
+            if stat is None:
+                continue
+            stats[stat] = cell.text_content()
+            link = cell.find(".//a")
+            if link is not None:
+                stats[stat + "_href"] = link.get("href")
+        rows.append(stats)
+    return rows
+
+
+def find_next_page(page, url):
+    """
+    Returns the absolute url of the "Next Page" link of a paginated
+    listing (the link carries the offset of the next page of results),
+    or None on the last page.
+
+    Parameters
+    ----------
+    page : string, html of the listing page
+    url : string, url of the listing page, used to resolve relative links
+
+    Returns
+    -------
+    next_url : string or None
+
+    """
+    match = re.search(r"""<a\b[^>]*\bhref\s*=\s*["']([^"']+)["'][^>]*>\s*Next\s+Page\s*</a>""",
+                      page, re.IGNORECASE)
+    if match is None:
+        return None
+    return urljoin(url, html.unescape(match.group(1)))
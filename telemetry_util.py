@@ -0,0 +1,266 @@
+"""
+Contains the telemetry recorded by scrape_util.py for every request made by
+the scrapers, so a slow crawl can be traced to the network, parsing or
+politeness delays.
+
+Histogram - cumulative bucket histogram in the style of Prometheus
+ScrapeTelemetry - per-request latency, size, parse and failure metrics,
+                  exported as JSON or Prometheus text at the end of a run
+timed_adapter - requests adapter that times DNS lookup and connection setup
+
+@author: markafunke
+"""
+import json
+import socket
+import threading
+import time
+from collections import Counter
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+# bucket upper bounds of each histogram
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6)
+ROWS_BUCKETS = (0, 1, 2, 5, 10, 50, 100, 500, 1000)
+
+# dns and connect seconds of the connection opened by the current request
+# connections reused from the pool leave both at 0
+_connection_timings = threading.local()
+
+# number of the current attempt at a request, 0 for the first try
+_attempts = threading.local()
+
+
+class Histogram:
+    """
+    Counts observations into cumulative buckets with upper bounds buckets,
+    and keeps their count and sum
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[position] += 1
+
+    def to_dict(self):
+        return {"buckets": dict(zip(map(str, self.buckets), self.counts)),
+                "count": self.count,
+                "sum": self.sum,
+                "mean": self.sum / self.count if self.count else None}
+
+
+class ScrapeTelemetry:
+    """
+    Collects metrics for every request and parse made by the scrapers:
+    dns, connect, time to first byte and total latency, response bytes,
+    status codes and retries of each request, and parse time and rows
+    extracted from each page. Failures that would otherwise go unnoticed
+    (failed requests, pages that fail to parse, pages with no rows) are
+    counted as well.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {
+                "dns_seconds": Histogram(SECONDS_BUCKETS),
+                "connect_seconds": Histogram(SECONDS_BUCKETS),
+                "ttfb_seconds": Histogram(SECONDS_BUCKETS),
+                "request_seconds": Histogram(SECONDS_BUCKETS),
+                "response_bytes": Histogram(BYTES_BUCKETS),
+                "parse_seconds": Histogram(SECONDS_BUCKETS),
+                "rows_extracted": Histogram(ROWS_BUCKETS),
+            }
+            self.status_codes = Counter()
+            self.counters = Counter()
+            self.started = time.time()
+
+    def record_request(self, status, dns=0.0, connect=0.0, ttfb=0.0,
+                       total=0.0, nbytes=0, retries=0):
+        """
+        Records one request. status is the http status code, or 0 when no
+        response was received. ttfb is the wait for the response headers
+        once connected, without dns and connect. retries is the number of
+        attempts before this one, any request with retries is counted as
+        a retry.
+        """
+        with self._lock:
+            self.histograms["dns_seconds"].observe(dns)
+            self.histograms["connect_seconds"].observe(connect)
+            self.histograms["ttfb_seconds"].observe(ttfb)
+            self.histograms["request_seconds"].observe(total)
+            self.histograms["response_bytes"].observe(nbytes)
+            self.status_codes[str(status)] += 1
+            self.counters["requests"] += 1
+            if retries:
+                self.counters["retries"] += 1
+            if status == 0 or status >= 400:
+                self.counters["request_errors"] += 1
+
+    def record_parse(self, seconds, rows, error=None):
+        """
+        Records the parse of one page, error is the exception raised, if any
+        """
+        with self._lock:
+            self.histograms["parse_seconds"].observe(seconds)
+            self.histograms["rows_extracted"].observe(rows)
+            self.counters["pages_parsed"] += 1
+            if error is not None:
+                self.counters["parse_failures"] += 1
+            elif rows == 0:
+                self.counters["empty_pages"] += 1
+
+    def count(self, name, amount=1):
+        """
+        Increments the counter name, e.g. "cache_hits" or "fetch_failures"
+        """
+        with self._lock:
+            self.counters[name] += amount
+
+    def to_dict(self):
+        with self._lock:
+            return {"seconds": time.time() - self.started,
+                    "counters": dict(self.counters),
+                    "status_codes": dict(self.status_codes),
+                    "histograms": {name: histogram.to_dict() for name, histogram
+                                   in self.histograms.items()}}
+
+    def to_json(self, path=None):
+        """
+        Returns the metrics as a JSON string, also written to path if given
+        """
+        text = json.dumps(self.to_dict(), indent=2)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def to_prometheus(self, path=None, prefix="scrape"):
+        """
+        Returns the metrics in the Prometheus text exposition format,
+        also written to path if given
+        """
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                lines.append(f"{prefix}_{name}_total {value}")
+            lines.append(f"# TYPE {prefix}_responses_total counter")
+            for status, value in sorted(self.status_codes.items()):
+                lines.append(f'{prefix}_responses_total{{code="{status}"}} {value}')
+            for name, histogram in self.histograms.items():
+                metric = f"{prefix}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for bound, value in zip(histogram.buckets, histogram.counts):
+                    lines.append(f'{metric}_bucket{{le="{bound:g}"}} {value}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum {histogram.sum}")
+                lines.append(f"{metric}_count {histogram.count}")
+        text = "\n".join(lines) + "\n"
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+
+def set_attempt(attempt):
+    _attempts.value = attempt
+
+
+def current_attempt():
+    return getattr(_attempts, "value", 0)
+
+
+def reset_connection_timings():
+    _connection_timings.dns = 0.0
+    _connection_timings.connect = 0.0
+
+
+def connection_timings():
+    """
+    Returns (dns seconds, connect seconds) of the connection opened by the
+    last request made in this thread, (0, 0) if a pooled one was reused
+    """
+    return (getattr(_connection_timings, "dns", 0.0),
+            getattr(_connection_timings, "connect", 0.0))
+
+
+class TimedConnectionMixin:
+    """
+    Times the DNS lookup and the connection setup (TCP and TLS handshakes)
+    of every new connection. The host is resolved once, timed, and the
+    connection is opened to the resolved addresses in turn, so connecting
+    doesn't look the host up again.
+    """
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port,
+                                           allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as error:
+            raise NameResolutionError(self.host, self, error) from error
+        finally:
+            _connection_timings.dns = time.perf_counter() - start
+
+        # urllib3 connects to _dns_host, the host name is kept for TLS
+        # and the Host header, which are only used after _new_conn returns
+        host = self._dns_host
+        try:
+            for position, (*_, sockaddr) in enumerate(addresses):
+                self._dns_host = sockaddr[0]
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError):
+                    if position == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _connection_timings.connect = time.perf_counter() - start - _connection_timings.dns
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+def timed_adapter(pool_size):
+    """
+    Returns a requests HTTPAdapter holding pool_size connections per host,
+    whose new connections record their dns and connect times
+    """
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    adapter.poolmanager.pool_classes_by_scheme = {
+        "http": TimedHTTPConnectionPool,
+        "https": TimedHTTPSConnectionPool}
+    return adapter
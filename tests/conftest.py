@@ -0,0 +1,55 @@
+"""
+Shared fixtures of the test suite. Tests import the project modules from
+the repository root, and run in a temporary working directory so the
+relative cache/ and data/ paths the modules use stay out of the tree.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    import scrape_util
+
+    monkeypatch.chdir(tmp_path)
+    # preprocessing.scrape sets a page archive relative to the working directory
+    monkeypatch.setattr(scrape_util, "ARCHIVE", None)
+    yield tmp_path
+    # every test starts with a new session and no learned host rates
+    scrape_util.close_session()
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    """
+    Serves the synthetic site of replay_site.py from a local ReplayServer,
+    with every scraper request sent to it and no politeness delay
+    """
+    import replay_server
+    import replay_site
+    import scrape_util
+
+    replay_site.record(str(tmp_path / "replay"))
+    server = replay_server.ReplayServer(str(tmp_path / "replay"))
+    server.start()
+    monkeypatch.setattr(scrape_util, "REPLAY_SERVER", server.url)
+    monkeypatch.setattr(scrape_util, "POLITE_DELAY", 0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def scraped(replay):
+    """
+    Output of the scrape stage of preprocessing.py for the replayed site
+    """
+    import preprocessing
+    import replay_site
+
+    return preprocessing.scrape(replay_site.MIN_YEAR, replay_site.MAX_YEAR)
@@ -0,0 +1,173 @@
+"""
+A small synthetic copy of the pages the scrapers read, for the 2019 and
+2020 wide receiver classes, recorded in a scrape_util.ResponseCache so it
+can be served by replay_server.ReplayServer like a real recording.
+
+The draft listing spans two pages linked by "Next Page", every player page
+lists three seasons with different yards, and the combine listing spells
+some names differently from the draft listing (suffixes, punctuation) and
+is missing some links, so the joins of preprocessing.py are exercised.
+"""
+import html
+
+import scrape_nfl
+import scrape_util
+
+PFR = "https://www.pro-football-reference.com"
+CFB = "https://www.sports-reference.com/cfb/players"
+
+MIN_YEAR, MAX_YEAR = 2019, 2020
+
+# draft year, round, pick, draft name, combine name, team, school, conf,
+# class, rookie season yards (the next two seasons add 100 and 200),
+# combine height, whether the combine listing has the player's links
+PLAYERS = [
+    (2019, 1, 32, "N'Keal Harry", "N'Keal Harry", "NWE", "Arizona St.", "Pac-12", "JR", 105, "6-2", True),
+    (2019, 2, 51, "A.J. Brown", "AJ Brown", "TEN", "Ole Miss", "SEC", "JR", 1051, "6-0", False),
+    (2019, 2, 57, "Parris Campbell", "Parris Campbell", "IND", "Ohio St.", "Big Ten", "SR", 127, "6-0", True),
+    (2019, 4, 103, "Hakeem Butler", "Hakeem Butler", "ARI", "Iowa St.", "Big 12", "JR", None, "6-5", True),
+    (2020, 1, 12, "Henry Ruggs III", "Henry Ruggs", "LVR", "Alabama", "SEC", "JR", 452, "5-11", False),
+    (2020, 1, 15, "Jerry Jeudy", "Jerry Jeudy", "DEN", "Alabama", "SEC", "JR", 856, "6-1", True),
+    (2020, 4, 128, "Gabriel Davis", "Gabe Davis", "BUF", "UCF", "American", "JR", 599, " ", False),
+    (2020, 7, 233, "Isaiah Coulter", "Isaiah Coulter", "HOU", "Rhode Island", None, "SR", 3, "6-2", True),
+]
+
+# full name of each draft team abbreviation in the seasons before the drafts
+TEAM_NAMES = {"NWE": "New England Patriots", "TEN": "Tennessee Titans",
+              "IND": "Indianapolis Colts", "ARI": "Arizona Cardinals",
+              "LVR": "Oakland Raiders", "DEN": "Denver Broncos",
+              "BUF": "Buffalo Bills", "HOU": "Houston Texans"}
+
+# first page of the draft listing
+PAGE_SIZE = 5
+
+
+def slug(name):
+    return "".join(letter for letter in name if letter.isalpha())[:8]
+
+
+def nfl_link(name):
+    return f"/players/{name[0]}/{slug(name)}00.htm"
+
+
+def college_link(name):
+    return f"{CFB}/{slug(name).lower()}-1.html"
+
+
+def rookie_yards(player):
+    return player[9]
+
+
+def table(rows, table_id=None, header=()):
+    """
+    Returns the html of a stats table, each row a list of
+    (data-stat, text, link or None)
+    """
+    id_attribute = f' id="{table_id}"' if table_id else ""
+    head = "".join(f'<th data-stat="{stat}">{stat}</th>' for stat in header)
+    body = []
+    for row in rows:
+        cells = []
+        for stat, text, link in row:
+            text = html.escape("" if text is None else str(text))
+            if link is not None:
+                text = f'<a href="{html.escape(link)}">{text}</a>'
+            cells.append(f'<td data-stat="{stat}">{text}</td>')
+        body.append("<tr>" + "".join(cells) + "</tr>")
+    return (f"<table{id_attribute}><thead><tr>{head}</tr></thead>"
+            f"<tbody>{''.join(body)}</tbody></table>")
+
+
+def page(*parts):
+    return "<html><body>" + "".join(parts) + "</body></html>"
+
+
+def draft_pages():
+    first = scrape_nfl.draft_url(MIN_YEAR, MAX_YEAR)
+    second = first + f"&offset={PAGE_SIZE}"
+    pages = {}
+    for url, players, next_url in [(first, PLAYERS[:PAGE_SIZE], second),
+                                   (second, PLAYERS[PAGE_SIZE:], None)]:
+        rows = []
+        for year, rnd, pick, name, _, team, school, *_ in players:
+            rows.append([("year_id", year, None), ("draft_round", rnd, None),
+                         ("draft_pick", pick, None), ("player", name, nfl_link(name)),
+                         ("pos", "WR", None), ("age", 22, None), ("team", team, None),
+                         ("college_id", school, None),
+                         ("college_link", "College Stats", college_link(name))])
+        # repeated header row inside the body, as the site has every 100 rows
+        listing = table(rows, "results", header=["year_id", "player"]).replace(
+            "<tbody>", '<tbody><tr class="thead"><th>Year</th></tr>')
+        link = (f'<div><a href="{html.escape(next_url)}">Next Page</a></div>'
+                if next_url else "")
+        pages[url] = page(listing, link)
+    return pages
+
+
+def combine_page():
+    rows = []
+    for year, _, pick, name, combine_name, team, school, *_, height, linked in PLAYERS:
+        rows.append([("year_id", year, None),
+                     ("player", combine_name, nfl_link(name) if linked else None),
+                     ("pos", "WR", None), ("school_name", school, None),
+                     ("college", "College Stats", college_link(name) if linked else None),
+                     ("height", height, None), ("weight", 200 + pick % 20, None),
+                     ("forty_yd", round(4.3 + pick / 1000, 2), None),
+                     ("vertical", 30 + pick % 10, None),
+                     ("draft_info", f"{team} / {pick} / {year}", None)])
+    return {scrape_nfl.combine_url(MIN_YEAR, MAX_YEAR): page(table(rows, "results"))}
+
+
+def player_pages():
+    pages = {}
+    for player in PLAYERS:
+        year, name, team = player[0], player[3], player[5]
+        seasons = []
+        if rookie_yards(player) is not None:
+            for season in range(3):
+                seasons.append([("year_id", year + season, None), ("team", team, None),
+                                ("g", 16, None), ("gs", 10, None), ("targets", 80, None),
+                                ("rec", 50, None),
+                                ("rec_yds", rookie_yards(player) + 100 * season, None),
+                                ("rec_td", 4, None)])
+        # player tables are inside an html comment on the site
+        pages[scrape_util.normalize_link(nfl_link(name))] = page(
+            "<!--", table(seasons, "receiving_and_rushing"), "-->")
+
+        _, _, _, _, _, _, school, conf, col_class, *_ = player
+        college = []
+        for offset, season_class in [(2, "SO"), (1, col_class)]:
+            college.append([("year_id", year - offset, None), ("school_name", school, None),
+                            ("conf_abbr", conf, None), ("class", season_class, None),
+                            ("rec", 60, None), ("rec_yds", 900 + offset * 10 + year % 100, None),
+                            ("rec_td", 8, None), ("scrim_yds", 950 + offset, None),
+                            ("scrim_td", 9, None)])
+        pages[college_link(name)] = page(table(college, "receiving"))
+    return pages
+
+
+def team_pages():
+    pages = {}
+    for season in range(MIN_YEAR - 3, MAX_YEAR):
+        rows = [[("team", full_name, None), ("pass_yds", 3000 + 100 * position + season % 100, None)]
+                for position, full_name in enumerate(TEAM_NAMES.values())]
+        rows.append([("team", "League Average", None), ("pass_yds", 3500, None)])
+        pages[scrape_nfl.TEAM_URL.format(year=season)] = page("<!--", table(rows, "passing"), "-->")
+    return pages
+
+
+def pages():
+    """
+    Returns every page of the site, url : html
+    """
+    return {**draft_pages(), **combine_page(), **player_pages(), **team_pages()}
+
+
+def record(directory):
+    """
+    Records every page of the site in a ResponseCache at directory
+    """
+    cache = scrape_util.ResponseCache(directory, max_bytes=float("inf"))
+    for url, body in pages().items():
+        cache.put(url, body)
+    return cache
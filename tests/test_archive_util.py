@@ -0,0 +1,60 @@
+import pytest
+
+import archive_util
+import replay_site
+import scrape_nfl
+import scrape_util
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = archive_util.PageArchive(str(tmp_path / "pages.zst"))
+    for url, body in replay_site.pages().items():
+        archive.append(url, body)
+    return archive
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    # every request counts as a fetch and fails
+    fetched = []
+
+    def http_get(session, url):
+        fetched.append(url)
+        raise ConnectionError(url)
+
+    monkeypatch.setattr(scrape_util, "http_get", http_get)
+    return fetched
+
+
+def test_archive_round_trip(archive):
+    url = scrape_nfl.combine_url(replay_site.MIN_YEAR, replay_site.MAX_YEAR)
+    assert archive.read(url) == replay_site.pages()[url]
+    reopened = archive_util.PageArchive(archive.path)
+    assert len(reopened) == len(replay_site.pages())
+    assert dict(reopened) == replay_site.pages()
+
+
+def test_reparse_then_crawl_listing_follows_every_page(archive, offline, tmp_path):
+    manifest = scrape_util.CrawlManifest(str(tmp_path / "manifest.jsonl"))
+    counts = archive_util.reparse(archive, manifest, workers=2)
+    assert counts == {"ok": len(replay_site.pages()), "failed": 0}
+
+    draft = scrape_nfl.scrape_draft_data(replay_site.MIN_YEAR, replay_site.MAX_YEAR,
+                                         manifest=scrape_util.CrawlManifest(manifest.path))
+    assert len(draft) == len(replay_site.PLAYERS)
+    assert offline == []
+
+
+def test_reparsed_player_pages_need_no_fetches(archive, offline, tmp_path):
+    manifest = scrape_util.CrawlManifest(str(tmp_path / "manifest.jsonl"))
+    archive_util.reparse(archive, manifest, workers=1)
+    draft = scrape_nfl.scrape_draft_data(replay_site.MIN_YEAR, replay_site.MAX_YEAR,
+                                         manifest=manifest)
+    frontier = scrape_util.CrawlFrontier(manifest)
+    frontier.add(draft, "draft")
+    nfl = scrape_nfl.scrape_nfl_data(frontier.frame("nfl_link"), manifest=manifest)
+    assert nfl["rookie_rec_yards"].notna().all()
+    assert nfl["player"].nunique() == sum(1 for player in replay_site.PLAYERS
+                                          if player[9] is not None)
+    assert offline == []
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+import bootstrap_util as bt
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(9)
+    n = 50
+    X = pd.DataFrame({"pick": rng.integers(1, 250, n).astype(float),
+                      "SEC_Rd1": (rng.random(n) < 0.1).astype(float)})
+    y = pd.Series(8 - 0.02 * X["pick"] + X["SEC_Rd1"] + rng.normal(0, 0.5, n))
+    return X, y
+
+
+def test_resamples_are_weighted_refits(data):
+    X, y = data
+    coefs = bt.bootstrap_coefs(X, y, n_boot=7, seed=1, batch_size=3)
+    counts = bt.resample_counts(len(y), 7, np.random.default_rng(1))
+    assert (counts.sum(axis=1) == len(y)).all()
+    for draw, weights in zip(coefs.itertuples(index=False), counts):
+        rows = np.repeat(np.arange(len(y)), weights)
+        if len(np.unique(X["SEC_Rd1"].iloc[rows])) < 2:
+            continue
+        lm = LinearRegression().fit(X.iloc[rows], y.iloc[rows])
+        np.testing.assert_allclose(draw, [lm.intercept_, *lm.coef_], rtol=1e-6)
+
+
+def test_scores_and_intervals(data):
+    X, y = data
+    coefs = bt.bootstrap_coefs(X, y, n_boot=200, seed=2)
+    scores = bt.bootstrap_scores(coefs, X, y, seed=3)
+    assert list(scores.columns) == ["r2", "rmse"] and len(scores) == 200
+    summary = bt.intervals(coefs)
+    assert list(summary.index) == ["intercept", "pick", "SEC_Rd1"]
+    assert (summary["lower"] <= summary["median"]).all()
+    assert (summary["median"] <= summary["upper"]).all()
+
+    pred = bt.prediction_intervals(coefs, X, y, X.head(5), seed=4)
+    assert list(pred.index) == list(X.index[:5])
+    assert (pred["pred_lower"] <= pred["pred"]).all()
+    assert (pred["pred"] <= pred["pred_upper"]).all()
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+import clean_util
+
+
+def test_clean_player_names():
+    names = pd.Series([" Ted Ginn Jr. ", "JJ Nelson", "Randy Moss", None])
+    cleaned = clean_util.clean_player_names(names)
+    assert cleaned.tolist()[:3] == ["Ted Ginn", "J.J. Nelson", "Randy Moss"]
+    assert pd.isna(cleaned.iloc[3])
+
+
+def test_blank_to_nan():
+    df = pd.DataFrame({"text": ["a", "", "  ", None], "mixed": [1, " ", "b", np.nan],
+                       "numbers": [1.0, 2.0, np.nan, 4.0], "empty": [None] * 4})
+    cleaned = clean_util.blank_to_nan(df)
+    assert cleaned["text"].isna().tolist() == [False, True, True, True]
+    assert cleaned["mixed"].isna().tolist() == [False, True, False, True]
+    assert cleaned["mixed"].iloc[0] == 1
+    pd.testing.assert_series_equal(cleaned["numbers"], df["numbers"])
+    assert cleaned["empty"].isna().all()
+    # df isn't changed
+    assert df["text"].iloc[1] == ""
+
+
+def test_height_inches():
+    heights = pd.Series(["6-2", "5- 11", "6'1", "", None])
+    inches = clean_util.height_inches(heights)
+    assert inches.tolist()[:2] == [74.0, 71.0]
+    assert inches.iloc[2:].isna().all()
+
+
+def test_add_flags():
+    df = pd.DataFrame({"conf": pd.Categorical(["SEC", "Pac-10", "MAC", None]),
+                       "rnd": pd.array([1, 2, 1, None], dtype="Int8"),
+                       "col_class": ["JR", "SR", "FR", None]})
+    flagged = clean_util.add_flags(df)
+    assert flagged["conf"].tolist() == ["SEC", "Pac-12", "Other", "Other"]
+    assert flagged["power_5"].tolist() == [1, 1, 0, 0]
+    assert flagged["isSEC"].tolist() == [1, 0, 0, 0]
+    assert flagged["isRd1"].tolist() == [1, 0, 1, 0]
+    assert flagged["SEC_Rd1"].tolist() == [1, 0, 0, 0]
+    assert flagged["left_early"].tolist() == [1, 0, 1, 0]
+    assert "col_class" not in flagged
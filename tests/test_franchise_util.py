@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import franchise_util
+
+
+def test_relocations_hold_after_the_move():
+    team = pd.Series(["Oakland Raiders", "Las Vegas Raiders", "St. Louis Rams",
+                      "Los Angeles Rams", "San Diego Chargers"])
+    season = pd.Series([2019, 2021, 2015, 2016, 2018])
+    assert franchise_util.team_abbrevs(team, season).tolist() == ["OAK", "LVR", "STL",
+                                                                  "LAR", "LAC"]
+    for franchise, year, abbrev in zip(franchise_util.franchises(team), season,
+                                       franchise_util.team_abbrevs(team, season)):
+        assert franchise_util.abbrev_at(franchise, year) == abbrev
+
+
+def test_unknown_team_and_abbrev():
+    with pytest.raises(KeyError, match="Springfield"):
+        franchise_util.franchises(pd.Series(["Springfield Atoms"]))
+    franchise = franchise_util.abbrev_franchises(pd.Series(["OAK", "LVR", "XXX"]))
+    assert franchise.iloc[0] == franchise.iloc[1] == "rai"
+    assert pd.isna(franchise.iloc[2])
+
+
+def test_season_lags_follow_the_franchise():
+    team_df = pd.DataFrame({"team": ["Oakland Raiders", "Oakland Raiders", "Las Vegas Raiders"],
+                            "year": [2018, 2019, 2020],
+                            "total_yards": [100, 200, 300]})
+    lags = franchise_util.season_lags(team_df, lags=(1, 2))
+    row = lags[(lags["franchise"] == "rai") & (lags["year"] == 2021)].iloc[0]
+    assert row["total_yards_lag1"] == 300 and row["total_yards_lag2"] == 200
+    first = lags[(lags["franchise"] == "rai") & (lags["year"] == 2018)].iloc[0]
+    assert np.isnan(first["total_yards_lag1"])
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import join_util
+
+
+@pytest.fixture
+def base():
+    return pd.DataFrame({"link": ["a", "b", None, "d"], "year": [2019, 2019, 2020, 2020]})
+
+
+def test_lookup_missing_keys_and_duplicates(base):
+    right = pd.DataFrame({"link": ["b", "a", "a", None], "value": [1, 2, 3, 4]})
+    with pytest.raises(ValueError):
+        join_util.lookup(base, right, ["link"])
+    first = join_util.lookup(base, right, ["link"], duplicates="first")
+    last = join_util.lookup(base, right, ["link"], duplicates="last")
+    np.testing.assert_array_equal(first, [1, 0, -1, -1])
+    np.testing.assert_array_equal(last, [2, 0, -1, -1])
+
+
+def test_lookup_on_two_columns(base):
+    right = pd.DataFrame({"key": ["d", "a"], "season": [2020, 2020]})
+    positions = join_util.lookup(base, right, ["link", "year"], ["key", "season"])
+    np.testing.assert_array_equal(positions, [-1, -1, -1, 0])
+
+
+def test_keyed_join_one_row_per_base_row(base):
+    right = pd.DataFrame({"link": ["a", "b"], "value": [10, 20]})
+    positions = join_util.lookup(base, right, ["link"])
+    joined = join_util.keyed_join(base, [("right", right, positions, {"value": "joined"})],
+                                  unique=["right"])
+    assert list(joined.index) == list(base.index)
+    assert joined["joined"].tolist()[:2] == [10, 20]
+    assert joined["joined"].isna().tolist()[2:] == [True, True]
+
+
+def test_keyed_join_checks(base):
+    right = pd.DataFrame({"link": ["a"], "value": [10]})
+    shared = np.array([0, 0, -1, -1])
+    # a team season may be shared by many players, a player's own page may not
+    join_util.keyed_join(base, [("team", right, shared, {"value": "value_team"})])
+    with pytest.raises(ValueError, match="matched by more than one"):
+        join_util.keyed_join(base, [("nfl", right, shared, {"value": "value"})],
+                             unique=["nfl"])
+    with pytest.raises(ValueError, match="out of range"):
+        join_util.keyed_join(base, [("nfl", right, np.array([0, 1, -1, -1]),
+                                     {"value": "value"})])
+    with pytest.raises(ValueError, match="already in the joined frame"):
+        join_util.keyed_join(base, [("nfl", right, shared, {"value": "year"})])
+    with pytest.raises(ValueError, match="positions"):
+        join_util.keyed_join(base, [("nfl", right, shared[:2], {"value": "value"})])
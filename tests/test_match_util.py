@@ -0,0 +1,39 @@
+import pandas as pd
+
+import match_util
+
+
+def test_normalize_name():
+    assert match_util.normalize_name("Odell Beckham, Jr.") == "odell beckham"
+    assert match_util.normalize_name("J.J. Nelson") == match_util.normalize_name("JJ Nelson")
+    assert match_util.normalize_name("Henry Ruggs III") == "henry ruggs"
+    assert match_util.normalize_name(None) == ""
+
+
+def test_soundex():
+    assert match_util.soundex("robert") == "r163"
+    assert match_util.soundex("rupert") == "r163"
+    assert match_util.soundex("") == ""
+
+
+def test_resolve_players_passes():
+    draft = pd.DataFrame({"player": ["A.J. Brown", "Gabe Davis", "Hakeem Butler",
+                                     "Isaiah Coulter", "Nobody Here"],
+                          "year": [2019, 2020, 2019, 2020, 2020],
+                          "nfl_link": ["/players/B/BrowAJ00.htm", None, None, None, None]})
+    combine = pd.DataFrame({"player": ["Arthur Brown", "Gabriel Davis", "Hakeem Butler",
+                                       "Isaiah Coulter", "Isaiah Coulter"],
+                            "year": [2019, 2020, 2019, 2019, 2020],
+                            "nfl_link": ["/players/B/BrowAJ00.htm", None, None, None, None]})
+    matches = match_util.resolve_players(draft, combine)
+    assert matches["method"].tolist() == ["nfl_link", "fuzzy", "name", "name", None]
+    # the 2020 combine row, not the 2019 one of the same name
+    assert matches["right_row"].tolist() == [0, 1, 2, 4, -1]
+    assert matches["score"].iloc[1] < 1
+
+
+def test_every_right_row_used_once():
+    draft = pd.DataFrame({"player": ["Mike Williams", "Mike Williams"], "year": [2017, 2017]})
+    combine = pd.DataFrame({"player": ["Mike Williams"], "year": [2017]})
+    matches = match_util.resolve_players(draft, combine)
+    assert sorted(matches["right_row"]) == [-1, 0]
@@ -0,0 +1,27 @@
+import pandas as pd
+
+import pipeline_util
+
+
+def test_pipeline_reuses_cached_stages(tmp_path):
+    calls = []
+    pipeline = pipeline_util.Pipeline(str(tmp_path / "stages"))
+
+    @pipeline.stage(params={"n": 3})
+    def numbers(n):
+        calls.append("numbers")
+        return pd.DataFrame({"x": range(n)})
+
+    @pipeline.stage(inputs=["numbers"])
+    def doubled(df):
+        calls.append("doubled")
+        return df * 2
+
+    first = pipeline.run("doubled", verbose=False)["doubled"]
+    second = pipeline.run("doubled", verbose=False)["doubled"]
+    assert calls == ["numbers", "doubled"]
+    pd.testing.assert_frame_equal(first, second)
+
+    pipeline.stages["numbers"].params = {"n": 4}
+    assert len(pipeline.run("doubled", verbose=False)["doubled"]) == 4
+    assert calls == ["numbers", "doubled", "numbers", "doubled"]
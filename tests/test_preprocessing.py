@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+
+import replay_site
+
+
+def test_merge_one_row_per_drafted_player(scraped):
+    import preprocessing
+    merged = preprocessing.merge(scraped).set_index("player_clean")
+
+    assert len(merged) == len(replay_site.PLAYERS)
+    # combine rows found by name despite suffixes, punctuation and nicknames
+    assert merged.loc["Henry Ruggs III", "combine_match"] == "name"
+    assert merged.loc["Gabriel Davis", "combine_match"] == "fuzzy"
+    # rookie season, final college season, and the Raiders' Oakland seasons
+    assert merged.loc["A.J. Brown", "rookie_rec_yards"] == 1051
+    assert pd.isna(merged.loc["Hakeem Butler", "rookie_rec_yards"])
+    assert merged.loc["Henry Ruggs III", "franchise"] == "rai"
+    assert merged[["total_yards", "total_yards_lag2", "total_yards_lag3"]].notna().all().all()
+
+
+
+def test_parse_years():
+    import preprocessing
+    assert preprocessing.parse_years(["preprocessing.py"]) == (preprocessing.FIRST_YEAR,
+                                                                preprocessing.LAST_YEAR)
+    assert preprocessing.parse_years(["preprocessing.py", "2021", "2021"]) == (2021, 2021)
+    for argv in (["2021"], ["2021", "2019"], ["x", "2020"]):
+        with pytest.raises(SystemExit):
+            preprocessing.parse_years(["preprocessing.py", *argv])
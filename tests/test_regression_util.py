@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.model_selection import KFold
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+import regression_util as rg
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(5)
+    n = 60
+    X = pd.DataFrame({"pick": rng.integers(1, 250, n).astype(float),
+                      "col_rec_yds": rng.integers(200, 1800, n).astype(float),
+                      "left_early": rng.integers(0, 2, n).astype(float)})
+    y = pd.Series(np.cbrt(300 - X["pick"] + 0.2 * X["col_rec_yds"]
+                          + rng.normal(0, 40, n).clip(-150)))
+    return X, y
+
+
+def test_cv_path_matches_sklearn(data):
+    X, y = data
+    path = rg.cv_path(X, y, alphas=[0, 10], seeds=[3])
+    kf = KFold(n_splits=5, shuffle=True, random_state=3)
+    for fold, (train, val) in enumerate(kf.split(X)):
+        for alpha in (0, 10):
+            model = make_pipeline(StandardScaler(),
+                                  LinearRegression() if alpha == 0 else Ridge(alpha=alpha))
+            model.fit(X.iloc[train], y.iloc[train])
+            pred = model.predict(X.iloc[val])
+            row = path[(path["fold"] == fold) & (path["alpha"] == alpha)].iloc[0]
+            assert row["r2"] == pytest.approx(model.score(X.iloc[val], y.iloc[val]))
+            assert row["rmse"] == pytest.approx(
+                np.sqrt(np.mean((y.iloc[val] ** 3 - pred ** 3) ** 2)))
+            np.testing.assert_allclose(row[[f"coef_{c}" for c in X.columns]].astype(float),
+                                       model[-1].coef_, rtol=1e-6)
+
+
+def test_summarize_path_best_first(data):
+    X, y = data
+    summary = rg.summarize_path(rg.cv_path(X, y, alphas=[0, 1, 1000], seeds=[1, 2]))
+    assert len(summary) == 3
+    assert summary.index[0] in (0, 1)
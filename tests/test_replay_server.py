@@ -0,0 +1,20 @@
+import replay_site
+import scrape_nfl
+import scrape_util
+
+
+def test_serves_recorded_pages_with_encoded_queries(replay):
+    # requests sends the draft finder's pos[] as pos%5B%5D
+    url = scrape_nfl.draft_url(replay_site.MIN_YEAR, replay_site.MAX_YEAR)
+    assert "Next Page" in scrape_util.fetch_page(url)
+    # the combine url was recorded already encoded
+    url = scrape_nfl.combine_url(replay_site.MIN_YEAR, replay_site.MAX_YEAR)
+    assert "Jerry Jeudy" in scrape_util.fetch_page(url)
+    assert replay.counts["missing"] == 0
+
+
+def test_unknown_pages_are_missing(replay):
+    pages = scrape_util.fetch_pages([scrape_util.BASE_URL + "/nowhere.htm"],
+                                    max_workers=1, max_retries=0)
+    assert pages == [None]
+    assert replay.counts["missing"] == 1
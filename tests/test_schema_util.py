@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+import schema_util
+
+
+SCHEMA = {"player": "object", "year": "Int16", "pos": "category",
+          "weight": "float32"}
+
+
+def test_coerce_scraped_text():
+    df = pd.DataFrame({"player": ["a", "b", "c"], "year": ["2019*", "2020+", ""],
+                       "pos": ["WR", " ", None], "weight": ["201", "n/a", None],
+                       "extra": ["x", "y", "z"]})
+    coerced = schema_util.coerce(df, SCHEMA)
+    schema_util.check(coerced, SCHEMA)
+    assert coerced["year"].tolist()[:2] == [2019, 2020]
+    assert coerced["year"].isna().tolist() == [False, False, True]
+    assert coerced["pos"].cat.categories.tolist() == ["WR"]
+    assert coerced["pos"].isna().tolist() == [False, True, True]
+    assert coerced["weight"].isna().tolist() == [False, True, True]
+    # columns not in the schema are left as they are, df isn't changed
+    assert coerced["extra"].tolist() == ["x", "y", "z"]
+    assert df["year"].tolist()[0] == "2019*"
+
+
+def test_coerce_keeps_matching_columns():
+    df = schema_util.coerce(pd.DataFrame({"year": [2019, 2020]}), SCHEMA)
+    assert schema_util.coerce(df, SCHEMA)["year"].dtype == "Int16"
+
+
+def test_check_names_missing_and_wrong_columns():
+    df = pd.DataFrame({"player": ["a"], "year": [2019], "pos": ["WR"]})
+    with pytest.raises(TypeError) as error:
+        schema_util.check(df, SCHEMA, "draft")
+    message = str(error.value)
+    assert message.startswith("draft doesn't match")
+    assert "'weight'" in message and "'year': 'int64 (expected Int16)'" in message
+    assert "'player'" not in message
+
+
+def test_check_output_dictionary():
+    frames = {"team": schema_util.coerce(
+        pd.DataFrame({"year": [2019], "team": ["nwe"], "total_yards": ["4000"]}),
+        schema_util.TEAM)}
+    schema_util.check_output(frames, {"team": schema_util.TEAM}, "scrape")
+    frames["team"]["total_yards"] = frames["team"]["total_yards"].astype(float)
+    with pytest.raises(TypeError, match=r"scrape\['team'\]"):
+        schema_util.check_output(frames, {"team": schema_util.TEAM}, "scrape")
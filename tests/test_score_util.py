@@ -0,0 +1,115 @@
+import json
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+
+import clean_util
+import score_util
+import search_util
+import train_regression
+
+
+@pytest.fixture
+def prospects():
+    rng = np.random.default_rng(3)
+    n = 80
+    return pd.DataFrame({"pick": rng.integers(1, 250, n),
+                         "rnd": rng.integers(1, 8, n),
+                         "col_rec_yds": rng.integers(200, 1800, n),
+                         "col_class": rng.choice(["SR", "JR", "SO"], n),
+                         "conf": rng.choice(["SEC", "Big Ten", "ACC", "Big 12",
+                                             "Pac-12", "MAC"], n),
+                         "total_yards": rng.integers(4500, 6500, n)})
+
+
+def fit(prospects, features):
+    #statsmodels fit of the cleaned features, as train_regression.py builds them
+    X = search_util.feature_frame(clean_util.add_flags(prospects), features)
+    y = np.cbrt(50 + 0.5 * prospects["col_rec_yds"] - prospects["pick"])
+    return X, sm.OLS(y, sm.add_constant(X)).fit()
+
+
+def test_search_pool_round_trip(prospects):
+    features = train_regression.SEARCH_POOL
+    X, model = fit(prospects, features)
+    score_util.save_model("model.json", model.params["const"],
+                          model.params[features], features)
+
+    scorer = score_util.Scorer.load("model.json")
+    yards = scorer.score(prospects.to_dict("records"))
+    expected = model.predict(sm.add_constant(X)) ** 3
+    np.testing.assert_allclose(yards, expected, rtol=1e-9)
+
+
+def test_round_from_pick_when_missing(prospects):
+    features = ["pick", "SEC_Rd1"]
+    _, model = fit(prospects, features)
+    artifact = score_util.save_model("model.json", model.params["const"],
+                                     model.params[features], features)
+    records = [{"pick": 5, "conf": "SEC", "col_rec_yds": 900, "col_class": "SR"},
+               {"pick": 5, "conf": "SEC", "col_rec_yds": 900, "col_class": "SR", "rnd": 1}]
+    first, second = score_util.Scorer(artifact).score(records)
+    assert first == pytest.approx(second)
+
+
+def test_missing_field_and_unknown_feature(prospects):
+    features = ["pick", "total_yards"]
+    _, model = fit(prospects, features)
+    artifact = score_util.save_model("model.json", model.params["const"],
+                                     model.params[features], features)
+    with pytest.raises(ValueError, match="total_yards"):
+        score_util.Scorer(artifact).score([{"pick": 3}])
+    with pytest.raises(KeyError):
+        score_util.save_model("model.json", 0, [1], ["nothing"])
+
+
+def test_server_scores_like_scorer(prospects):
+    features = ["pick", "col_rec_yds", "left_early", "power_5"]
+    _, model = fit(prospects, features)
+    score_util.save_model("model.json", model.params["const"],
+                          model.params[features], features)
+    records = prospects.head(10).to_dict("records")
+    records = [{key: (value.item() if hasattr(value, "item") else value)
+                for key, value in record.items()} for record in records]
+
+    server = score_util.ScoringServer("model.json")
+    server.start()
+    try:
+        request = urllib.request.Request(f"{server.url}/score",
+                                         json.dumps({"prospects": records}).encode())
+        with urllib.request.urlopen(request) as response:
+            yards = json.loads(response.read())["yards"]
+        with urllib.request.urlopen(f"{server.url}/health") as response:
+            health = json.loads(response.read())
+    finally:
+        server.shutdown()
+        server.server_close()
+    np.testing.assert_allclose(yards, score_util.Scorer.load("model.json").score(records))
+    assert health["requests"] == 1 and health["prospects"] == 10
+
+
+def test_conference_and_class_spelled_as_in_training(prospects):
+    assert score_util.POWER_5_CONF == clean_util.POWER_5_CONF
+    assert score_util.UNDERCLASSMEN == clean_util.UNDERCLASSMEN
+    assert score_util.CONF_NAMES == clean_util.CONF_NAMES
+    features = ["pick", "left_early", "power_5", "isSEC"]
+    _, model = fit(prospects, features)
+    artifact = score_util.save_model("model.json", model.params["const"],
+                                     model.params[features], features)
+    scorer = score_util.Scorer(artifact)
+    raw = [{"pick": 10, "conf": "Pac-10", "col_class": "jr"},
+           {"pick": 10, "conf": " sec ", "col_class": "So"},
+           {"pick": 10, "conf": "big ten", "col_class": "sr"},
+           {"pick": 10, "conf": "mac", "col_class": None}]
+    clean = [{"pick": 10, "conf": "Pac-12", "col_class": "JR"},
+             {"pick": 10, "conf": "SEC", "col_class": "SO"},
+             {"pick": 10, "conf": "Big Ten", "col_class": "SR"},
+             {"pick": 10, "conf": "MAC", "col_class": None}]
+    np.testing.assert_allclose(scorer.score(raw), scorer.score(clean))
+    # the same features the training data gets from clean_util.add_flags
+    flagged = clean_util.add_flags(pd.DataFrame(clean).assign(rnd=1))
+    X = search_util.feature_frame(flagged, features)
+    np.testing.assert_allclose(scorer.design(raw), X.to_numpy(dtype=float))
@@ -0,0 +1,222 @@
+import email.utils
+import os
+
+import pytest
+import requests
+
+import scrape_nfl
+import scrape_util
+
+
+def crawl_nfl(manifest, cache):
+    draft = scrape_nfl.scrape_draft_data(2019, 2020, cache=cache, manifest=manifest)
+    frontier = scrape_util.CrawlFrontier(manifest)
+    frontier.add(draft, "draft")
+    links = frontier.frame("nfl_link")
+    return links, scrape_nfl.scrape_nfl_data(links, cache=cache, manifest=manifest)
+
+
+def test_recrawl_one_draft_year(replay, tmp_path):
+    cache = scrape_util.ResponseCache(str(tmp_path / "http"))
+    manifest = scrape_util.CrawlManifest(str(tmp_path / "manifest.jsonl"))
+    links, first = crawl_nfl(manifest, cache)
+
+    # as in the comment of preprocessing.scrape
+    urls = scrape_nfl.player_urls(links, "nfl_link", year=2019)
+    manifest.reset(urls)
+    for url in urls:
+        cache.remove(url)
+
+    requests = replay.counts["requests"]
+    _, second = crawl_nfl(manifest, cache)
+    assert replay.counts["requests"] - requests == len(urls) > 0
+    assert len(second) == len(first)
+
+
+def test_cache_remove_keeps_size(tmp_path):
+    cache = scrape_util.ResponseCache(str(tmp_path / "http"))
+    cache.put("https://example.com/a", "a" * 100)
+    cache.put("https://example.com/b", "b" * 100)
+    size = cache._size
+    cache.remove("https://example.com/a")
+    cache.remove("https://example.com/missing")
+    assert cache.get("https://example.com/a") is None
+    assert cache.get("https://example.com/b") == "b" * 100
+    assert 0 < cache._size < size
+
+
+def test_crawl_listing_follows_next_page(replay, tmp_path):
+    url = scrape_nfl.draft_url(2019, 2020)
+    results = scrape_util.crawl_listing(url, scrape_nfl.parse_draft_page)
+    assert [len(rows) for rows in results] == [5, 3]
+    assert replay.counts["requests"] == 2
+
+    first = scrape_util.crawl_listing(url, scrape_nfl.parse_draft_page, max_pages=1)
+    assert len(first) == 1
+
+
+def test_crawl_listing_resumes_from_manifest(replay, tmp_path):
+    url = scrape_nfl.draft_url(2019, 2020)
+    manifest = scrape_util.CrawlManifest(str(tmp_path / "manifest.jsonl"))
+    crawled = scrape_util.crawl_listing(url, scrape_nfl.parse_draft_page, manifest=manifest)
+    requests = replay.counts["requests"]
+
+    reopened = scrape_util.CrawlManifest(manifest.path)
+    assert reopened.get(url)["next"] is not None
+    resumed = scrape_util.crawl_listing(url, scrape_nfl.parse_draft_page, manifest=reopened)
+    assert resumed == crawled
+    assert replay.counts["requests"] == requests
+
+
+def test_expired_pages_are_crawled_again(replay, tmp_path, monkeypatch):
+    cache = scrape_util.ResponseCache(str(tmp_path / "http"))
+    manifest = scrape_util.CrawlManifest(str(tmp_path / "manifest.jsonl"))
+    # every page is from the current season, and expires right away
+    monkeypatch.setattr(scrape_util, "CURRENT_SEASON_TTL", 0)
+    monkeypatch.setattr(scrape_util, "current_season", lambda today=None: 2019)
+    links, _ = crawl_nfl(manifest, cache)
+    requests = replay.counts["requests"]
+
+    reopened = scrape_util.CrawlManifest(manifest.path)
+    assert reopened.outstanding(links["nfl_link"]) == list(links["nfl_link"])
+    crawl_nfl(reopened, cache)
+    assert replay.counts["requests"] - requests == requests
+
+
+def test_manifest_expiry():
+    manifest = scrape_util.CrawlManifest("manifest.jsonl")
+    manifest.record("https://example.com/old", "ok", [[1]], ttl=None, fetched=0)
+    manifest.record("https://example.com/new", "ok", [[1]], ttl=60, fetched=1000)
+    manifest.record("https://example.com/bad", "failed", ttl=None)
+    assert manifest.is_done("https://example.com/old")
+    assert manifest.is_done("https://example.com/new", now=1059)
+    assert not manifest.is_done("https://example.com/new", now=1061)
+    assert not manifest.is_done("https://example.com/bad")
+
+
+def test_cache_expired_entry_kept(tmp_path, monkeypatch):
+    cache = scrape_util.ResponseCache(str(tmp_path / "http"))
+    cache.put("https://example.com/a", "fresh", ttl=60)
+    cache.put("https://example.com/b", "kept")
+    assert cache.get("https://example.com/a#frag") == "fresh"
+    now = scrape_util.time.time()
+    monkeypatch.setattr(scrape_util.time, "time", lambda: now + 120)
+    assert cache.get("https://example.com/a") is None
+    assert cache.entry("https://example.com/a")["body"] == "fresh"
+    # entries without a ttl never expire
+    assert cache.get("https://example.com/b") == "kept"
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = scrape_util.ResponseCache(str(tmp_path / "http"), max_bytes=10**6)
+    urls = [f"https://example.com/{letter}" for letter in "abc"]
+    for age, url in enumerate(urls):
+        cache.put(url, url)
+        os.utime(cache.path(url), (age, age))
+    entry_size = cache._size // 3
+    # reading a refreshes it, so b is now the least recently used
+    assert cache.get(urls[0]) == urls[0]
+    cache.max_bytes = int(entry_size * 3.5)
+    cache.put("https://example.com/d", "https://example.com/d")
+    assert cache.entry(urls[1]) is None
+    assert cache.get(urls[0]) == urls[0]
+    assert cache.get("https://example.com/d") is not None
+    assert cache._size <= cache.max_bytes
+
+
+def test_record_builder_schema_and_index():
+    records = scrape_util.RecordBuilder({"player": "object", "year": "Int16",
+                                         "yards": "float32"})
+    records.append(["a", 2019, 1.5])
+    records.extend([["b", None, None], ["c", 2020, 3.0]], index=["x", "y"])
+    assert len(records) == 3
+    df = records.to_frame()
+    assert list(df.columns) == ["player", "year", "yards"]
+    assert [str(dtype) for dtype in df.dtypes] == ["object", "Int16", "float32"]
+    assert df.index.tolist() == [0, "x", "y"]
+    assert df["year"].isna().tolist() == [False, True, False]
+    assert df.loc["y", "player"] == "c"
+    with pytest.raises(ValueError):
+        records.append(["d", 2021])
+    assert len(records) == 3
+
+
+def test_record_builder_empty():
+    df = scrape_util.RecordBuilder({"player": "object", "year": "Int16"}).to_frame()
+    assert df.empty
+    assert list(df.columns) == ["player", "year"]
+    assert str(df["year"].dtype) == "Int16"
+
+
+def http_error(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers["Retry-After"] = retry_after
+    return requests.HTTPError(response=response)
+
+
+def test_rate_controller_aimd():
+    controller = scrape_util.RateController(max_concurrency=4, latency_target=1.0)
+    assert controller.limit == 1
+    for _ in range(20):
+        controller.success(0.1)
+    assert controller.limit == 4
+    controller.success(2.0)
+    assert controller.limit == 2
+    controller.failed()
+    controller.failed()
+    assert controller.limit == 1
+    controller.throttled(30)
+    assert controller.limit == 1
+    assert controller.paused_until > scrape_util.time.monotonic() + 29
+
+
+def test_retry_after_and_backoff():
+    assert scrape_util.parse_retry_after("5") == 5.0
+    assert scrape_util.parse_retry_after("-5") == 0.0
+    assert scrape_util.parse_retry_after("soon") is None
+    assert scrape_util.parse_retry_after(None) is None
+    date = email.utils.formatdate(scrape_util.time.time() + 60, usegmt=True)
+    assert 55 < scrape_util.parse_retry_after(date) <= 60
+    assert scrape_util.error_status(http_error(429, "3")) == (429, 3.0)
+    assert scrape_util.error_status(requests.ConnectionError()) == (0, None)
+    for attempt in range(10):
+        wait = scrape_util.backoff(attempt)
+        assert 0 <= wait <= min(scrape_util.BACKOFF_CAP,
+                                scrape_util.BACKOFF_BASE * 2 ** attempt)
+        assert 3 <= scrape_util.backoff(attempt, 3.0) <= 3 + scrape_util.BACKOFF_BASE
+
+
+def test_fetch_pages_backs_off_only_when_host_struggles(monkeypatch):
+    monkeypatch.setattr(scrape_util, "backoff", lambda attempt, retry_after=None: 0)
+    errors = {"/missing": [http_error(404)],
+              "/broken": [http_error(500), http_error(502)],
+              "/busy": [http_error(429, "0.01")]}
+    calls = []
+
+    def fetch(url):
+        path = url[len("https://example.com"):]
+        calls.append(path)
+        if errors[path]:
+            raise errors[path].pop(0)
+        return path
+
+    def fetch_one(path):
+        controllers = scrape_util.HostControllers(per_host=4)
+        controllers.get("https://example.com").limit = 4.0
+        page = scrape_util.fetch_pages(["https://example.com" + path], fetch=fetch,
+                                       max_workers=1, delay=0, max_retries=1,
+                                       controllers=controllers)[0]
+        return page, controllers.get("https://example.com")
+
+    # a missing page is neither retried nor slows the host down
+    page, controller = fetch_one("/missing")
+    assert page is None and controller.limit == 4
+    # server errors are retried, and halve the host's limit each time
+    page, controller = fetch_one("/broken")
+    assert page is None and controller.limit == 1
+    # a throttled request waits out Retry-After, then succeeds
+    page, controller = fetch_one("/busy")
+    assert page == "/busy" and controller.limit == 2.5
+    assert calls == ["/missing", "/broken", "/broken", "/busy", "/busy"]
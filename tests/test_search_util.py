@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import search_util
+
+
+@pytest.fixture
+def cleaned():
+    rng = np.random.default_rng(0)
+    n = 120
+    df = pd.DataFrame({"pick": rng.integers(1, 250, n).astype(float),
+                       "col_rec_yds": rng.integers(200, 1800, n).astype(float),
+                       "left_early": rng.integers(0, 2, n).astype(float),
+                       "rnd": rng.integers(1, 8, n).astype(float)})
+    y = (8 - 0.02 * df["pick"] + 0.001 * df["col_rec_yds"]
+         + rng.normal(0, 1, n)).clip(lower=1)
+    return df, y
+
+
+def test_candidate_sets():
+    sets = search_util.candidate_sets(["pick", "a", "b"], required=["pick"], max_size=2)
+    assert sets == [("pick",), ("pick", "a"), ("pick", "b")]
+
+
+def test_feature_frame_derives_terms(cleaned):
+    df, _ = cleaned
+    X = search_util.feature_frame(df, ["pick", "pick_2", "early_Rd1"])
+    np.testing.assert_allclose(X["pick_2"], df["pick"] ** 2)
+    assert set(X["early_Rd1"]) <= {0.0, 1.0}
+    with pytest.raises(KeyError):
+        search_util.feature_frame(df, ["nothing"])
+
+
+def test_search_scores_every_combination_and_caches(cleaned, capsys):
+    df, y = cleaned
+    candidates = search_util.candidate_sets(["pick", "col_rec_yds"], required=["pick"])
+    results = search_util.search(df, y, candidates, alphas=[0, 10], seeds=[1, 2],
+                                 workers=2, cache_path="search.db")
+    assert len(results) == len(candidates) * 2 * 2
+    assert "4 of 4" in capsys.readouterr().out
+
+    again = search_util.search(df, y, candidates, alphas=[0, 10], seeds=[1, 2],
+                               workers=2, cache_path="search.db")
+    assert "0 of 4" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(again.sort_values(["features", "alpha", "seed"])
+                                  .reset_index(drop=True),
+                                  results.sort_values(["features", "alpha", "seed"])
+                                  .reset_index(drop=True))
+
+
+def test_widening_the_pool_keeps_cached_scores(cleaned, capsys):
+    df, y = cleaned
+    search_util.search(df, y, [("pick",), ("pick", "col_rec_yds")], seeds=[1],
+                       workers=1, cache_path="search.db")
+    capsys.readouterr()
+    # a new column in the pool only scores the feature sets using it
+    search_util.search(df, y, [("pick",), ("pick", "col_rec_yds"), ("pick", "left_early")],
+                       seeds=[1], workers=1, cache_path="search.db")
+    assert "1 of 3" in capsys.readouterr().out
+    # changing a column only rescores the feature sets using it
+    changed = df.assign(left_early=1 - df["left_early"])
+    search_util.search(changed, y, [("pick",), ("pick", "left_early")],
+                       seeds=[1], workers=1, cache_path="search.db")
+    assert "1 of 2" in capsys.readouterr().out
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+import sql_util
+
+
+def pipeline_output(scraped):
+    import preprocessing
+    return preprocessing.clean(preprocessing.merge(scraped))
+
+
+def view(scraped):
+    sql_util.write_database("players.db", scraped)
+    conn = sql_util.connect("players.db")
+    rows = sql_util.query(conn, "SELECT * FROM cleaned_features")
+    conn.close()
+    return rows
+
+
+def test_cleaned_features_matches_clean_stage(scraped):
+    cleaned = pipeline_output(scraped).sort_values("player_key").reset_index(drop=True)
+    rows = view(scraped).sort_values("player_key").reset_index(drop=True)
+
+    assert list(rows.columns) == list(cleaned.columns)
+    assert len(rows) == len(cleaned)
+    for column in cleaned.columns:
+        expected, actual = cleaned[column], rows[column]
+        if pd.api.types.is_numeric_dtype(expected):
+            np.testing.assert_allclose(actual.astype(float), expected.astype(float),
+                                       rtol=1e-6, err_msg=column)
+        else:
+            assert list(actual) == list(expected.astype(object)), column
+
+
+def test_cleaned_features_has_one_row_per_player(scraped):
+    rows = view(scraped)
+    assert rows["player_key"].is_unique
+    # rookie seasons only, not every season of the player pages
+    rookie = rows.set_index("player_clean")["rookie_rec_yards"]
+    assert rookie["N'Keal Harry"] == 105
+    assert rookie["Jerry Jeudy"] == 856
+
+
+def test_median_aggregate(scraped):
+    sql_util.write_database("players.db", scraped)
+    conn = sql_util.connect("players.db")
+    medians = sql_util.query(conn, """SELECT year, median(rookie_rec_yards) AS yards
+                                      FROM cleaned_features GROUP BY year ORDER BY year""")
+    conn.close()
+    assert list(medians["yards"]) == [127, 525.5]
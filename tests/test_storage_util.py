@@ -0,0 +1,37 @@
+import os
+
+import pandas as pd
+
+import storage_util
+
+
+def frame():
+    return pd.DataFrame({"player": ["a", "b", "c"], "year": [2019, 2019, 2020],
+                         "yards": [1.5, None, 3.0], "stats": [1, "x", None]})
+
+
+def test_read_selected_columns_and_years():
+    path = storage_util.write_table(frame(), "players")
+    assert sorted(os.listdir(path)) == ["year=2019", "year=2020"]
+    df = storage_util.read_table("players", columns=["player"], years=[2020])
+    assert df["player"].tolist() == ["c"]
+    # mixed text columns are stored as strings, missing values kept
+    stats = storage_util.read_table("players", columns=["player", "stats"])
+    assert stats.sort_values("player")["stats"].tolist()[:2] == ["1", "x"]
+    assert stats["stats"].isna().sum() == 1
+
+
+def test_replace_partitions_keeps_other_years():
+    storage_util.write_table(frame(), "players")
+    update = pd.DataFrame({"player": ["d"], "year": [2020], "yards": [4.0], "stats": [None]})
+    storage_util.write_table(update, "players", replace="partitions")
+    df = storage_util.read_table("players")
+    assert sorted(df["player"]) == ["a", "b", "d"]
+
+    storage_util.drop_partitions("players", [2019])
+    assert storage_util.read_table("players")["player"].tolist() == ["d"]
+
+
+def test_unpartitioned_table():
+    storage_util.write_table(frame().drop(columns="year"), "players")
+    assert len(storage_util.read_table("players")) == 3
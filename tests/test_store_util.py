@@ -0,0 +1,52 @@
+import pandas as pd
+
+import schema_util
+import storage_util
+import store_util
+
+
+def cleaned_rows(players, year, yards):
+    df = pd.DataFrame({"player_key": [f"/players/{p}.htm" for p in players],
+                       "player_clean": players,
+                       "year": year,
+                       "rookie_rec_yards": yards,
+                       "rnd": 1, "pick": range(1, len(players) + 1),
+                       "conf": "SEC", "left_early": 1})
+    return schema_util.coerce(df, schema_util.CLEANED)
+
+
+def test_read_table_partition_column_round_trips():
+    df = cleaned_rows(["a", "b"], 2019, [100, 200])
+    storage_util.write_table(df, "cleaned")
+    full = storage_util.read_table("cleaned")
+    assert str(full["year"].dtype) == "Int16"
+    assert sorted(full["player_clean"]) == ["a", "b"]
+    assert len(storage_util.read_table("cleaned", years=[2020])) == 0
+
+
+def test_write_upsert_read_full_table():
+    store = store_util.PlayerStore()
+    store.upsert("cleaned", pd.concat([cleaned_rows(["a", "b"], 2019, [100, 200]),
+                                       cleaned_rows(["c"], 2020, [300])]),
+                 schema_util.CLEANED)
+
+    # second run: refresh the 2020 class, with a changed and a new player
+    counts = store.upsert("cleaned", cleaned_rows(["c", "d"], 2020, [350, 50]),
+                          schema_util.CLEANED)
+    assert counts == {"updated": 1, "added": 1}
+
+    full = store.read("cleaned").sort_values("player_clean").reset_index(drop=True)
+    assert list(full["player_clean"]) == ["a", "b", "c", "d"]
+    assert list(full["rookie_rec_yards"]) == [100, 200, 350, 50]
+    assert list(full["year"]) == [2019, 2019, 2020, 2020]
+    assert str(full["year"].dtype) == "Int16"
+
+
+def test_upsert_drops_players_removed_from_a_class():
+    store = store_util.PlayerStore()
+    store.upsert("cleaned", cleaned_rows(["a", "b"], 2019, [100, 200]))
+    store.upsert("cleaned", cleaned_rows(["a"], 2019, [110]),
+                 keys=["/players/a.htm", "/players/b.htm"])
+    full = store.read("cleaned")
+    assert list(full["player_clean"]) == ["a"]
+    assert list(full["rookie_rec_yards"]) == [110]
@@ -0,0 +1,44 @@
+import table_util
+
+TABLE = """
+<table id="stats">
+<thead><tr><th data-stat="player">Player</th><th data-stat="yds">Yds</th></tr></thead>
+<tbody>
+<tr><td data-stat="player"><a href="/players/A/AbcdXx00.htm">A Player</a></td><td data-stat="yds">105</td></tr>
+<tr class="thead"><th data-stat="player">Player</th><th data-stat="yds">Yds</th></tr>
+<tr><td data-stat="player">B Player</td><td data-stat="yds"></td></tr>
+</tbody>
+<tfoot><tr><td data-stat="player">Career</td><td data-stat="yds">105</td></tr></tfoot>
+</table>
+"""
+
+
+def test_parse_table_skips_headers_and_reads_links():
+    rows = table_util.parse_table(TABLE, "stats")
+    assert rows == [{"player": "A Player", "player_href": "/players/A/AbcdXx00.htm",
+                     "yds": "105"},
+                    {"player": "B Player", "yds": ""}]
+    assert len(table_util.parse_table(TABLE, "stats", footer=True)) == 3
+
+
+def test_table_inside_comment():
+    page = f"<html><table id='other'></table><!--{TABLE}--></html>"
+    assert table_util.parse_table(page, "stats") == table_util.parse_table(TABLE)
+    assert table_util.find_table_html(page, "missing") is None
+    assert table_util.parse_table(page, "missing") == []
+
+
+def test_first_table_skips_commented_tables():
+    commented = TABLE.replace("A Player", "Commented")
+    page = f"<html><!--<p>{commented}</p>-->{TABLE}</html>"
+    assert table_util.find_table_html(page) == TABLE.strip()
+    # a table only found inside a comment is still found
+    assert table_util.parse_table(f"<!--{commented}-->") == table_util.parse_table(commented)
+    assert table_util.find_table_html("<!-- <table> -->") is None
+
+
+def test_find_next_page():
+    url = "https://example.com/finder.cgi?request=1&year_min=2019"
+    page = '<a href="/finder.cgi?request=1&amp;offset=5">Next Page</a>'
+    assert table_util.find_next_page(page, url) == "https://example.com/finder.cgi?request=1&offset=5"
+    assert table_util.find_next_page("<a href='/x'>Previous Page</a>", url) is None
@@ -0,0 +1,84 @@
+import socket
+import time
+
+import pytest
+import requests
+
+import scrape_util
+import telemetry_util
+
+
+@pytest.fixture
+def session():
+    session = requests.Session()
+    session.mount("http://", telemetry_util.timed_adapter(1))
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    hosts = []
+    getaddrinfo = socket.getaddrinfo
+
+    def counting(host, *args, **kwargs):
+        hosts.append(host)
+        return getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", counting)
+    return hosts
+
+
+def test_host_is_looked_up_once_per_connection(replay, session, lookups):
+    port = replay.server_address[1]
+    telemetry_util.reset_connection_timings()
+    session.get(f"http://localhost:{port}/missing")
+    dns, connect = telemetry_util.connection_timings()
+
+    # urllib3 only gets the resolved, numeric address
+    assert lookups == ["localhost", "127.0.0.1"] or lookups == ["localhost", "::1"]
+    assert dns > 0 and connect > 0
+
+
+def test_ttfb_excludes_connection_setup(replay, monkeypatch):
+    port = replay.server_address[1]
+    getaddrinfo = socket.getaddrinfo
+
+    def slow_lookup(host, *args, **kwargs):
+        if host == "localhost":
+            time.sleep(0.3)
+        return getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(socket, "getaddrinfo", slow_lookup)
+    monkeypatch.setattr(scrape_util, "REPLAY_SERVER", None)
+    scrape_util.telemetry.reset()
+    session = scrape_util.get_session(1)
+    with pytest.raises(requests.HTTPError):
+        scrape_util.http_get(session, f"http://localhost:{port}/missing")
+    session.close()
+
+    histograms = scrape_util.telemetry.histograms
+    assert histograms["dns_seconds"].sum >= 0.3
+    assert histograms["ttfb_seconds"].sum < 0.3
+    assert histograms["request_seconds"].sum >= 0.3
+
+
+def test_next_address_tried_when_one_refuses(replay, session, monkeypatch):
+    port = replay.server_address[1]
+    getaddrinfo = socket.getaddrinfo
+
+    def two_addresses(host, *args, **kwargs):
+        if host != "replay.test":
+            return getaddrinfo(host, *args, **kwargs)
+        # nothing listens on 127.0.0.2, the server is bound to 127.0.0.1
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port))
+                for address in ("127.0.0.2", "127.0.0.1")]
+
+    monkeypatch.setattr(socket, "getaddrinfo", two_addresses)
+    response = session.get(f"http://replay.test:{port}/missing")
+    assert response.status_code == 404
+
+
+def test_unknown_host_raises_connection_error(session):
+    with pytest.raises(requests.ConnectionError):
+        session.get("http://nonexistent.invalid/")
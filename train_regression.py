@@ -11,126 +11,191 @@ Depends on:
 
 @author: markfunke
 """
+import bootstrap_util as bt
+import numpy as np
 import pandas as pd
 import regression_util as rg
-from sklearn.linear_model import LinearRegression
+import score_util
+import search_util
+import storage_util
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from math import sqrt
 from sklearn.metrics import mean_squared_error
 
-# Read in pickle from final cleaned dataset
-# Limit to only columns considered for features
-# For the purpose of this analysis, only considering players with positive
-# receiving yards in their rookie year.
-nfl_df_clean = pd.read_pickle("pickles/cleaned.pkl")
-nfl_df = nfl_df_clean.loc[:,["rookie_rec_yards", "pick", "col_rec_yds"
-                           , "left_early", "power_5", "total_yards","conf"
-                           , "player_clean","rnd","SEC_Rd1"]]
-nfl_df = nfl_df.dropna(axis=0)
-mask = nfl_df["rookie_rec_yards"] > 0
-nfl_df = nfl_df[mask]
-
-# Note the following strong correlations from the heatmap and pair plots
-# created in plots.py
-#   1) "pick": draft pick of player
-#   2) "col_rec_yards": amount of rec yards in player's final year in college
-#   3) "left_early": engineered in preprocessing.py, 
-#       1: player left school as a JR, SO, or FR
-#       0: player left school after SR year
-#   Other variables worth testing could be:
-#   1) Polynomial form of pick - as there is a dropoff from early to late rounds
-#   2) "conf": Dummy variables based on conference of college. There appears
-#       to be some minor patterns by conference, particularly the SEC has
-#       a few of the top yardage totals.
-#   3) Interaction of Round and Conference variables. Based on plot of median
-#       yardage by round and conference, it appears 1st round SEC picks do
-#       extraordinarily well. Created "SEC_Rd1" dummy.
-
-# NOTE: The rest of the code is an iterative process, testing both the
-# overall fit of the variables on the training set with sm_summary()
-# and using cross validation to evaluate how the model generalizes with
-# cross_val_scores(), as well as how a Ridge regression compares
-
-# Separate our potential features from our target
-X = nfl_df.loc[:,["pick", "col_rec_yds", "left_early", "conf", "SEC_Rd1"]]
-
-# Our y value is right-skewed, in order to make residuals follow a normal
-# distribution, transformed target variable to be roughly normal
-# See plots.py for plots of target variable distribution
-y = (nfl_df['rookie_rec_yards']) ** (1/3)
-
-# Step 0: Separate out 20% of data for final test set
-# Set random state for replicability, this is not necessary
-X, X_test, y, y_test = \
-    train_test_split(X, y, test_size=0.2, random_state = 22)
-
-# Step 1: Create baseline model for comparison of all future models
-# "pick" is the most correlated with the target variable, so starting there
-# Baseline validation R2 : .248
-rg.cross_val_scores(X.loc[:,["pick"]],y, rand=22, lamb=10)
-rg.sm_summary(X.loc[:,["pick"]],y)
-
-# Model 1 - Add College Receiving Yards
-# Validation R2 : .257
-rg.cross_val_scores(X.loc[:,["pick","col_rec_yds"]],y, rand=22, lamb=200)
-rg.sm_summary(X.loc[:,["pick","col_rec_yds"]],y)
-
-# Model 2 - Add left_early
-# Validation R2 : .286
-rg.cross_val_scores(X.loc[:,["pick","col_rec_yds","left_early"]],y, rand=22, lamb=200)
-rg.sm_summary(X.loc[:,["pick","col_rec_yds","left_early"]],y)
-
-# Model 3 - Test polynomial feature of pick
-# as there appears to be a dropoff after early rounds
-# This does increase R2 a bit, but not much is gained vs added complexity
-# Validation R2 = .293
-X['pick_2'] = X['pick'] ** (2)
-rg.cross_val_scores(X.loc[:,["pick","col_rec_yds","left_early","pick_2"]],y, rand=22, lamb=200)
-rg.sm_summary(X.loc[:,["pick","col_rec_yds","left_early","pick_2"]],y)
-
-# Model 4 - Test adding conference dummy variables
-# All conference dummies have very high p-values
-# Ridge appears to agree by greatly reducing all conference features as we
-# increase lamda, besides SEC (including that in model 5)
-X_dummy = X.drop("pick_2",axis=1)
-X_dummy = X
-X_dummy = pd.get_dummies(X_dummy)
-X_dummy.drop(["conf_Other"],inplace=True,axis=1)
-rg.cross_val_scores(X_dummy,y, rand=22, lamb=500)
-rg.sm_summary(X_dummy,y)
-
-# Model 5 - Test adding Multiplicative SEC & Rd1 Value based on plots.py scatters
-# This adds to our R2 minimally, but lowers RMSE and Ridge appears to value it
-# just as much as college yards
-# Validation R2 = .294
-rg.cross_val_scores(X.loc[:,["pick","col_rec_yds","left_early","SEC_Rd1"]],y, rand=22, lamb=100)
-rg.sm_summary(X.loc[:,["pick","col_rec_yds","left_early","SEC_Rd1"]],y)
-
-# Final Test on Chosen Model
-# Score = .279, generalizes pretty well!
-# RMSE = 270, however, not a very good predictor
-X_final = X[["pick","col_rec_yds","left_early","SEC_Rd1"]]
-X_final_test = X_test[["pick","col_rec_yds","left_early","SEC_Rd1"]]
-
-lm = LinearRegression()
-lm.fit(X_final, y)
-lm.score(X_final_test, y_test)
-
-pred = lm.predict(X_final_test) ** 3
-actual = y_test ** 3
-RMSE_actual = sqrt(mean_squared_error(actual, pred)) 
-RMSE_actual
-
-#Export final file for use in plotting
-total = nfl_df[["pick", "col_rec_yds","left_early","SEC_Rd1"]]
-other = nfl_df[["rookie_rec_yards","player_clean","conf"]]
-
-total["pred"] = lm.predict(total) ** 3
-total["actual"] = other["rookie_rec_yards"]
-total["player"] = other["player_clean"]
-total["conf"] = other["conf"]
-
-total.to_csv("final_model.csv")
-
+# features the search of Model 7 picks from, every one scorable by
+# score_util.FEATURES so the chosen model can be saved
+SEARCH_POOL = ["pick", "col_rec_yds", "left_early", "power_5", "total_yards",
+               "SEC_Rd1", "pick_2", "log_pick", "early_Rd1"]
+
+
+def main():
+    # Read in final cleaned dataset
+    # Load only the columns considered for features from the stored table
+    # For the purpose of this analysis, only considering players with positive
+    # receiving yards in their rookie year.
+    nfl_df = storage_util.read_table("cleaned", columns=["rookie_rec_yards", "pick", "col_rec_yds"
+                               , "left_early", "power_5", "total_yards","conf"
+                               , "player_clean","rnd","SEC_Rd1"])
+    # Columns are stored with compact dtypes (see schema_util.py),
+    # convert numbers to plain floats for the modeling and plotting libraries
+    numeric = nfl_df.select_dtypes("number").columns
+    nfl_df[numeric] = nfl_df[numeric].astype("float64")
+    nfl_df = nfl_df.dropna(axis=0)
+    mask = nfl_df["rookie_rec_yards"] > 0
+    nfl_df = nfl_df[mask]
+
+    # Note the following strong correlations from the heatmap and pair plots
+    # created in plots.py
+    #   1) "pick": draft pick of player
+    #   2) "col_rec_yards": amount of rec yards in player's final year in college
+    #   3) "left_early": engineered in preprocessing.py, 
+    #       1: player left school as a JR, SO, or FR
+    #       0: player left school after SR year
+    #   Other variables worth testing could be:
+    #   1) Polynomial form of pick - as there is a dropoff from early to late rounds
+    #   2) "conf": Dummy variables based on conference of college. There appears
+    #       to be some minor patterns by conference, particularly the SEC has
+    #       a few of the top yardage totals.
+    #   3) Interaction of Round and Conference variables. Based on plot of median
+    #       yardage by round and conference, it appears 1st round SEC picks do
+    #       extraordinarily well. Created "SEC_Rd1" dummy.
+
+    # NOTE: The rest of the code is an iterative process, testing both the
+    # overall fit of the variables on the training set with sm_summary()
+    # and using cross validation to evaluate how the model generalizes with
+    # cross_val_scores(), as well as how a Ridge regression compares
+
+    # Separate our potential features from our target
+    X = nfl_df.loc[:,["pick", "col_rec_yds", "left_early", "conf", "SEC_Rd1"]]
+
+    # Our y value is right-skewed, in order to make residuals follow a normal
+    # distribution, transformed target variable to be roughly normal
+    # See plots.py for plots of target variable distribution
+    y = (nfl_df['rookie_rec_yards']) ** (1/3)
+
+    # Step 0: Separate out 20% of data for final test set
+    # Set random state for replicability, this is not necessary
+    X, X_test, y, y_test = \
+        train_test_split(X, y, test_size=0.2, random_state = 22)
+
+    # Step 1: Create baseline model for comparison of all future models
+    # "pick" is the most correlated with the target variable, so starting there
+    # Baseline validation R2 : .248
+    rg.cross_val_scores(X.loc[:,["pick"]],y, rand=22, lamb=10)
+    rg.sm_summary(X.loc[:,["pick"]],y)
+
+    # Model 1 - Add College Receiving Yards
+    # Validation R2 : .257
+    rg.cross_val_scores(X.loc[:,["pick","col_rec_yds"]],y, rand=22, lamb=200)
+    rg.sm_summary(X.loc[:,["pick","col_rec_yds"]],y)
+
+    # Model 2 - Add left_early
+    # Validation R2 : .286
+    rg.cross_val_scores(X.loc[:,["pick","col_rec_yds","left_early"]],y, rand=22, lamb=200)
+    rg.sm_summary(X.loc[:,["pick","col_rec_yds","left_early"]],y)
+
+    # Model 3 - Test polynomial feature of pick
+    # as there appears to be a dropoff after early rounds
+    # This does increase R2 a bit, but not much is gained vs added complexity
+    # Validation R2 = .293
+    X['pick_2'] = X['pick'] ** (2)
+    rg.cross_val_scores(X.loc[:,["pick","col_rec_yds","left_early","pick_2"]],y, rand=22, lamb=200)
+    rg.sm_summary(X.loc[:,["pick","col_rec_yds","left_early","pick_2"]],y)
+
+    # Model 4 - Test adding conference dummy variables
+    # All conference dummies have very high p-values
+    # Ridge appears to agree by greatly reducing all conference features as we
+    # increase lamda, besides SEC (including that in model 5)
+    X_dummy = X.drop("pick_2",axis=1)
+    X_dummy = X
+    X_dummy = pd.get_dummies(X_dummy)
+    X_dummy.drop(["conf_Other"],inplace=True,axis=1)
+    rg.cross_val_scores(X_dummy,y, rand=22, lamb=500)
+    rg.sm_summary(X_dummy,y)
+
+    # Model 5 - Test adding Multiplicative SEC & Rd1 Value based on plots.py scatters
+    # This adds to our R2 minimally, but lowers RMSE and Ridge appears to value it
+    # just as much as college yards
+    # Validation R2 = .294
+    rg.cross_val_scores(X.loc[:,["pick","col_rec_yds","left_early","SEC_Rd1"]],y, rand=22, lamb=100)
+    rg.sm_summary(X.loc[:,["pick","col_rec_yds","left_early","SEC_Rd1"]],y)
+
+    # Model 6 - Choose the Ridge lamda of the Model 5 features over a whole
+    # path of lamdas, averaged over 20 repeats of 5 fold cross validation
+    # instead of the single split of cross_val_scores (alpha 0 is Linear)
+    alphas = np.concatenate([[0], np.logspace(-2, 3, 26)])
+    path = rg.cv_path(X.loc[:,["pick","col_rec_yds","left_early","SEC_Rd1"]],y,
+                      alphas=alphas, seeds=range(20))
+    path_summary = rg.summarize_path(path)
+    print(path_summary.head())
+    best_alpha = path_summary.index[0]
+
+    # Model 7 - Search every set of up to 5 candidate features, always
+    # including pick, over the same lamdas and 20 seeds on every core.
+    # Scores are cached in cache/search.db, so rerunning only scores new
+    # features, lamdas or seeds.
+    candidates = search_util.candidate_sets(SEARCH_POOL, required=["pick"], max_size=5)
+    results = search_util.search(nfl_df.loc[X.index], y, candidates, alphas=alphas,
+                                 seeds=range(20))
+    print(search_util.summarize(results).head(10))
+
+    # Final Test on Chosen Model
+    # Score = .279, generalizes pretty well!
+    # RMSE = 270, however, not a very good predictor
+    X_final = X[["pick","col_rec_yds","left_early","SEC_Rd1"]]
+    X_final_test = X_test[["pick","col_rec_yds","left_early","SEC_Rd1"]]
+
+    lm = LinearRegression()
+    lm.fit(X_final, y)
+    lm.score(X_final_test, y_test)
+
+    pred = lm.predict(X_final_test) ** 3
+    actual = y_test ** 3
+    RMSE_actual = sqrt(mean_squared_error(actual, pred)) 
+    RMSE_actual
+
+    # Ridge with the lamda chosen in Model 6, on standardized features as
+    # cv_path fits it, to check the shrinkage holds up on the test set
+    ridge = make_pipeline(StandardScaler(), Ridge(alpha=best_alpha))
+    ridge.fit(X_final, y)
+    ridge_pred = ridge.predict(X_final_test) ** 3
+    print(f"Linear Test R2: {round(lm.score(X_final_test, y_test),3)}, "
+          f"RMSE: {round(RMSE_actual,1)}")
+    print(f"Ridge lamda {best_alpha:g} Test R2: {round(ridge.score(X_final_test, y_test),3)}, "
+          f"RMSE: {round(sqrt(mean_squared_error(actual, ridge_pred)),1)}")
+
+    # Bootstrap the final model for the uncertainty of its coefficients,
+    # test R2 and RMSE: 2000 refits on resampled training rows, each scored
+    # on a resample of the test set
+    boot_coefs = bt.bootstrap_coefs(X_final, y, n_boot=2000, seed=22)
+    boot_scores = bt.bootstrap_scores(boot_coefs, X_final_test, y_test, seed=22)
+    print(bt.intervals(boot_coefs))
+    print(bt.intervals(boot_scores))
+
+    #Export final file for use in plotting
+    total = nfl_df[["pick", "col_rec_yds","left_early","SEC_Rd1"]]
+    other = nfl_df[["rookie_rec_yards","player_clean","conf"]]
+
+    total["pred"] = lm.predict(total) ** 3
+    # 95% prediction interval of each player's rookie yards
+    pred_interval = bt.prediction_intervals(boot_coefs, X_final, y, total[["pick", "col_rec_yds","left_early","SEC_Rd1"]], seed=22)
+    total["pred_lower"] = pred_interval["pred_lower"]
+    total["pred_upper"] = pred_interval["pred_upper"]
+    total["actual"] = other["rookie_rec_yards"]
+    total["player"] = other["player_clean"]
+    total["conf"] = other["conf"]
+
+    total.to_csv("final_model.csv")
+
+    # Save the final model for scoring new draft classes without sklearn,
+    # e.g. python score_util.py serve model.json (see score_util.py)
+    score_util.save_model("model.json", lm.intercept_, lm.coef_, X_final.columns)
+
+
+# Only run as a script: the search's worker processes import this module
+# where they are spawned, and must not run the analysis again
 if __name__ == '__main__':
     main()